@@ -4,12 +4,13 @@ import asyncio
 from typing import Any
 
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+
+from app.core.google_clients import get_google_service
 
 
 def _build_calendar(credentials: Credentials):
-    """Build Google Calendar API service client."""
-    return build("calendar", "v3", credentials=credentials)
+    """Return the cached Google Calendar API service client."""
+    return get_google_service("calendar", "v3", credentials)
 
 
 async def list_calendars(credentials: Credentials) -> list[dict[str, Any]]:
@@ -14,20 +14,82 @@ class Settings(BaseSettings):
 
     # OpenAI
     openai_api_key: str = ""
+    # OpenAI 호출 한도 (계정 등급에 맞게 설정, 응답 헤더로 자동 보정)
+    openai_rpm: int = 500
+    openai_tpm: int = 200000
+    openai_max_concurrency: int = 8  # 동시 요청 상한 (429 시 절반으로 줄었다 회복)
+    openai_interactive_reserved: int = 1  # 백그라운드가 쓰지 않는 화면 요청용 슬롯
+    openai_max_retries: int = 4
+    # 앱 전역 OpenAI HTTP 연결 풀
+    openai_max_connections: int = 20
+    openai_max_keepalive_connections: int = 10
+    openai_keepalive_expiry_seconds: float = 90.0  # 유휴 연결 유지 시간
+    openai_timeout_seconds: float = 60.0
+    openai_http2: bool = True  # h2 패키지가 설치된 경우에만 적용
+    # 분류 요청 1회의 토큰 예산 — 메일 길이에 따라 청크 크기가 정해짐
+    classify_chunk_input_tokens: int = 6000
+    classify_chunk_output_tokens: int = 4096
+    classify_chunk_max_mails: int = 40
+
+    # 분류 결과 캐시
+    classify_cache_enabled: bool = True
+    classify_cache_ttl_days: int = 30  # 이보다 오래된 결과는 다시 분류
+    classify_cache_max_entries: int = 50000  # 초과 시 오래 안 쓴 항목부터 삭제
+
+    # 로컬 분류 (규칙 + 사용자별 경량 모델, LLM 호출 전 단계)
+    local_classify_enabled: bool = True
+    local_classify_threshold: float = 0.9  # 이 신뢰도 이상만 로컬에서 확정
+    local_model_min_examples: int = 30  # 모델 예측을 쓰기 위한 최소 학습 건수
+    local_model_bootstrap_limit: int = 2000  # 첫 사용 시 학습할 최근 분류 수
+
+    # Gmail
+    gmail_batch_size: int = 50  # batch 요청 1회당 messages.get 개수 (최대 100)
+    gmail_resync_max_results: int = 100  # historyId 만료 시 전체 재동기화 범위
 
     # Naver IMAP
     naver_imap_host: str = "imap.naver.com"
     naver_imap_port: int = 993
+    naver_imap_timeout_seconds: int = 30
+    naver_imap_pool_size: int = 2  # 계정당 최대 동시 세션 수
+    naver_imap_keepalive_seconds: int = 240  # 이보다 오래 쉰 세션은 NOOP으로 확인
+    naver_imap_pool_max_idle_seconds: int = 1500  # 이보다 오래 쉰 세션은 종료
+    naver_sync_folders: list[str] = ["INBOX"]  # 백그라운드 동기화 대상 폴더
+    naver_fetch_page_size: int = 50  # UID FETCH 1회당 메시지 수
+    naver_headers_only: bool = True  # 헤더+BODYSTRUCTURE만 받고 본문은 나중에
+    naver_idle_enabled: bool = False  # IMAP IDLE 푸시 감시 사용 여부
+    naver_idle_timeout_seconds: int = 1500  # IDLE 재시작 주기 (RFC 2177: 29분 미만)
+    naver_idle_retry_seconds: int = 60
+
+    # 본문 하이드레이션 (메타데이터/헤더만 동기화한 메일)
+    body_hydrate_batch_size: int = 20  # 틱당 사용자별 본문 하이드레이션 개수
+    body_hydrate_concurrency: int = 2  # 동시에 본문을 받는 사용자 수
 
     # Database
     database_url: str = "sqlite+aiosqlite:///./gtool.db"
+    sqlite_read_pool_size: int = 5  # 읽기 커넥션 수 (쓰기는 단일 커넥션)
+    sqlite_write_timeout_seconds: int = 60  # writer 커넥션 대기 한도
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size_kb: int = 64 * 1024
 
     # Frontend
     frontend_url: str = "http://localhost:3000"
 
     # Background Scheduler
-    sync_interval_minutes: int = 15
+    sync_interval_minutes: int = 15  # 신규 메일 비율을 모를 때의 기본 주기
+    sync_tick_seconds: int = 30  # 동기화 대상 확인 주기
+    sync_min_interval_seconds: int = 60  # 활성 사용자·메일 많은 사용자 최소 주기
+    sync_max_interval_minutes: int = 120  # 조용한 메일함 최대 주기
+    sync_active_window_minutes: int = 10  # 마지막 요청 후 빠른 폴링 유지 시간
+    sync_rate_alpha: float = 0.3  # 신규 메일 비율 EWMA 가중치
+    sync_user_concurrency: int = 16  # 동시에 동기화하는 사용자 수
+    sync_gmail_concurrency: int = 8  # 동시 Gmail 동기화 수
+    sync_imap_concurrency: int = 8  # 동시 네이버 IMAP 동기화 수
+    sync_llm_concurrency: int = 2  # 동시 분류(LLM) 작업 수
     auto_classify: bool = True
+    # 백그라운드 분류를 OpenAI Batch API로 제출 (비용 절반, 결과는 최대 24시간 후)
+    classify_use_batch_api: bool = False
+    classify_batch_api_max_mails: int = 500  # 작업 1건당 최대 메일 수
 
     # JWT
     secret_key: str = ""
@@ -1,22 +1,69 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
-from datetime import UTC, datetime
-from typing import Any
-
-from sqlalchemy import select
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING
+
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.service import build_credentials
 from app.config import settings
+from app.core import sync_schedule
 from app.core.database import AsyncSessionLocal
 from app.core.security import decrypt_value, encrypt_value
-from app.mail.models import Classification, Label, Mail, SyncState, User
-from app.mail.services.classifier import classify_batch
-from app.mail.services.feedback import get_feedback_examples, get_sender_rules
-from app.mail.services.gmail import get_messages_batch, list_message_ids
-from app.mail.services.helpers import filter_new_external_ids
-from app.mail.services.naver import fetch_messages
+from app.core.sync_schedule import SCHEDULE_SOURCE
+from app.mail.models import (
+    Classification,
+    ClassificationBatchJob,
+    Label,
+    Mail,
+    SyncState,
+    User,
+)
+from app.mail.services.classification_cache import get_classification_cache
+from app.mail.services.classification_state import apply_current_classifications
+from app.mail.services.classifier import (
+    BATCH_IN_PROGRESS,
+    ClassificationPlan,
+    build_batch_requests,
+    classify_batch,
+    fetch_batch_results,
+    plan_classification,
+    submit_batch,
+)
+from app.mail.services.feedback import get_feedback_examples
+from app.mail.services.gmail import (
+    HistoryExpiredError,
+    get_history_id,
+    get_messages_batch,
+    list_history,
+    list_message_ids,
+)
+from app.mail.services.helpers import (
+    filter_new_external_ids,
+    hydrate_bodies,
+    ingest_mails,
+)
+from app.mail.services.imap_pool import IMAPIdleWatcher
+from app.mail.services.llm_limiter import BACKGROUND
+from app.mail.services.local_classifier import (
+    classification_input,
+    get_local_model,
+    learn_from_results,
+    loaded_model,
+)
+from app.mail.services.naver import sync_folders
+from app.mail.services.sender_rules import get_sender_rule_matcher
+
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +94,7 @@ async def _update_sync_state(
     *,
     next_page_token: str | None = None,
     last_uid: str | None = None,
+    history_id: str | None = None,
 ) -> None:
     """SyncState 업데이트 또는 생성."""
     now = datetime.now(tz=UTC)
@@ -55,6 +103,8 @@ async def _update_sync_state(
             sync_state.next_page_token = next_page_token
         if last_uid is not None:
             sync_state.last_uid = last_uid
+        if history_id is not None:
+            sync_state.history_id = history_id
         sync_state.last_synced_at = now
     else:
         sync_state = SyncState(
@@ -62,42 +112,75 @@ async def _update_sync_state(
             source=source,
             next_page_token=next_page_token,
             last_uid=last_uid,
+            history_id=history_id,
             last_synced_at=now,
         )
         db.add(sync_state)
 
 
-def _save_mails(
-    db: AsyncSession,
-    user_id: int,
-    source: str,
-    messages: list[dict[str, Any]],
-) -> None:
-    """Mail 객체 생성 + DB 추가."""
-    for msg in messages:
-        mail = Mail(
-            user_id=user_id,
-            source=source,
-            external_id=msg["external_id"],
-            from_email=msg["from_email"],
-            from_name=msg["from_name"],
-            to_email=msg.get("to_email"),
-            subject=msg["subject"],
-            body_text=msg["body_text"],
-            folder=msg.get("folder"),
-            received_at=msg["received_at"],
-            is_read=msg["is_read"],
-        )
-        db.add(mail)
-
-
 # ---------------------------------------------------------------------------
 # Public sync functions
 # ---------------------------------------------------------------------------
 
 
+async def _list_gmail_changes(
+    db: AsyncSession,
+    user: User,
+    credentials: Credentials,
+    sync_state: SyncState | None,
+) -> tuple[list[str], str, dict[str, bool]]:
+    """Gmail 변경분 조회.
+
+    Returns: (새 메시지 ID 목록, 다음 historyId, {external_id: is_read} 변경분)
+
+    저장된 historyId가 있으면 history.list로 추가/라벨 변경분만 가져오고,
+    없거나 만료되었으면 최근 메일 범위로 전체 재동기화한다. 조회만 하고
+    쓰기는 하지 않는다 — writer 커넥션을 네트워크 대기 중에 잡지 않도록
+    변경분은 메시지 조회가 끝난 뒤 반영한다.
+    """
+    if sync_state and sync_state.history_id:
+        try:
+            delta = await list_history(credentials, sync_state.history_id)
+        except HistoryExpiredError:
+            logger.info(f"User {user.id}: Gmail historyId 만료, 전체 재동기화")
+        else:
+            # messagesAdded는 거의 항상 새 메일 — 중복은 삽입 시 무시됨
+            return delta["added_ids"], delta["history_id"], delta["read_changes"]
+
+    # 목록 조회 전에 historyId를 기록해야 그 사이 도착한 메일을 놓치지 않음
+    history_id = await get_history_id(credentials)
+    result = await list_message_ids(
+        credentials, max_results=settings.gmail_resync_max_results
+    )
+    new_ids = await filter_new_external_ids(
+        db, user.id, "gmail", result["message_ids"]
+    )
+    return new_ids, history_id, {}
+
+
+async def _apply_read_changes(
+    db: AsyncSession, user_id: int, read_changes: dict[str, bool]
+) -> None:
+    """UNREAD 라벨 변경분을 저장된 메일의 is_read에 반영."""
+    for is_read in (True, False):
+        external_ids = [
+            eid for eid, value in read_changes.items() if value is is_read
+        ]
+        if not external_ids:
+            continue
+        await db.execute(
+            update(Mail)
+            .where(
+                Mail.user_id == user_id,
+                Mail.source == "gmail",
+                Mail.external_id.in_(external_ids),
+            )
+            .values(is_read=is_read)
+        )
+
+
 async def sync_user_gmail(user: User, db: AsyncSession) -> int:
-    """Gmail 동기화.
+    """Gmail 증분 동기화 (history.list 기반).
 
     Returns: 새로 동기화된 메일 수
     """
@@ -113,43 +196,36 @@ async def sync_user_gmail(user: User, db: AsyncSession) -> int:
         credentials = build_credentials(token, refresh_token)
 
         sync_state = await _get_sync_state(db, user.id, "gmail")
-        page_token = sync_state.next_page_token if sync_state else None
-
-        result = await list_message_ids(
-            credentials, max_results=50, page_token=page_token
+        new_ids, history_id, read_changes = await _list_gmail_changes(
+            db, user, credentials, sync_state
         )
-        gmail_ids = result["message_ids"]
-
-        if not gmail_ids:
-            logger.debug(f"User {user.id}: Gmail 새 메일 없음")
-            return 0
 
-        new_ids = await filter_new_external_ids(db, user.id, "gmail", gmail_ids)
-
-        if not new_ids:
-            await _update_sync_state(
-                db, user.id, "gmail", sync_state,
-                next_page_token=result["next_page_token"],
+        details = []
+        if new_ids:
+            details = await get_messages_batch(
+                credentials, new_ids, metadata_only=True
             )
-            await db.commit()
-            logger.debug(f"User {user.id}: Gmail 새 메일 없음 (중복 필터링)")
-            return 0
 
-        details = await get_messages_batch(credentials, new_ids)
+        # 네트워크 조회가 끝난 뒤에만 쓰기 시작 (짧은 쓰기 트랜잭션)
+        await _apply_read_changes(db, user.id, read_changes)
+        inserted: list[int] = []
+        if details:
+            inserted = await ingest_mails(db, user.id, "gmail", details)
 
         # OAuth 토큰이 갱신되었으면 DB에 암호화하여 저장
         if credentials.token != token:
             user.google_oauth_token = encrypt_value(credentials.token)
 
-        _save_mails(db, user.id, "gmail", details)
         await _update_sync_state(
-            db, user.id, "gmail", sync_state,
-            next_page_token=result["next_page_token"],
+            db, user.id, "gmail", sync_state, history_id=history_id
         )
-
         await db.commit()
-        logger.info(f"User {user.id}: Gmail {len(details)}개 메일 동기화 완료")
-        return len(details)
+
+        if inserted:
+            logger.info(f"User {user.id}: Gmail {len(inserted)}개 메일 동기화 완료")
+        else:
+            logger.debug(f"User {user.id}: Gmail 새 메일 없음")
+        return len(inserted)
 
     except Exception as exc:
         logger.error(
@@ -159,6 +235,48 @@ async def sync_user_gmail(user: User, db: AsyncSession) -> int:
         return 0
 
 
+_hydrate_semaphore: asyncio.Semaphore | None = None
+
+
+async def hydrate_user_bodies(user: User, db: AsyncSession) -> int:
+    """메타데이터/헤더만 저장된 메일의 본문을 채움 (2단계 동기화).
+
+    최신 메일부터 body_hydrate_batch_size개씩, 동시에
+    body_hydrate_concurrency명까지만 처리한다.
+
+    Returns: 본문을 채운 메일 수
+    """
+    global _hydrate_semaphore
+    if _hydrate_semaphore is None:
+        _hydrate_semaphore = asyncio.Semaphore(settings.body_hydrate_concurrency)
+
+    try:
+        result = await db.execute(
+            select(Mail)
+            .where(Mail.user_id == user.id, Mail.body_loaded.is_(False))
+            .order_by(Mail.received_at.desc())
+            .limit(settings.body_hydrate_batch_size)
+        )
+        mails = list(result.scalars().all())
+        if not mails:
+            return 0
+
+        async with _hydrate_semaphore:
+            hydrated = await hydrate_bodies(db, user, mails)
+        await db.commit()
+        if hydrated:
+            logger.info(f"User {user.id}: 본문 {hydrated}개 하이드레이션 완료")
+        return hydrated
+
+    except Exception as exc:
+        logger.error(
+            f"User {user.id}: 본문 하이드레이션 실패 — "
+            f"{exc.__class__.__name__}: {exc}"
+        )
+        await db.rollback()
+        return 0
+
+
 async def sync_user_naver(user: User, db: AsyncSession) -> int:
     """네이버 동기화.
 
@@ -171,52 +289,32 @@ async def sync_user_naver(user: User, db: AsyncSession) -> int:
         return 0
 
     try:
-        sync_state = await _get_sync_state(db, user.id, "naver")
-        since_uid = sync_state.last_uid if sync_state else None
-
-        result = await fetch_messages(
+        summary = await sync_folders(
+            db,
+            user,
             settings.naver_imap_host,
             settings.naver_imap_port,
-            user.naver_email,
-            decrypt_value(user.naver_app_password),
-            folder="INBOX",
-            since_uid=since_uid,
+            settings.naver_sync_folders,
             max_results=50,
         )
 
-        messages = result["messages"]
-        last_uid = result["last_uid"]
+        synced = 0
+        for folder, result in summary.items():
+            if isinstance(result, BaseException):
+                logger.warning(
+                    f"User {user.id}: 네이버 폴더 {folder} 동기화 실패 — "
+                    f"{result.__class__.__name__}: {result}"
+                )
+                continue
+            synced += result["synced"]
 
-        if not messages:
+        await db.commit()
+        if not synced:
             logger.debug(f"User {user.id}: 네이버 새 메일 없음")
             return 0
 
-        external_ids = [m["external_id"] for m in messages]
-        new_ids = await filter_new_external_ids(db, user.id, "naver", external_ids)
-        new_messages = [m for m in messages if m["external_id"] in set(new_ids)]
-
-        if not new_messages:
-            if last_uid:
-                await _update_sync_state(
-                    db, user.id, "naver", sync_state, last_uid=last_uid
-                )
-            await db.commit()
-            logger.debug(
-                f"User {user.id}: 네이버 새 메일 없음 (중복 필터링)"
-            )
-            return 0
-
-        _save_mails(db, user.id, "naver", new_messages)
-        if last_uid:
-            await _update_sync_state(
-                db, user.id, "naver", sync_state, last_uid=last_uid
-            )
-
-        await db.commit()
-        logger.info(
-            f"User {user.id}: 네이버 {len(new_messages)}개 메일 동기화 완료"
-        )
-        return len(new_messages)
+        logger.info(f"User {user.id}: 네이버 {synced}개 메일 동기화 완료")
+        return synced
 
     except Exception as exc:
         logger.error(
@@ -229,93 +327,75 @@ async def sync_user_naver(user: User, db: AsyncSession) -> int:
 async def classify_user_mails(user: User, db: AsyncSession) -> int:
     """미분류 메일 배치 분류.
 
+    Batch API 모드에서는 완료된 작업 결과를 먼저 반영하고, 무료 단계(발신자
+    규칙·캐시·로컬 분류)로 못 정한 메일은 새 batch 작업으로 제출한다.
+
     Returns: 새로 분류된 메일 수
     """
+    use_batch_api = settings.classify_use_batch_api
     try:
-        # 분류되지 않은 메일 조회
-        unclassified_result = await db.execute(
-            select(Mail)
-            .outerjoin(Classification, Mail.id == Classification.mail_id)
-            .where(
-                Mail.user_id == user.id,
-                Classification.id.is_(None),
-            )
-            .limit(50)
+        classified_count = 0
+        if use_batch_api:
+            classified_count += await _apply_finished_batch_jobs(user, db)
+
+        # 분류되지 않은 메일 조회 (제출된 batch 작업에 포함된 메일 제외)
+        query = select(Mail).where(
+            Mail.user_id == user.id,
+            Mail.current_classification_id.is_(None),
         )
+        if use_batch_api:
+            query = query.where(Mail.batch_job_id.is_(None))
+        limit = settings.classify_batch_api_max_mails if use_batch_api else 50
+        unclassified_result = await db.execute(query.limit(limit))
         unclassified_mails = list(unclassified_result.scalars().all())
 
         if not unclassified_mails:
             logger.debug(f"User {user.id}: 미분류 메일 없음")
-            return 0
+            return classified_count
 
         # 피드백 데이터 조회
         feedback_examples = await get_feedback_examples(db, user.id, limit=20)
-        sender_rules = await get_sender_rules(db, user.id, min_count=2)
+        sender_rules = await get_sender_rule_matcher(db, user.id)
 
-        # 분류 입력 데이터 준비
-        emails = [
-            {
-                "from_email": mail.from_email or "",
-                "from_name": mail.from_name or "",
-                "subject": mail.subject or "",
-                "body": mail.body_text or "",
-            }
-            for mail in unclassified_mails
-        ]
-
-        # 배치 분류 (피드백 활용)
-        results = await classify_batch(
-            emails,
-            feedback_examples=feedback_examples,
-            sender_rules=sender_rules,
-        )
+        local_model = await get_local_model(db, user.id)
+        cache = get_classification_cache(db)
 
-        # 기본 라벨 가져오기 또는 생성
-        label_map: dict[str, int] = {}
-        for result in results:
-            category = result.get("category", "기타")
-            if category not in label_map:
-                label_result = await db.execute(
-                    select(Label).where(
-                        Label.user_id == user.id,
-                        Label.name == category,
-                        Label.source.is_(None),
-                    )
-                )
-                label = label_result.scalar_one_or_none()
-                if label is None:
-                    label = Label(
-                        user_id=user.id,
-                        name=category,
-                        source=None,
-                    )
-                    db.add(label)
-                    await db.flush()
-                label_map[category] = label.id
-
-        # Classification 저장
-        classified_count = 0
-        for i, result in enumerate(results):
-            idx = result.get("index", i)
-            if idx >= len(unclassified_mails):
-                continue
-
-            mail = unclassified_mails[idx]
-            category = result.get("category", "기타")
-            confidence = result.get("confidence", 0.8)
+        # 분류 입력 데이터 준비
+        emails = [classification_input(mail) for mail in unclassified_mails]
 
-            classification = Classification(
-                mail_id=mail.id,
-                label_id=label_map[category],
-                confidence=confidence,
+        plan = None
+        if use_batch_api:
+            plan = await plan_classification(
+                emails, feedback_examples, sender_rules, cache, local_model
+            )
+            results = plan.resolved
+        else:
+            # 배치 분류 (피드백 활용)
+            results = await classify_batch(
+                emails,
+                feedback_examples=feedback_examples,
+                sender_rules=sender_rules,
+                cache=cache,
+                local_model=local_model,
+                lane=BACKGROUND,
             )
-            db.add(classification)
-            classified_count += 1
 
+        classified_count += await _save_classifications(
+            db, user.id, unclassified_mails, results
+        )
+        if cache is not None:
+            await cache.flush()
         await db.commit()
+        learn_from_results(local_model, emails, results)
+        cache_hits = sum(1 for result in results if result.get("cached"))
+        local_hits = sum(1 for result in results if result.get("local"))
         logger.info(
-            f"User {user.id}: {classified_count}개 메일 분류 완료"
+            f"User {user.id}: {classified_count}개 메일 분류 완료 "
+            f"(캐시 적중 {cache_hits}개, 로컬 분류 {local_hits}개)"
         )
+
+        if plan is not None and plan.pending:
+            await _submit_batch_job(db, user.id, plan, emails, unclassified_mails)
         return classified_count
 
     except Exception as exc:
@@ -326,61 +406,491 @@ async def classify_user_mails(user: User, db: AsyncSession) -> int:
         return 0
 
 
-async def sync_all_users():
-    """메인 스케줄러 함수 - 모든 사용자 순회하며 동기화+분류."""
-    logger.info("백그라운드 동기화 시작")
+async def _save_classifications(
+    db: AsyncSession,
+    user_id: int,
+    mails: list[Mail],
+    results: list[dict],
+) -> int:
+    """분류 결과(index → mails 위치)를 저장. 커밋은 호출자가."""
+    # 기본 라벨 가져오기 또는 생성
+    label_map: dict[str, int] = {}
+    for result in results:
+        category = result.get("category", "기타")
+        if category not in label_map:
+            label_result = await db.execute(
+                select(Label).where(
+                    Label.user_id == user_id,
+                    Label.name == category,
+                    Label.source.is_(None),
+                )
+            )
+            label = label_result.scalar_one_or_none()
+            if label is None:
+                label = Label(
+                    user_id=user_id,
+                    name=category,
+                    source=None,
+                )
+                db.add(label)
+                await db.flush()
+            label_map[category] = label.id
+
+    # Classification 저장
+    applied: list[tuple[Mail, Classification]] = []
+    for i, result in enumerate(results):
+        idx = result.get("index", i)
+        if idx >= len(mails):
+            continue
+
+        mail = mails[idx]
+        category = result.get("category", "기타")
+        confidence = result.get("confidence", 0.8)
+
+        classification = Classification(
+            mail_id=mail.id,
+            label_id=label_map[category],
+            confidence=confidence,
+            is_local=bool(result.get("local")),
+        )
+        db.add(classification)
+        applied.append((mail, classification))
+
+    await apply_current_classifications(db, applied)
+    return len(applied)
 
-    # 사용자 ID 목록 조회
-    async with AsyncSessionLocal() as db:
-        result = await db.execute(select(User.id))
-        user_ids = list(result.scalars().all())
 
-    if not user_ids:
-        logger.info("등록된 사용자 없음, 동기화 스킵")
-        return
+async def _submit_batch_job(
+    db: AsyncSession,
+    user_id: int,
+    plan: ClassificationPlan,
+    emails: list[dict],
+    mails: list[Mail],
+) -> None:
+    """무료 단계로 못 정한 메일을 Batch API 작업으로 제출하고 기록."""
+    lines, chunks = build_batch_requests(plan, emails)
+    batch_id = await submit_batch(lines)
+    payload = {
+        "chunks": {
+            custom_id: [mails[i].id for i in indices]
+            for custom_id, indices in chunks.items()
+        },
+        "duplicates": {
+            str(mails[i].id): [mails[d].id for d in dups]
+            for i, dups in plan.duplicates.items()
+        },
+        "cache_keys": {str(mails[i].id): key for i, key in plan.cache_keys.items()},
+    }
+    job = ClassificationBatchJob(
+        user_id=user_id,
+        batch_id=batch_id,
+        payload=json.dumps(payload),
+        mail_count=len(plan.pending)
+        + sum(len(dups) for dups in plan.duplicates.values()),
+    )
+    db.add(job)
+    await db.flush()
+    # 작업이 끝날 때까지 다음 틱의 미분류 조회에서 제외
+    for i in plan.pending:
+        mails[i].batch_job_id = job.id
+        for d in plan.duplicates.get(i, []):
+            mails[d].batch_job_id = job.id
+    await db.commit()
+    logger.info(
+        f"User {user_id}: 분류 batch 작업 제출 ({batch_id}, {len(plan.pending)}개)"
+    )
 
-    total_gmail = 0
-    total_naver = 0
-    total_classified = 0
 
-    for user_id in user_ids:
-        # 사용자별 독립 세션 — 한 사용자의 rollback이 다른 사용자에 영향 주지 않음
-        try:
-            async with AsyncSessionLocal() as db:
-                # 세션에 바인딩된 User 객체 로드
-                user = await db.get(User, user_id)
-                if user is None:
+async def _apply_finished_batch_jobs(user: User, db: AsyncSession) -> int:
+    """끝난 batch 작업의 결과를 반영. Returns: 분류된 메일 수."""
+    result = await db.execute(
+        select(ClassificationBatchJob)
+        .where(
+            ClassificationBatchJob.user_id == user.id,
+            ClassificationBatchJob.status == "pending",
+        )
+        .order_by(ClassificationBatchJob.id)
+    )
+    classified_count = 0
+    for job in result.scalars().all():
+        status, outputs = await fetch_batch_results(job.batch_id)
+        if status in BATCH_IN_PROGRESS:
+            continue
+
+        payload = json.loads(job.payload)
+        # 제출 후 삭제됐거나 화면에서 이미 분류된 메일은 건너뜀
+        mail_ids = [i for ids in payload["chunks"].values() for i in ids]
+        for dups in payload["duplicates"].values():
+            mail_ids.extend(dups)
+        mails_result = await db.execute(
+            select(Mail).where(
+                Mail.id.in_(mail_ids),
+                Mail.current_classification_id.is_(None),
+            )
+        )
+        open_mails = {mail.id: mail for mail in mails_result.scalars().all()}
+
+        mails: list[Mail] = []
+        results: list[dict] = []
+        fresh: dict[str, dict] = {}
+        for custom_id, chunk_results in outputs.items():
+            ids = payload["chunks"].get(custom_id, [])
+            for item in chunk_results:
+                position = item.get("index", -1)
+                if not 0 <= position < len(ids):
                     continue
+                mail_id = ids[position]
+                key = payload["cache_keys"].get(str(mail_id))
+                if key is not None:
+                    fresh[key] = item
+                for target in [mail_id, *payload["duplicates"].get(str(mail_id), [])]:
+                    mail = open_mails.pop(target, None)
+                    if mail is not None:
+                        results.append({**item, "index": len(mails)})
+                        mails.append(mail)
+
+        classified_count += await _save_classifications(db, user.id, mails, results)
+        cache = get_classification_cache(db)
+        if cache is not None:
+            await cache.put_many(fresh)
+            await cache.flush()
+        # 실패·만료된 작업의 남은 메일은 다음 틱에 다시 제출됨
+        job.status = "applied" if status == "completed" else "failed"
+        job.finished_at = datetime.now(tz=UTC)
+        await db.execute(
+            update(Mail).where(Mail.batch_job_id == job.id).values(batch_job_id=None)
+        )
+        await db.commit()
+        learn_from_results(
+            loaded_model(user.id), [classification_input(m) for m in mails], results
+        )
+        logger.info(
+            f"User {user.id}: batch 작업 {job.batch_id} ({status}) — "
+            f"{len(results)}개 반영"
+        )
+    return classified_count
 
-                logger.info(f"User {user.id} ({user.email}) 동기화 시작")
 
-                # Gmail 동기화
-                gmail_count = await sync_user_gmail(user, db)
-                total_gmail += gmail_count
+# ---------------------------------------------------------------------------
+# Scheduler
+# ---------------------------------------------------------------------------
 
-                # 네이버 동기화
-                naver_count = await sync_user_naver(user, db)
-                total_naver += naver_count
+# 작업 종류별 동시 실행 한도 설정 이름 (hydrate는 자체 세마포어 사용)
+_BUDGET_SETTINGS = {
+    "user": "sync_user_concurrency",
+    "gmail": "sync_gmail_concurrency",
+    "imap": "sync_imap_concurrency",
+    "llm": "sync_llm_concurrency",
+}
 
-                # 자동 분류 (설정이 활성화된 경우)
-                classified_count = 0
-                if settings.auto_classify:
-                    classified_count = await classify_user_mails(user, db)
-                    total_classified += classified_count
+_budgets: dict[str, asyncio.Semaphore] = {}
+_user_locks: dict[int, asyncio.Lock] = {}
+_batch_tasks: set[asyncio.Task] = set()
+
+
+@dataclass
+class SyncRunStats:
+    """sync_all_users 1회 실행 통계 (간격 조정용)."""
+
+    started_at: datetime
+    duration_seconds: float = 0.0
+    users: int = 0
+    skipped: int = 0  # 이전 실행이 아직 진행 중이라 건너뛴 사용자
+    gmail: int = 0
+    naver: int = 0
+    classified: int = 0
+    slowest_user_seconds: float = 0.0
+    # 단계별 누적 소요 시간 (gmail / imap / hydrate / llm)
+    phase_seconds: dict[str, float] = field(default_factory=dict)
+
+
+last_sync_run: SyncRunStats | None = None
+
+
+def _budget(kind: str) -> asyncio.Semaphore | nullcontext:
+    """작업 종류별 세마포어 (처음 사용 시 생성)."""
+    setting = _BUDGET_SETTINGS.get(kind)
+    if setting is None:
+        return nullcontext()
+    semaphore = _budgets.get(kind)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(getattr(settings, setting))
+        _budgets[kind] = semaphore
+    return semaphore
 
-                logger.info(
-                    f"User {user.id} 완료: "
-                    f"Gmail {gmail_count}, 네이버 {naver_count}, "
-                    f"분류 {classified_count}"
-                )
 
+def _user_lock(user_id: int) -> asyncio.Lock:
+    lock = _user_locks.get(user_id)
+    if lock is None:
+        lock = _user_locks[user_id] = asyncio.Lock()
+    return lock
+
+
+async def _run_phase(
+    phase: str,
+    job: Callable[[User, AsyncSession], Awaitable[int]],
+    user_id: int,
+    stats: SyncRunStats | None = None,
+) -> int:
+    """작업 종류 한도 안에서 독립 세션으로 job 실행."""
+    async with _budget(phase):
+        started = time.perf_counter()
+        # 단계별 독립 세션 — Gmail/네이버를 병렬로 돌려도 세션을 공유하지 않음
+        async with AsyncSessionLocal() as db:
+            user = await db.get(User, user_id)
+            count = await job(user, db) if user is not None else 0
+        if stats is not None:
+            elapsed = time.perf_counter() - started
+            stats.phase_seconds[phase] = stats.phase_seconds.get(phase, 0.0) + elapsed
+    return count
+
+
+async def _sync_user(user_id: int, stats: SyncRunStats) -> None:
+    """사용자 1명 동기화: Gmail·네이버 병렬 → 본문 하이드레이션 → 분류."""
+    lock = _user_lock(user_id)
+    if lock.locked():
+        stats.skipped += 1
+        logger.warning(f"User {user_id}: 이전 동기화가 진행 중이라 건너뜀")
+        sync_schedule.finish(
+            user_id,
+            datetime.now(tz=UTC)
+            + timedelta(seconds=settings.sync_min_interval_seconds),
+        )
+        return
+
+    async with lock, _budget("user"):
+        started = time.perf_counter()
+        gmail_count = naver_count = 0
+        try:
+            gmail_count, naver_count = await asyncio.gather(
+                _run_phase("gmail", sync_user_gmail, user_id, stats),
+                _run_phase("imap", sync_user_naver, user_id, stats),
+            )
+            await _run_phase("hydrate", hydrate_user_bodies, user_id, stats)
+
+            classified_count = 0
+            if settings.auto_classify:
+                classified_count = await _run_phase(
+                    "llm", classify_user_mails, user_id, stats
+                )
         except Exception as exc:
             logger.error(
                 f"User {user_id} 동기화 실패 — {exc.__class__.__name__}: {exc}"
             )
+            return
+        finally:
+            await _reschedule(user_id, gmail_count + naver_count)
+
+        elapsed = time.perf_counter() - started
+        stats.users += 1
+        stats.gmail += gmail_count
+        stats.naver += naver_count
+        stats.classified += classified_count
+        stats.slowest_user_seconds = max(stats.slowest_user_seconds, elapsed)
+        logger.info(
+            f"User {user_id} 완료 ({elapsed:.1f}초): "
+            f"Gmail {gmail_count}, 네이버 {naver_count}, "
+            f"분류 {classified_count}"
+        )
+
+
+async def _reschedule(user_id: int, new_mails: int) -> None:
+    """실행 결과로 신규 메일 비율을 갱신하고 다음 동기화 시각을 정함."""
+    now = datetime.now(tz=UTC)
+    next_due_at: datetime | None = None
+    try:
+        async with AsyncSessionLocal() as db:
+            if await db.get(User, user_id) is None:
+                return
+            state = await _get_sync_state(db, user_id, SCHEDULE_SOURCE)
+            if state is None:
+                state = SyncState(user_id=user_id, source=SCHEDULE_SOURCE)
+                db.add(state)
+
+            state.new_mail_rate = sync_schedule.update_rate(
+                state.new_mail_rate,
+                new_mails,
+                sync_schedule.as_utc(state.last_synced_at),
+                now,
+            )
+            activity = sync_schedule.last_activity(user_id)
+            last_activity_at = sync_schedule.as_utc(state.last_activity_at)
+            if activity is not None and (
+                last_activity_at is None or activity > last_activity_at
+            ):
+                last_activity_at = activity
+                state.last_activity_at = activity
+            next_due_at = now + sync_schedule.next_sync_delay(
+                state.new_mail_rate, last_activity_at, now
+            )
+            state.next_due_at = next_due_at
+            state.last_synced_at = now
+            await db.commit()
+    except Exception as exc:
+        logger.error(
+            f"User {user_id}: 다음 동기화 일정 저장 실패 — "
+            f"{exc.__class__.__name__}: {exc}"
+        )
+        next_due_at = now + timedelta(minutes=settings.sync_interval_minutes)
+    finally:
+        sync_schedule.finish(user_id, next_due_at)
+
 
+async def _run_batch(user_ids: list[int]) -> SyncRunStats:
+    """사용자 목록을 동시에 동기화하고 실행 통계를 남김."""
+    global last_sync_run
+
+    stats = SyncRunStats(started_at=datetime.now(tz=UTC))
+    started = time.perf_counter()
+    await asyncio.gather(*(_sync_user(user_id, stats) for user_id in user_ids))
+    stats.duration_seconds = time.perf_counter() - started
+    last_sync_run = stats
+
+    phases = ", ".join(
+        f"{phase} {seconds:.1f}초" for phase, seconds in stats.phase_seconds.items()
+    )
     logger.info(
-        f"전체 동기화 완료: "
-        f"Gmail {total_gmail}, 네이버 {total_naver}, "
-        f"분류 {total_classified}"
+        f"동기화 완료 ({stats.duration_seconds:.1f}초, "
+        f"사용자 {stats.users}, 건너뜀 {stats.skipped}): "
+        f"Gmail {stats.gmail}, 네이버 {stats.naver}, "
+        f"분류 {stats.classified} [{phases}]"
     )
+    return stats
+
+
+async def sync_all_users() -> SyncRunStats | None:
+    """모든 사용자를 즉시 동기화+분류 (주기와 무관한 전체 실행).
+
+    사용자 수는 sync_user_concurrency, Gmail/IMAP/LLM 작업은 각각의
+    한도로 제한한다. 이전 실행이 끝나지 않은 사용자는 건너뛴다.
+    """
+    logger.info("전체 사용자 동기화 시작")
+
+    # 사용자 ID 목록 조회
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User.id))
+        user_ids = list(result.scalars().all())
+
+    if not user_ids:
+        logger.info("등록된 사용자 없음, 동기화 스킵")
+        return None
+
+    return await _run_batch(user_ids)
+
+
+async def _load_unscheduled_users() -> None:
+    """일정에 없는 사용자(시작 직후, 신규 가입)를 저장된 next_due_at으로 등록."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(User.id, SyncState.next_due_at).outerjoin(
+                SyncState,
+                (SyncState.user_id == User.id)
+                & (SyncState.source == SCHEDULE_SOURCE),
+            )
+        )
+        rows = result.all()
+
+    now = datetime.now(tz=UTC)
+    for user_id, next_due_at in rows:
+        if sync_schedule.is_scheduled(user_id):
+            continue
+        due_at = sync_schedule.as_utc(next_due_at) or now
+        if sync_schedule.last_activity(user_id) is not None:
+            # 일정 등록 전에 들어온 요청 — 활성 사용자로 취급
+            due_at = min(
+                due_at, now + timedelta(seconds=settings.sync_min_interval_seconds)
+            )
+        sync_schedule.schedule(user_id, due_at)
+
+
+async def sync_due_users() -> list[int]:
+    """스케줄러 틱 — 동기화 시각이 된 사용자만 백그라운드로 실행.
+
+    Returns: 이번 틱에 시작한 사용자 ID 목록
+    """
+    await _load_unscheduled_users()
+    user_ids = sync_schedule.pop_due(datetime.now(tz=UTC))
+    if not user_ids:
+        return []
+
+    logger.debug(f"동기화 대상 사용자 {len(user_ids)}명")
+    # 틱을 막지 않도록 태스크로 실행 — 오래 걸리는 사용자가 있어도
+    # 다음 틱에 다른 사용자가 제시간에 시작됨
+    task = asyncio.create_task(_run_batch(user_ids))
+    _batch_tasks.add(task)
+    task.add_done_callback(_batch_tasks.discard)
+    return user_ids
+
+
+# ---------------------------------------------------------------------------
+# Naver IMAP IDLE push
+# ---------------------------------------------------------------------------
+
+# user_id → (IDLE 감시 스레드, 감시 시작 시점의 암호화된 비밀번호)
+_idle_watchers: dict[int, tuple[IMAPIdleWatcher, str]] = {}
+_push_syncing: set[int] = set()
+
+
+async def sync_user_naver_now(user_id: int) -> None:
+    """IDLE 푸시로 새 메일 통지를 받은 사용자의 네이버 동기화+분류."""
+    if user_id in _push_syncing:
+        return
+    _push_syncing.add(user_id)
+    try:
+        # 스케줄러 실행과 겹치면 끝날 때까지 기다렸다가 동기화
+        async with _user_lock(user_id):
+            naver_count = await _run_phase("imap", sync_user_naver, user_id)
+            if naver_count and settings.auto_classify:
+                await _run_phase("hydrate", hydrate_user_bodies, user_id)
+                await _run_phase("llm", classify_user_mails, user_id)
+    finally:
+        _push_syncing.discard(user_id)
+
+
+async def refresh_naver_idle_watchers() -> None:
+    """네이버 계정별 IDLE 감시 스레드를 현재 사용자 설정과 맞춤."""
+    loop = asyncio.get_running_loop()
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(User.id, User.naver_email, User.naver_app_password).where(
+                User.naver_email.isnot(None),
+                User.naver_app_password.isnot(None),
+            )
+        )
+        accounts = {
+            user_id: (naver_email, encrypted)
+            for user_id, naver_email, encrypted in result.all()
+        }
+
+    for user_id, (watcher, encrypted) in list(_idle_watchers.items()):
+        account = accounts.get(user_id)
+        if account is None or account[1] != encrypted:
+            watcher.stop()
+            del _idle_watchers[user_id]
+
+    for user_id, (naver_email, encrypted) in accounts.items():
+        if user_id in _idle_watchers:
+            continue
+
+        def _notify(user_id: int = user_id) -> None:
+            asyncio.run_coroutine_threadsafe(sync_user_naver_now(user_id), loop)
+
+        watcher = IMAPIdleWatcher(
+            settings.naver_imap_host,
+            settings.naver_imap_port,
+            naver_email,
+            decrypt_value(encrypted),
+            on_new_mail=_notify,
+        )
+        watcher.start()
+        _idle_watchers[user_id] = (watcher, encrypted)
+
+    logger.debug(f"IMAP IDLE 감시 {len(_idle_watchers)}개 실행 중")
+
+
+def stop_naver_idle_watchers() -> None:
+    """모든 IDLE 감시 스레드 종료."""
+    for watcher, _ in _idle_watchers.values():
+        watcher.stop()
+    _idle_watchers.clear()
@@ -2,20 +2,90 @@ from __future__ import annotations
 
 from collections.abc import AsyncGenerator
 
+from sqlalchemy import event, make_url
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, Session
 
 from app.config import settings
 
-engine = create_async_engine(settings.database_url, echo=False)
+_url = make_url(settings.database_url)
+_is_sqlite_file = _url.get_backend_name() == "sqlite" and _url.database not in (
+    None,
+    "",
+    ":memory:",
+)
+
+# 읽기용 커넥션 풀
+engine = create_async_engine(
+    settings.database_url,
+    echo=False,
+    **({"pool_size": settings.sqlite_read_pool_size} if _is_sqlite_file else {}),
+)
+
+# 쓰기 전용 단일 커넥션 — 풀 대기열이 곧 writer 큐 (SQLite는 writer가 하나뿐)
+write_engine = (
+    create_async_engine(
+        settings.database_url,
+        echo=False,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.sqlite_write_timeout_seconds,
+    )
+    if _is_sqlite_file
+    else engine
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+        cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+        # 음수는 KiB 단위
+        cursor.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_size_kb}")
+    finally:
+        cursor.close()
+
+
+if _is_sqlite_file:
+    for _engine in (engine, write_engine):
+        event.listen(_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the read pool and writes to the writer.
+
+    From the first INSERT/UPDATE/DELETE or flush until the transaction
+    ends, every statement goes to the writer connection so the session
+    reads its own uncommitted writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self.info.get("writing")
+            or self._flushing
+            or getattr(clause, "is_dml", False)
+        ):
+            self.info["writing"] = True
+            return write_engine.sync_engine
+        return engine.sync_engine
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _release_writer(session: Session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop("writing", None)
+
 
 AsyncSessionLocal = async_sessionmaker(
-    bind=engine,
     class_=AsyncSession,
+    sync_session_class=RoutingSession,
     expire_on_commit=False,
 )
 
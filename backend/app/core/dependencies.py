@@ -9,6 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.core.exceptions import NotAuthenticatedException, UserNotFoundException
 from app.core.security import verify_access_token
+from app.core.sync_schedule import record_activity
 from app.mail.models import User
 
 
@@ -26,4 +27,6 @@ async def get_current_user(
     user = result.scalar_one_or_none()
     if user is None:
         raise UserNotFoundException()
+    # 활동 중인 사용자는 메일 동기화 주기를 앞당김
+    record_activity(user.id)
     return user
@@ -20,6 +20,11 @@ class MessageNotFoundException(HTTPException):
         super().__init__(status_code=404, detail="Message not found")
 
 
+class InvalidCursorException(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(status_code=400, detail="Invalid pagination cursor")
+
+
 class ClassificationNotFoundException(HTTPException):
     def __init__(self) -> None:
         super().__init__(status_code=404, detail="Classification not found")
@@ -0,0 +1,81 @@
+"""Process-wide cache of Google API service clients.
+
+``googleapiclient.discovery.build`` re-parses the discovery document and
+allocates a new HTTP transport on every call. This module parses each
+static discovery document once, builds one template service per API and
+hands every caller a cheap copy bound to the caller's own credentials, so
+a token refresh always lands on the object the caller persists. The
+shared template is never mutated.
+
+httplib2 transports are not thread-safe, so requests made through a
+service run on a per-thread transport instead of a shared one.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import threading
+from typing import Any
+
+import httplib2
+from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.http import HttpRequest, build_http
+
+_lock = threading.Lock()
+_local = threading.local()
+_documents: dict[tuple[str, str], dict] = {}
+_templates: dict[tuple[str, str], Any] = {}
+
+
+def _discovery_document(api: str, version: str) -> dict:
+    """Return the parsed static discovery document (parsed once per process)."""
+    key = (api, version)
+    doc = _documents.get(key)
+    if doc is None:
+        raw = get_static_doc(api, version)
+        if raw is None:
+            raise ValueError(f"Static discovery document not found: {api} {version}")
+        doc = json.loads(raw)
+        _documents[key] = doc
+    return doc
+
+
+def _thread_http() -> httplib2.Http:
+    """Return the calling thread's keep-alive transport."""
+    http = getattr(_local, "http", None)
+    if http is None:
+        http = build_http()
+        _local.http = http
+    return http
+
+
+def _request_builder(http: AuthorizedHttp, *args: Any, **kwargs: Any) -> HttpRequest:
+    # 요청을 실행하는 스레드의 전송 계층에 호출자의 credentials를 붙임
+    authed = AuthorizedHttp(http.credentials, http=_thread_http())
+    return HttpRequest(authed, *args, **kwargs)
+
+
+def _template(api: str, version: str) -> Any:
+    key = (api, version)
+    with _lock:
+        service = _templates.get(key)
+        if service is None:
+            service = build_from_document(
+                _discovery_document(api, version),
+                http=AuthorizedHttp(None, http=_thread_http()),
+                requestBuilder=_request_builder,
+            )
+            _templates[key] = service
+    return service
+
+
+def get_google_service(api: str, version: str, credentials: Credentials) -> Any:
+    """Return a service client authorized with ``credentials``."""
+    # Resource 복사는 메서드만 다시 바인딩 — 문서 파싱·스키마 구성은 공유
+    service = copy.copy(_template(api, version))
+    service._http = AuthorizedHttp(credentials, http=_thread_http())
+    return service
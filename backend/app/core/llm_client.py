@@ -0,0 +1,111 @@
+"""App-scoped OpenAI client.
+
+Creating an ``AsyncOpenAI`` per call gives every call its own httpx
+connection pool, so each request pays DNS + TCP + TLS setup and the pools
+are never closed. This module keeps one client over one tuned, keep-alive
+httpx pool for the whole process: ``start_llm_client`` runs in the app
+lifespan and ``close_llm_client`` on shutdown. ``get_llm_client`` can be
+used directly or as a FastAPI dependency; outside the lifespan (scripts,
+tests) it starts the client on first use.
+
+HTTP/2 is enabled when ``openai_http2`` is set and the optional ``h2``
+package is installed. Connection reuse is measured through httpcore trace
+events and exposed via ``connection_stats``.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import logging
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# h2가 없으면 httpx가 http2=True에서 ImportError를 내므로 미리 확인
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@dataclass
+class ConnectionStats:
+    requests: int = 0
+    new_connections: int = 0
+    http2_requests: int = 0
+
+    @property
+    def reuse_rate(self) -> float:
+        if not self.requests:
+            return 0.0
+        return max(0, self.requests - self.new_connections) / self.requests
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "reuse_rate": round(self.reuse_rate, 4)}
+
+
+# 프로세스 시작 이후 누적 통계
+connection_stats = ConnectionStats()
+
+_client: AsyncOpenAI | None = None
+_http: httpx.AsyncClient | None = None
+
+
+async def _trace(event_name: str, info: dict) -> None:
+    if event_name == "connection.connect_tcp.complete":
+        connection_stats.new_connections += 1
+    elif event_name == "http2.send_request_headers.started":
+        connection_stats.http2_requests += 1
+
+
+async def _on_request(request: httpx.Request) -> None:
+    connection_stats.requests += 1
+    request.extensions["trace"] = _trace
+
+
+def _build_http_client(**kwargs: Any) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=settings.openai_http2 and HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=settings.openai_max_connections,
+            max_keepalive_connections=settings.openai_max_keepalive_connections,
+            keepalive_expiry=settings.openai_keepalive_expiry_seconds,
+        ),
+        timeout=httpx.Timeout(settings.openai_timeout_seconds, connect=10.0),
+        event_hooks={"request": [_on_request]},
+        **kwargs,
+    )
+
+
+def start_llm_client(**http_kwargs: Any) -> AsyncOpenAI:
+    """Create the shared client (no-op if already started)."""
+    global _client, _http
+    if _client is None:
+        _http = _build_http_client(**http_kwargs)
+        # 재시도는 공유 rate limiter가 담당
+        _client = AsyncOpenAI(
+            api_key=settings.openai_api_key, http_client=_http, max_retries=0
+        )
+        logger.info(
+            f"OpenAI 클라이언트 시작 (HTTP/2: "
+            f"{'사용' if settings.openai_http2 and HTTP2_AVAILABLE else '미사용'}, "
+            f"최대 연결 {settings.openai_max_connections}개)"
+        )
+    return _client
+
+
+async def close_llm_client() -> None:
+    """Close the shared client and its connection pool."""
+    global _client, _http
+    if _http is not None:
+        await _http.aclose()
+    _client = None
+    _http = None
+
+
+def get_llm_client() -> AsyncOpenAI:
+    """The shared client (usable as a FastAPI dependency)."""
+    return _client if _client is not None else start_llm_client()
@@ -0,0 +1,310 @@
+"""Versioned schema migrations.
+
+``Base.metadata.create_all`` creates missing tables but never alters
+existing ones. Each migration below is a numbered step that brings an
+existing database up to the current models; applied versions are recorded
+in ``schema_migrations``. Steps are idempotent (they inspect the schema
+first), so databases upgraded by the old startup helpers are handled too.
+
+Migrations run at startup and can be applied by hand::
+
+    python -m app.core.migrations            # apply pending migrations
+    python -m app.core.migrations --status   # list applied / pending
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from sqlalchemy import (
+    Column,
+    Connection,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    UniqueConstraint,
+    inspect,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.schema import CreateColumn
+
+from app.core.database import Base
+
+logger = logging.getLogger(__name__)
+
+# 모델 MetaData와 분리 — create_all/drop_all 대상이 아님
+_migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+# ---------------------------------------------------------------------------
+# Operations (모델 정의를 기준으로 동작, 이미 적용된 경우 건너뜀)
+# ---------------------------------------------------------------------------
+
+
+def add_columns(conn: Connection, table_name: str, *column_names: str) -> None:
+    """Add model columns missing from an existing table."""
+    table = Base.metadata.tables[table_name]
+    inspector = inspect(conn)
+    if not inspector.has_table(table_name):
+        return
+    existing = {c["name"] for c in inspector.get_columns(table_name)}
+    for name in column_names:
+        if name in existing:
+            continue
+        ddl = CreateColumn(table.columns[name]).compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {ddl}"))
+        logger.info(f"컬럼 추가: {table_name}.{name}")
+
+
+def create_indexes(conn: Connection, table_name: str, *index_names: str) -> None:
+    """Create model indexes missing from an existing table."""
+    table = Base.metadata.tables[table_name]
+    inspector = inspect(conn)
+    if not inspector.has_table(table_name):
+        return
+    existing = {index["name"] for index in inspector.get_indexes(table_name)}
+    indexes = {index.name: index for index in table.indexes}
+    for name in index_names:
+        if name not in existing:
+            indexes[name].create(conn)
+            logger.info(f"인덱스 추가: {name}")
+
+
+def drop_index(conn: Connection, index_name: str) -> None:
+    conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+
+
+def rebuild_table(conn: Connection, table_name: str) -> None:
+    """Rebuild a SQLite table whose unique constraints differ from the model.
+
+    SQLite cannot ALTER a constraint, so the table is copied into a new one
+    (create new, copy, drop old, rename), keeping foreign keys that point at it.
+    """
+    table = Base.metadata.tables[table_name]
+    inspector = inspect(conn)
+    if not inspector.has_table(table_name):
+        return
+    wanted = {
+        tuple(c.name for c in constraint.columns)
+        for constraint in table.constraints
+        if isinstance(constraint, UniqueConstraint)
+    }
+    current = {
+        tuple(uc["column_names"])
+        for uc in inspector.get_unique_constraints(table_name)
+    }
+    if wanted == current:
+        return
+
+    columns = ", ".join(
+        c["name"] for c in inspector.get_columns(table_name) if c["name"] in table.c
+    )
+    for index in inspector.get_indexes(table_name):
+        drop_index(conn, index["name"])
+    tmp_name = f"{table_name}__new"
+    # 외래 키 대상 테이블도 같은 MetaData에 있어야 DDL을 만들 수 있음
+    tmp_metadata = MetaData()
+    for other in Base.metadata.sorted_tables:
+        if other is not table:
+            other.to_metadata(tmp_metadata)
+    table.to_metadata(tmp_metadata, name=tmp_name).create(conn)
+    conn.execute(
+        text(f"INSERT INTO {tmp_name} ({columns}) SELECT {columns} FROM {table_name}")
+    )
+    conn.execute(text(f"DROP TABLE {table_name}"))
+    conn.execute(text(f"ALTER TABLE {tmp_name} RENAME TO {table_name}"))
+    logger.info(f"테이블 재생성 (UNIQUE 제약 변경): {table_name}")
+
+
+# ---------------------------------------------------------------------------
+# Migrations
+# ---------------------------------------------------------------------------
+
+
+def _mail_body_parts(conn: Connection) -> None:
+    add_columns(conn, "mails", "body_parts", "size_bytes")
+
+
+def _sync_state_folders(conn: Connection) -> None:
+    add_columns(conn, "sync_states", "folder", "uidvalidity")
+    rebuild_table(conn, "sync_states")
+
+
+def _sync_schedule(conn: Connection) -> None:
+    add_columns(
+        conn, "sync_states", "next_due_at", "new_mail_rate", "last_activity_at"
+    )
+
+
+def _mail_keyset_indexes(conn: Connection) -> None:
+    create_indexes(
+        conn, "mails", "ix_mail_user_source_received", "ix_mail_user_received"
+    )
+    # (user_id, source, received_at, id) 인덱스가 대체
+    drop_index(conn, "ix_mail_user_source")
+
+
+def _classification_state(conn: Connection) -> None:
+    from app.mail.services.classification_state import (
+        backfill_classification_state,
+    )
+
+    add_columns(conn, "mails", "current_label_id", "current_classification_id")
+    create_indexes(conn, "mails", "ix_mail_user_label_received")
+    backfill_classification_state(conn)
+
+
+def _classification_indexes(conn: Connection) -> None:
+    create_indexes(
+        conn,
+        "classifications",
+        "ix_classification_mail_created",
+        "ix_classification_label",
+        "ix_classification_feedback",
+    )
+
+
+def _mail_search_index(conn: Connection) -> None:
+    from app.mail.services.search import create_search_index
+
+    create_search_index(conn)
+
+
+def _mail_bulk_flag(conn: Connection) -> None:
+    add_columns(conn, "mails", "is_bulk")
+
+
+def _mail_snippet_history(conn: Connection) -> None:
+    # 기존 메일은 본문까지 받은 상태 — body_loaded는 서버 기본값 1로 추가
+    add_columns(conn, "mails", "snippet", "body_loaded")
+    add_columns(conn, "sync_states", "history_id")
+
+
+def _classification_local_flag(conn: Connection) -> None:
+    add_columns(conn, "classifications", "is_local")
+
+
+def _mail_batch_job(conn: Connection) -> None:
+    add_columns(conn, "mails", "batch_job_id")
+    create_indexes(conn, "mails", "ix_mail_batch_job")
+    # 진행 중인 작업의 메일 표시 (이전에는 payload JSON에만 기록)
+    if not inspect(conn).has_table("classification_batch_jobs"):
+        return
+    jobs = conn.execute(
+        text(
+            "SELECT id, payload FROM classification_batch_jobs "
+            "WHERE status = 'pending'"
+        )
+    )
+    for job_id, payload in jobs.all():
+        data = json.loads(payload)
+        mail_ids = [i for ids in data["chunks"].values() for i in ids]
+        for dups in data["duplicates"].values():
+            mail_ids.extend(dups)
+        if mail_ids:
+            conn.execute(
+                update(Base.metadata.tables["mails"])
+                .where(Base.metadata.tables["mails"].c.id.in_(mail_ids))
+                .values(batch_job_id=job_id)
+            )
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "mail_body_parts", _mail_body_parts),
+    Migration(2, "sync_state_folders", _sync_state_folders),
+    Migration(3, "sync_schedule", _sync_schedule),
+    Migration(4, "mail_keyset_indexes", _mail_keyset_indexes),
+    Migration(5, "classification_state", _classification_state),
+    Migration(6, "classification_indexes", _classification_indexes),
+    Migration(7, "mail_search_index", _mail_search_index),
+    Migration(8, "mail_bulk_flag", _mail_bulk_flag),
+    Migration(9, "mail_snippet_history", _mail_snippet_history),
+    Migration(10, "classification_local_flag", _classification_local_flag),
+    Migration(11, "mail_batch_job", _mail_batch_job),
+]
+
+
+def applied_versions(conn: Connection) -> set[int]:
+    if not inspect(conn).has_table(schema_migrations.name):
+        return set()
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def run_migrations(conn: Connection) -> list[int]:
+    """Create missing tables and apply pending migrations in order.
+
+    Runs inside the caller's transaction. Returns the versions applied.
+    """
+    Base.metadata.create_all(conn)
+    _migration_metadata.create_all(conn)
+
+    done = applied_versions(conn)
+    applied: list[int] = []
+    for migration in MIGRATIONS:
+        if migration.version in done:
+            continue
+        migration.upgrade(conn)
+        conn.execute(
+            schema_migrations.insert().values(
+                version=migration.version,
+                name=migration.name,
+                applied_at=datetime.now(tz=UTC),
+            )
+        )
+        logger.info(f"마이그레이션 적용: {migration.version:04d}_{migration.name}")
+        applied.append(migration.version)
+    return applied
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description="DB 스키마 마이그레이션")
+    parser.add_argument(
+        "--status", action="store_true", help="적용/대기 중인 마이그레이션 출력"
+    )
+    args = parser.parse_args()
+
+    # 모든 모델을 MetaData에 등록
+    import app.bookmark.models  # noqa: F401
+    import app.mail.models  # noqa: F401
+    import app.todo.models  # noqa: F401
+    from app.core.database import write_engine
+
+    async with write_engine.begin() as conn:
+        if args.status:
+            done = await conn.run_sync(applied_versions)
+            for migration in MIGRATIONS:
+                state = "applied" if migration.version in done else "pending"
+                print(f"{migration.version:04d}_{migration.name}: {state}")
+        else:
+            applied = await conn.run_sync(run_migrations)
+            print(f"적용된 마이그레이션: {applied or '없음'}")
+    await write_engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
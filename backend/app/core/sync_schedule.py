@@ -0,0 +1,129 @@
+"""Adaptive per-user sync cadence.
+
+Each user has a next-due time derived from their recent new-mail rate and
+last activity. Users with an active session are polled every
+sync_min_interval_seconds; otherwise the interval follows the average gap
+between incoming mails, so quiet mailboxes back off towards
+sync_max_interval_minutes as the rate decays.
+
+Due times live in an in-memory min-heap so each scheduler tick only pops
+the users that are due. The heap is rebuilt from ``SyncState.next_due_at``
+on startup.
+"""
+
+from __future__ import annotations
+
+import heapq
+from datetime import UTC, datetime, timedelta
+
+from app.config import settings
+
+# SyncState.source 값 — 사용자 단위 동기화 주기 상태를 담는 행
+SCHEDULE_SOURCE = "schedule"
+
+_heap: list[tuple[datetime, int]] = []
+_due: dict[int, datetime] = {}
+_running: set[int] = set()
+_activity: dict[int, datetime] = {}
+
+
+def as_utc(value: datetime | None) -> datetime | None:
+    """SQLite returns naive datetimes; treat them as UTC."""
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=UTC)
+
+
+def schedule(user_id: int, due_at: datetime) -> None:
+    """Set (or move) a user's next-due time."""
+    _due[user_id] = due_at
+    heapq.heappush(_heap, (due_at, user_id))
+
+
+def is_scheduled(user_id: int) -> bool:
+    return user_id in _due or user_id in _running
+
+
+def pop_due(now: datetime) -> list[int]:
+    """Remove and return users whose due time has passed.
+
+    Popped users count as running until ``finish`` reschedules them.
+    """
+    user_ids: list[int] = []
+    while _heap and _heap[0][0] <= now:
+        due_at, user_id = heapq.heappop(_heap)
+        # 일정이 바뀐 항목은 무시 (lazy deletion)
+        if _due.get(user_id) != due_at:
+            continue
+        del _due[user_id]
+        _running.add(user_id)
+        user_ids.append(user_id)
+    return user_ids
+
+
+def finish(user_id: int, due_at: datetime | None) -> None:
+    """Mark a user's run as done and schedule the next one."""
+    _running.discard(user_id)
+    if due_at is not None:
+        schedule(user_id, due_at)
+
+
+def record_activity(user_id: int) -> None:
+    """Note an API request by the user; pull their next sync forward."""
+    now = datetime.now(tz=UTC)
+    _activity[user_id] = now
+    soon = now + timedelta(seconds=settings.sync_min_interval_seconds)
+    due_at = _due.get(user_id)
+    if due_at is not None and due_at > soon:
+        schedule(user_id, soon)
+
+
+def last_activity(user_id: int) -> datetime | None:
+    return _activity.get(user_id)
+
+
+def update_rate(
+    rate: float | None,
+    new_mails: int,
+    last_synced_at: datetime | None,
+    now: datetime,
+) -> float:
+    """EWMA of new mails per hour, updated after a sync."""
+    if last_synced_at is None:
+        elapsed = settings.sync_interval_minutes / 60
+    else:
+        elapsed = (now - last_synced_at).total_seconds() / 3600
+    # 너무 짧은 간격에서 비율이 튀지 않도록 최소 1분으로 계산
+    observed = new_mails / max(elapsed, 1 / 60)
+    if rate is None:
+        return observed
+    alpha = settings.sync_rate_alpha
+    return alpha * observed + (1 - alpha) * rate
+
+
+def next_sync_delay(
+    rate: float | None,
+    last_activity_at: datetime | None,
+    now: datetime,
+) -> timedelta:
+    """Delay until the next sync for a user."""
+    min_delay = timedelta(seconds=settings.sync_min_interval_seconds)
+    max_delay = timedelta(minutes=settings.sync_max_interval_minutes)
+
+    active_window = timedelta(minutes=settings.sync_active_window_minutes)
+    if last_activity_at is not None and now - last_activity_at <= active_window:
+        return min_delay
+    if rate is None:
+        return timedelta(minutes=settings.sync_interval_minutes)
+    if rate <= 0:
+        return max_delay
+    # 평균적으로 새 메일 1통이 도착하는 간격마다 동기화
+    return min(max(timedelta(hours=1 / rate), min_delay), max_delay)
+
+
+def reset() -> None:
+    """Forget all in-memory schedule state (tests, shutdown)."""
+    _heap.clear()
+    _due.clear()
+    _running.clear()
+    _activity.clear()
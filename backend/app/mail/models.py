@@ -14,6 +14,9 @@ from sqlalchemy import (
     Table,
     Text,
     UniqueConstraint,
+    false,
+    text,
+    true,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -67,7 +70,35 @@ class Mail(Base):
     __tablename__ = "mails"
     __table_args__ = (
         UniqueConstraint("user_id", "source", "external_id", name="uq_mail_source"),
-        Index("ix_mail_user_source", "user_id", "source"),
+        # 최신순 keyset 페이지네이션 (received_at DESC, id DESC)
+        Index(
+            "ix_mail_user_source_received",
+            "user_id",
+            "source",
+            text("received_at DESC"),
+            text("id DESC"),
+        ),
+        Index(
+            "ix_mail_user_received",
+            "user_id",
+            text("received_at DESC"),
+            text("id DESC"),
+        ),
+        # 카테고리/미분류 필터 (current_label_id IS NULL 포함)
+        Index(
+            "ix_mail_user_label_received",
+            "user_id",
+            "current_label_id",
+            text("received_at DESC"),
+            text("id DESC"),
+        ),
+        # 제출된 batch 작업에 묶인 메일만 (작업 종료 시 해제)
+        Index(
+            "ix_mail_batch_job",
+            "batch_job_id",
+            sqlite_where=text("batch_job_id IS NOT NULL"),
+            postgresql_where=text("batch_job_id IS NOT NULL"),
+        ),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -82,9 +113,28 @@ class Mail(Base):
     to_email: Mapped[str | None] = mapped_column(String, nullable=True)
     body_text: Mapped[str | None] = mapped_column(Text, nullable=True)
     body_html: Mapped[str | None] = mapped_column(Text, nullable=True)
+    snippet: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # False면 메타데이터만 저장된 상태 — 본문은 열람 시 또는 백그라운드에서 채움
+    body_loaded: Mapped[bool] = mapped_column(
+        Boolean, default=True, server_default=true()
+    )
+    # 헤더만 동기화한 IMAP 메일의 text/plain·text/html 파트 위치 (JSON)
+    body_parts: Mapped[str | None] = mapped_column(Text, nullable=True)
+    size_bytes: Mapped[int | None] = mapped_column(Integer, nullable=True)
     folder: Mapped[str | None] = mapped_column(String, nullable=True)
     received_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     is_read: Mapped[bool] = mapped_column(Boolean, default=False)
+    # List-Unsubscribe / Precedence: bulk 헤더 여부 (NULL: 헤더 미확인)
+    is_bulk: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+    # 최신 분류 (비정규화) — classification_state에서 분류 저장과 함께 갱신
+    current_label_id: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("labels.id"), nullable=True
+    )
+    current_classification_id: Mapped[int | None] = mapped_column(
+        Integer, nullable=True
+    )
+    # 분류 결과를 기다리는 Batch API 작업 (classification_batch_jobs.id)
+    batch_job_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=lambda: datetime.now(tz=UTC)
     )
@@ -134,6 +184,20 @@ class Label(Base):
 
 class Classification(Base):
     __tablename__ = "classifications"
+    __table_args__ = (
+        # 메일별 최신 분류 조회
+        Index("ix_classification_mail_created", "mail_id", "created_at"),
+        Index("ix_classification_label", "label_id"),
+        # 피드백 조회 (few-shot 예시, 발신자 규칙) — 피드백이 있는 행만
+        Index(
+            "ix_classification_feedback",
+            "mail_id",
+            "user_feedback",
+            "created_at",
+            sqlite_where=text("user_feedback IS NOT NULL"),
+            postgresql_where=text("user_feedback IS NOT NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     mail_id: Mapped[int] = mapped_column(
@@ -145,6 +209,10 @@ class Classification(Base):
     confidence: Mapped[float | None] = mapped_column(Float, nullable=True)
     user_feedback: Mapped[str | None] = mapped_column(String, nullable=True)
     original_category: Mapped[str | None] = mapped_column(String, nullable=True)
+    # 로컬 분류 단계(규칙/사용자 모델)의 결과 — 로컬 모델 학습에서 제외
+    is_local: Mapped[bool] = mapped_column(
+        Boolean, default=False, server_default=false()
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=lambda: datetime.now(tz=UTC)
     )
@@ -153,6 +221,67 @@ class Classification(Base):
     label: Mapped[Label] = relationship("Label")
 
 
+# (사용자, 소스, 현재 라벨)별 메일 수 — category-counts 조회용 카운터
+class CategoryCount(Base):
+    __tablename__ = "category_counts"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "source", "label_id", name="uq_category_count_label"
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id"), nullable=False
+    )
+    source: Mapped[str] = mapped_column(String, nullable=False)
+    label_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("labels.id"), nullable=False
+    )
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+# 분류 결과 캐시 — 키: 정규화한 메일 내용 + 프롬프트/피드백 버전의 해시
+class ClassificationCacheEntry(Base):
+    __tablename__ = "classification_cache"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    key: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    category: Mapped[str] = mapped_column(String, nullable=False)
+    confidence: Mapped[float | None] = mapped_column(Float, nullable=True)
+    reason: Mapped[str | None] = mapped_column(Text, nullable=True)
+    hit_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(tz=UTC)
+    )
+    # LRU 정리 기준
+    last_used_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(tz=UTC), index=True
+    )
+
+
+# OpenAI Batch API로 제출한 백그라운드 분류 작업
+# payload: {"chunks": {custom_id: [mail_id]}, "duplicates": {mail_id: [mail_id]},
+#           "cache_keys": {mail_id: key}}
+class ClassificationBatchJob(Base):
+    __tablename__ = "classification_batch_jobs"
+    __table_args__ = (Index("ix_batch_job_user_status", "user_id", "status"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id"), nullable=False
+    )
+    batch_id: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+    # pending → applied | failed
+    status: Mapped[str] = mapped_column(String, nullable=False, default="pending")
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    mail_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(tz=UTC)
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
 # ---------------------------------------------------------------------------
 # SyncState
 # ---------------------------------------------------------------------------
@@ -161,7 +290,7 @@ class Classification(Base):
 class SyncState(Base):
     __tablename__ = "sync_states"
     __table_args__ = (
-        UniqueConstraint("user_id", "source", name="uq_sync_state_source"),
+        UniqueConstraint("user_id", "source", "folder", name="uq_sync_state_folder"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -169,9 +298,19 @@ class SyncState(Base):
         Integer, ForeignKey("users.id"), nullable=False
     )
     source: Mapped[str] = mapped_column(String, nullable=False)
+    # IMAP 폴더별 커서 (Gmail은 "")
+    folder: Mapped[str] = mapped_column(String, nullable=False, server_default="")
     last_synced_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     last_uid: Mapped[str | None] = mapped_column(String, nullable=True)
+    uidvalidity: Mapped[str | None] = mapped_column(String, nullable=True)
     next_page_token: Mapped[str | None] = mapped_column(String, nullable=True)
+    history_id: Mapped[str | None] = mapped_column(String, nullable=True)
+    # source="schedule" 행: 사용자 단위 적응형 동기화 주기 상태
+    next_due_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    new_mail_rate: Mapped[float | None] = mapped_column(Float, nullable=True)
+    last_activity_at: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True
+    )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime,
         default=lambda: datetime.now(tz=UTC),
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import json
+import logging
 from collections.abc import AsyncIterator
 
 from fastapi import APIRouter, Depends, Query
@@ -10,7 +11,7 @@ from pydantic import BaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal, get_db
 from app.core.dependencies import get_current_user
 from app.core.exceptions import (
     ClassificationFailedException,
@@ -18,6 +19,11 @@ from app.core.exceptions import (
     NotAuthorizedException,
 )
 from app.mail.models import Classification, Label, Mail, User
+from app.mail.services.classification_cache import (
+    ClassificationCache,
+    get_classification_cache,
+)
+from app.mail.services.classification_state import apply_current_classifications
 from app.mail.services.classifier import (
     DEFAULT_CATEGORIES,
     classify_batch,
@@ -26,8 +32,23 @@ from app.mail.services.classifier import (
 from app.mail.services.feedback import (
     get_feedback_examples,
     get_feedback_stats,
-    get_sender_rules,
 )
+from app.mail.services.helpers import hydrate_bodies
+from app.mail.services.local_classifier import (
+    FEEDBACK_WEIGHT,
+    LocalModel,
+    classification_input,
+    get_local_model,
+    learn_from_results,
+    loaded_model,
+)
+from app.mail.services.sender_rules import (
+    SenderRuleMatcher,
+    get_sender_rule_matcher,
+    invalidate_sender_rules,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/classify", tags=["classify"])
 
@@ -46,15 +67,23 @@ class ClassifySingleResponse(BaseModel):
 
 
 @router.post("/single", response_model=ClassifySingleResponse)
-async def classify_single_mail(req: ClassifySingleRequest):
-    """Classify a single email (stateless, no DB save)."""
+async def classify_single_mail(
+    req: ClassifySingleRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """Classify a single email (no classification saved; results are cached)."""
     try:
+        cache = get_classification_cache(db)
         result = await classify_single(
             from_email=req.from_email,
             from_name=req.from_name,
             subject=req.subject,
             body=req.body,
+            cache=cache,
         )
+        if cache is not None:
+            await cache.flush()
+        await db.commit()
     except Exception as exc:
         raise ClassificationFailedException(detail=f"Classification failed: {exc}")
 
@@ -108,25 +137,26 @@ async def classify_user_mails(
             headers=_sse_headers(),
         )
 
+    # 본문 없이 동기화된 메일은 분류 전에 본문(텍스트 파트)만 받아옴
+    try:
+        if await hydrate_bodies(db, user, mails):
+            await db.commit()
+    except Exception as exc:
+        logger.warning(f"분류 전 본문 조회 실패 (user={user_id}): {exc}")
+
     # 피드백 데이터 조회
     feedback_examples = await get_feedback_examples(db, user_id, limit=20)
-    sender_rules = await get_sender_rules(db, user_id, min_count=2)
+    sender_rules = await get_sender_rule_matcher(db, user_id)
+
+    local_model = await get_local_model(db, user_id)
 
     # Prepare batch input
-    email_dicts = [
-        {
-            "from_email": m.from_email or "",
-            "from_name": m.from_name or "",
-            "subject": m.subject or "",
-            "body": m.body_text,
-        }
-        for m in mails
-    ]
+    email_dicts = [classification_input(m) for m in mails]
 
     return StreamingResponse(
         _classify_stream(
-            db, user_id, mails, email_dicts,
-            feedback_examples, sender_rules,
+            user_id, mails, email_dicts,
+            feedback_examples, sender_rules, local_model,
         ),
         media_type="text/event-stream",
         headers=_sse_headers(),
@@ -145,16 +175,26 @@ async def _empty_stream() -> AsyncIterator[str]:
     yield f"data: {json.dumps({'type': 'done', 'classified': 0, 'results': []})}\n\n"
 
 
+# 응답과 분리된 분류 태스크 (연결이 끊겨도 끝까지 저장, GC 방지용 참조)
+_classify_tasks: set[asyncio.Task] = set()
+
+
 async def _classify_stream(
-    db: AsyncSession,
     user_id: int,
     mails: list[Mail],
     email_dicts: list[dict],
     feedback_examples: list[dict],
-    sender_rules: dict[str, str],
+    sender_rules: SenderRuleMatcher,
+    local_model: LocalModel | None = None,
 ) -> AsyncIterator[str]:
-    """SSE 스트림으로 분류 진행률을 실시간 전송."""
+    """SSE 스트림으로 분류 진행률과 청크별 결과를 실시간 전송.
+
+    청크 결과는 API 응답 직후 짧은 트랜잭션으로 저장한 뒤 바로 전송한다.
+    분류는 요청 세션과 분리된 태스크·세션에서 돌기 때문에 연결이 끊겨도
+    이미 비용을 낸 결과는 모두 저장된다.
+    """
     queue: asyncio.Queue[dict | None] = asyncio.Queue()
+    mail_ids = [m.id for m in mails]
 
     def on_progress(processed: int, total_count: int) -> None:
         queue.put_nowait({
@@ -163,24 +203,43 @@ async def _classify_stream(
             "total": total_count,
         })
 
-    async def _run_classify() -> list[dict]:
+    async def _run_classify() -> dict:
+        summary: dict = {"results": [], "cache_hits": 0, "local_hits": 0}
         try:
-            result = await classify_batch(
-                email_dicts,
-                feedback_examples=feedback_examples,
-                sender_rules=sender_rules,
-                on_progress=on_progress,
-            )
-            return result
+            async with AsyncSessionLocal() as session:
+                cache = get_classification_cache(session)
+                writer = _ChunkWriter(session, user_id, mail_ids, cache)
+                await writer.prepare()
+
+                async def on_chunk(chunk: list[dict]) -> None:
+                    saved = await writer.save(chunk)
+                    learn_from_results(local_model, email_dicts, chunk)
+                    summary["results"].extend(saved)
+                    summary["cache_hits"] += sum(1 for c in chunk if c.get("cached"))
+                    summary["local_hits"] += sum(1 for c in chunk if c.get("local"))
+                    queue.put_nowait({"type": "chunk", "results": saved})
+
+                await classify_batch(
+                    email_dicts,
+                    feedback_examples=feedback_examples,
+                    sender_rules=sender_rules,
+                    on_progress=on_progress,
+                    cache=cache,
+                    local_model=local_model,
+                    on_chunk=on_chunk,
+                )
         except Exception as exc:
+            logger.error(f"분류 실패 (user={user_id}): {exc}")
             queue.put_nowait({"type": "error", "message": str(exc)})
-            return []
         finally:
             queue.put_nowait(None)  # sentinel
+        return summary
 
     task = asyncio.create_task(_run_classify())
+    _classify_tasks.add(task)
+    task.add_done_callback(_classify_tasks.discard)
 
-    # 실시간으로 진행률 이벤트를 yield
+    # 실시간으로 진행률·청크 결과 이벤트를 yield
     while True:
         evt = await queue.get()
         if evt is None:
@@ -189,60 +248,95 @@ async def _classify_stream(
         if evt.get("type") == "error":
             return
 
-    classifications = await task
-
-    # DB 저장
-    await _ensure_default_labels(db, user_id)
-    label_cache: dict[str, Label] = {}
-    all_labels_result = await db.execute(
-        select(Label).where(Label.user_id == user_id)
-    )
-    for lbl in all_labels_result.scalars().all():
-        label_cache[lbl.name] = lbl
-
-    results = []
-    for cls in classifications:
-        idx = cls.get("index", 0)
-        if idx >= len(mails):
-            continue
-
-        mail = mails[idx]
-        category = cls.get("category", "알림")
-        confidence = cls.get("confidence", 0.0)
-
-        label = label_cache.get(category)
-        if label is None:
-            label = Label(user_id=user_id, name=category, is_default=False)
-            db.add(label)
-            await db.flush()
-            label_cache[category] = label
-
-        classification = Classification(
-            mail_id=mail.id,
-            label_id=label.id,
-            confidence=confidence,
-        )
-        db.add(classification)
-
-        results.append({
-            "mail_id": mail.id,
-            "subject": mail.subject,
-            "category": category,
-            "confidence": confidence,
-            "reason": cls.get("reason", ""),
-        })
-
-    await db.commit()
+    summary = await task
 
     # 완료 이벤트
     done_event = {
         "type": "done",
-        "classified": len(results),
-        "results": results,
+        "classified": len(summary["results"]),
+        "cache_hits": summary["cache_hits"],
+        "local_hits": summary["local_hits"],
+        "results": summary["results"],
     }
     yield f"data: {json.dumps(done_event)}\n\n"
 
 
+class _ChunkWriter:
+    """Persists classification chunks, one commit per chunk."""
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        mail_ids: list[int],
+        cache: ClassificationCache | None = None,
+    ) -> None:
+        self.db = db
+        self.user_id = user_id
+        self.mail_ids = mail_ids
+        self.cache = cache
+        self.mails: dict[int, Mail] = {}
+        self.labels: dict[str, Label] = {}
+
+    async def prepare(self) -> None:
+        await _ensure_default_labels(self.db, self.user_id)
+        labels = await self.db.execute(
+            select(Label).where(Label.user_id == self.user_id)
+        )
+        self.labels = {label.name: label for label in labels.scalars().all()}
+        mails = await self.db.execute(select(Mail).where(Mail.id.in_(self.mail_ids)))
+        self.mails = {mail.id: mail for mail in mails.scalars().all()}
+        await self.db.commit()
+
+    async def save(self, chunk: list[dict]) -> list[dict]:
+        """Save one chunk (index → position in ``mail_ids``) and commit."""
+        results = []
+        applied: list[tuple[Mail, Classification]] = []
+        for cls in chunk:
+            idx = cls.get("index", 0)
+            mail = (
+                self.mails.get(self.mail_ids[idx])
+                if idx < len(self.mail_ids)
+                else None
+            )
+            if mail is None:
+                continue
+
+            category = cls.get("category", "알림")
+            confidence = cls.get("confidence", 0.0)
+
+            label = self.labels.get(category)
+            if label is None:
+                label = Label(user_id=self.user_id, name=category, is_default=False)
+                self.db.add(label)
+                await self.db.flush()
+                self.labels[category] = label
+
+            classification = Classification(
+                mail_id=mail.id,
+                label_id=label.id,
+                confidence=confidence,
+                is_local=bool(cls.get("local")),
+            )
+            self.db.add(classification)
+            applied.append((mail, classification))
+            results.append({
+                "mail_id": mail.id,
+                "subject": mail.subject,
+                "category": category,
+                "confidence": confidence,
+                "reason": cls.get("reason", ""),
+            })
+
+        await apply_current_classifications(self.db, applied)
+        if self.cache is not None:
+            await self.cache.flush()
+        await self.db.commit()
+        for result, (_, classification) in zip(results, applied, strict=True):
+            result["classification_id"] = classification.id
+        return results
+
+
 class UpdateClassificationRequest(BaseModel):
     classification_id: int
     new_category: str
@@ -273,7 +367,8 @@ async def update_classification(
             Mail.user_id == user_id,
         )
     )
-    if mail_result.scalar_one_or_none() is None:
+    mail = mail_result.scalar_one_or_none()
+    if mail is None:
         raise NotAuthorizedException()
 
     # Find or create the new label
@@ -303,8 +398,19 @@ async def update_classification(
 
     classification.label_id = label.id
     classification.user_feedback = req.new_category
+    # 최신 분류를 수정한 경우에만 메일의 현재 라벨·카운터 갱신
+    if mail.current_classification_id in (None, classification.id):
+        await apply_current_classifications(db, [(mail, classification)])
     await db.commit()
 
+    invalidate_sender_rules(user_id)
+    # 로컬 모델이 이미 로드돼 있으면 수정 내용을 바로 학습
+    local_model = loaded_model(user_id)
+    if local_model is not None:
+        local_model.learn(
+            classification_input(mail), req.new_category, FEEDBACK_WEIGHT
+        )
+
     return {
         "classification_id": classification.id,
         "new_category": req.new_category,
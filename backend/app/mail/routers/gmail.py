@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import logging
+
 from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -17,9 +19,12 @@ from app.mail.services.helpers import (
     format_mail_response,
     get_mail_classifications,
     get_user_mail,
+    hydrate_bodies,
     list_user_mails,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/gmail", tags=["gmail"])
 
 
@@ -40,16 +45,21 @@ async def list_messages(
     user: User = Depends(get_current_user),
     offset: int = Query(default=0, ge=0),
     limit: int = Query(default=20, le=100),
+    cursor: str | None = Query(default=None),
+    include_total: bool = Query(default=True),
     db: AsyncSession = Depends(get_db),
 ):
     """List synced Gmail messages from DB with classification."""
-    mails, total = await list_user_mails(db, user.id, "gmail", offset, limit)
+    mails, total, next_cursor = await list_user_mails(
+        db, user.id, "gmail", offset, limit, cursor, include_total
+    )
     classifications = await get_mail_classifications(db, [m.id for m in mails])
 
     return {
         "total": total,
         "offset": offset,
         "limit": limit,
+        "next_cursor": next_cursor,
         "messages": [
             {
                 "id": m.id,
@@ -76,8 +86,15 @@ async def get_message(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get a single synced message with body."""
+    """Get a single synced message with body (hydrated on first open)."""
     mail = await get_user_mail(db, user.id, mail_id, "gmail")
+    if not mail.body_loaded:
+        try:
+            await hydrate_bodies(db, user, [mail])
+            await db.commit()
+        except Exception as exc:
+            # 실패해도 메타데이터(스니펫)로 응답
+            logger.warning(f"Gmail 본문 조회 실패 (mail={mail.id}): {exc}")
     classifications = await get_mail_classifications(db, [mail.id])
     return format_mail_response(
         mail, classifications.get(mail.id), include_naver_fields=False
@@ -6,8 +6,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
-from app.mail.models import Classification, Label, Mail, User
-from app.mail.services.helpers import get_mail_classifications
+from app.mail.models import CategoryCount, Label, Mail, User
+from app.mail.services.helpers import fetch_mail_page, get_mail_classifications
+from app.mail.services.search import search_mails
 
 router = APIRouter(prefix="/api/inbox", tags=["inbox"])
 
@@ -18,95 +19,109 @@ async def list_all_messages(
     category: str | None = Query(default=None),
     offset: int = Query(default=0, ge=0),
     limit: int = Query(default=20, le=100),
+    cursor: str | None = Query(default=None),
+    include_total: bool = Query(default=True),
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """List synced messages from all sources (Gmail + Naver) with classification."""
     user_id = user.id
 
-    # Build query with optional filters
-    if category == "unclassified":
-        query = (
-            select(Mail)
-            .outerjoin(Classification, Mail.id == Classification.mail_id)
-            .where(Mail.user_id == user_id)
-            .where(Classification.id.is_(None))
-        )
-        count_query = (
-            select(func.count(Mail.id))
-            .outerjoin(Classification, Mail.id == Classification.mail_id)
-            .where(Mail.user_id == user_id)
-            .where(Classification.id.is_(None))
-        )
-
-        if source:
-            query = query.where(Mail.source == source)
-            count_query = count_query.where(Mail.source == source)
+    # Build query with optional filters (현재 분류는 Mail에 비정규화되어 있음)
+    where_clauses = [Mail.user_id == user_id]
+    if source:
+        where_clauses.append(Mail.source == source)
 
+    if category == "unclassified":
+        where_clauses.append(Mail.current_label_id.is_(None))
+        query = select(Mail).where(*where_clauses)
+        count_query = select(func.count(Mail.id)).where(*where_clauses)
     elif category:
         query = (
             select(Mail)
-            .join(Classification, Mail.id == Classification.mail_id)
-            .join(Label, Classification.label_id == Label.id)
-            .where(Mail.user_id == user_id)
+            .join(Label, Mail.current_label_id == Label.id)
+            .where(*where_clauses)
             .where(Label.name == category)
         )
         count_query = (
             select(func.count(Mail.id))
-            .join(Classification, Mail.id == Classification.mail_id)
-            .join(Label, Classification.label_id == Label.id)
-            .where(Mail.user_id == user_id)
+            .join(Label, Mail.current_label_id == Label.id)
+            .where(*where_clauses)
             .where(Label.name == category)
         )
-
-        if source:
-            query = query.where(Mail.source == source)
-            count_query = count_query.where(Mail.source == source)
-
     else:
-        where_clauses = [Mail.user_id == user_id]
-        if source:
-            where_clauses.append(Mail.source == source)
-
         query = select(Mail).where(*where_clauses)
         count_query = select(func.count(Mail.id)).where(*where_clauses)
 
-    # Apply ordering and pagination
-    query = query.order_by(Mail.received_at.desc()).offset(offset).limit(limit)
-
-    result = await db.execute(query)
-    mails = list(result.scalars().all())
+    # Apply ordering and keyset/offset pagination
+    mails, next_cursor = await fetch_mail_page(db, query, cursor, offset, limit)
 
-    count_result = await db.execute(count_query)
-    total = count_result.scalar()
+    total = None
+    if include_total:
+        count_result = await db.execute(count_query)
+        total = count_result.scalar()
 
     classifications = await get_mail_classifications(db, [m.id for m in mails])
 
+    return {
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "messages": [_message_summary(m, classifications) for m in mails],
+    }
+
+
+@router.get("/search")
+async def search_messages(
+    q: str = Query(min_length=1),
+    source: str | None = Query(default=None),
+    category: str | None = Query(default=None),
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=20, le=100),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Full-text search over synced messages, best matches first."""
+    hits, total = await search_mails(
+        db, user.id, q, source=source, category=category, offset=offset, limit=limit
+    )
+    classifications = await get_mail_classifications(
+        db, [hit["mail"].id for hit in hits]
+    )
+
     return {
         "total": total,
         "offset": offset,
         "limit": limit,
         "messages": [
             {
-                "id": m.id,
-                "source": m.source,
-                "external_id": m.external_id,
-                "from_email": m.from_email,
-                "from_name": m.from_name,
-                "subject": m.subject,
-                "to_email": m.to_email,
-                "folder": m.folder,
-                "received_at": (
-                    m.received_at.isoformat() if m.received_at else None
-                ),
-                "is_read": m.is_read,
-                "classification": classifications.get(m.id),
+                **_message_summary(hit["mail"], classifications),
+                "rank": hit["rank"],
+                "subject_highlight": hit["subject_highlight"],
+                "snippet": hit["snippet"],
             }
-            for m in mails
+            for hit in hits
         ],
     }
 
 
+def _message_summary(m: Mail, classifications: dict[int, dict]) -> dict:
+    return {
+        "id": m.id,
+        "source": m.source,
+        "external_id": m.external_id,
+        "from_email": m.from_email,
+        "from_name": m.from_name,
+        "subject": m.subject,
+        "to_email": m.to_email,
+        "folder": m.folder,
+        "received_at": m.received_at.isoformat() if m.received_at else None,
+        "is_read": m.is_read,
+        "classification": classifications.get(m.id),
+    }
+
+
 @router.get("/category-counts")
 async def get_category_counts(
     source: str | None = Query(default=None),
@@ -128,45 +143,24 @@ async def get_category_counts(
     total = total_result.scalar() or 0
 
     # Unclassified count
-    unclassified_query = (
+    unclassified_result = await db.execute(
         select(func.count(Mail.id))
-        .outerjoin(Classification, Mail.id == Classification.mail_id)
         .where(*where_clauses)
-        .where(Classification.id.is_(None))
+        .where(Mail.current_label_id.is_(None))
     )
-    unclassified_result = await db.execute(unclassified_query)
     unclassified = unclassified_result.scalar() or 0
 
-    # Category counts (latest classification per mail)
-    latest_classification_subquery = (
-        select(
-            Classification.mail_id,
-            func.max(Classification.created_at).label("max_created_at"),
-        )
-        .group_by(Classification.mail_id)
-        .subquery()
-    )
-
+    # Category counts (분류 저장 시 함께 갱신되는 카운터 테이블)
     category_query = (
-        select(Label.name, Label.color, func.count(Mail.id).label("count"))
-        .select_from(Mail)
-        .join(Classification, Mail.id == Classification.mail_id)
-        .join(
-            latest_classification_subquery,
-            (Classification.mail_id == latest_classification_subquery.c.mail_id)
-            & (
-                Classification.created_at
-                == latest_classification_subquery.c.max_created_at
-            ),
-        )
-        .join(Label, Classification.label_id == Label.id)
-        .where(Mail.user_id == user_id)
+        select(Label.name, Label.color, func.sum(CategoryCount.count))
+        .join(Label, CategoryCount.label_id == Label.id)
+        .where(CategoryCount.user_id == user_id)
     )
-
     if source:
-        category_query = category_query.where(Mail.source == source)
-
-    category_query = category_query.group_by(Label.name, Label.color)
+        category_query = category_query.where(CategoryCount.source == source)
+    category_query = category_query.group_by(Label.name, Label.color).having(
+        func.sum(CategoryCount.count) > 0
+    )
 
     category_result = await db.execute(category_query)
     category_rows = category_result.all()
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import imaplib
+import logging
 
 from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
@@ -17,14 +19,18 @@ from app.mail.services.helpers import (
     format_mail_response,
     get_mail_classifications,
     get_user_mail,
+    hydrate_bodies,
     list_user_mails,
 )
+from app.mail.services.imap_pool import imap_pool
 from app.mail.services.naver import (
     list_folders,
     sync_naver_messages,
     verify_credentials,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/naver", tags=["naver"])
 
 
@@ -70,6 +76,13 @@ async def disconnect_naver(
     db: AsyncSession = Depends(get_db),
 ):
     """Disconnect Naver account by clearing credentials."""
+    if user.naver_email:
+        await asyncio.to_thread(
+            imap_pool.discard,
+            settings.naver_imap_host,
+            settings.naver_imap_port,
+            user.naver_email,
+        )
     user.naver_email = None
     user.naver_app_password = None
     await db.commit()
@@ -114,16 +127,21 @@ async def list_messages(
     user: User = Depends(get_current_user),
     offset: int = Query(default=0, ge=0),
     limit: int = Query(default=20, le=100),
+    cursor: str | None = Query(default=None),
+    include_total: bool = Query(default=True),
     db: AsyncSession = Depends(get_db),
 ):
     """List synced Naver messages from DB with classification."""
-    mails, total = await list_user_mails(db, user.id, "naver", offset, limit)
+    mails, total, next_cursor = await list_user_mails(
+        db, user.id, "naver", offset, limit, cursor, include_total
+    )
     classifications = await get_mail_classifications(db, [m.id for m in mails])
 
     return {
         "total": total,
         "offset": offset,
         "limit": limit,
+        "next_cursor": next_cursor,
         "messages": [
             {
                 "id": m.id,
@@ -149,7 +167,14 @@ async def get_message(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get a single synced Naver message with body."""
+    """Get a single synced Naver message with body (downloaded on first open)."""
     mail = await get_user_mail(db, user.id, mail_id, "naver")
+    if not mail.body_loaded:
+        try:
+            await hydrate_bodies(db, user, [mail])
+            await db.commit()
+        except Exception as exc:
+            # 실패해도 헤더 정보로 응답
+            logger.warning(f"네이버 본문 조회 실패 (mail={mail.id}): {exc}")
     classifications = await get_mail_classifications(db, [mail.id])
     return format_mail_response(mail, classifications.get(mail.id))
@@ -0,0 +1,208 @@
+"""Persistent cache of LLM classification results.
+
+Entries are keyed by a hash of the normalized mail content (sender, subject
+template, truncated body) together with a fingerprint of the model and the
+full system prompt, which includes the user's feedback examples. A prompt
+or feedback change therefore misses naturally instead of serving results
+produced under different instructions.
+
+Entries expire after ``classify_cache_ttl_days``; past
+``classify_cache_max_entries`` the least recently used ones are evicted.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.mail.models import ClassificationCacheEntry
+
+_REPLY_PREFIX = re.compile(r"^((re|fw|fwd|답장|전달)\s*:\s*)+", re.IGNORECASE)
+_DIGITS = re.compile(r"\d+")
+_SPACES = re.compile(r"\s+")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "hit_rate": round(self.hit_rate, 4)}
+
+
+# 프로세스 시작 이후 누적 통계
+cache_stats = CacheStats()
+
+
+def _normalize(value: str | None) -> str:
+    # 숫자(날짜·주문번호·금액)만 다른 템플릿 메일은 같은 키가 되도록
+    value = _DIGITS.sub("0", (value or "").lower())
+    return _SPACES.sub(" ", value).strip()
+
+
+def prompt_fingerprint(model: str, system_prompt: str) -> str:
+    return hashlib.sha256(f"{model}\0{system_prompt}".encode()).hexdigest()
+
+
+def cache_key(fingerprint: str, from_email: str, subject: str, body: str) -> str:
+    """Key for one mail; ``body`` is the truncated text sent to the model."""
+    subject_template = _REPLY_PREFIX.sub("", _normalize(subject))
+    parts = [fingerprint, _normalize(from_email), subject_template, _normalize(body)]
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+class ClassificationCache:
+    """Cache view bound to a session.
+
+    Lookups only read. Hit bookkeeping and new results are buffered and
+    written by ``flush``, which callers run right before they commit, so
+    the SQLite writer is never held across an OpenAI call.
+    """
+
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+        self.hits = 0
+        self.misses = 0
+        self._touched: set[str] = set()
+        self._pending: dict[str, dict] = {}
+
+    async def get_many(self, keys: list[str]) -> dict[str, dict]:
+        """Return cached results ({key: {category, confidence, reason}})."""
+        if not keys:
+            return {}
+        found = {key: self._pending[key] for key in keys if key in self._pending}
+        lookup = set(keys) - set(found)
+        if lookup:
+            cutoff = datetime.now(tz=UTC) - timedelta(
+                days=settings.classify_cache_ttl_days
+            )
+            result = await self.db.execute(
+                select(ClassificationCacheEntry).where(
+                    ClassificationCacheEntry.key.in_(lookup),
+                    ClassificationCacheEntry.created_at >= cutoff,
+                )
+            )
+            for entry in result.scalars().all():
+                found[entry.key] = {
+                    "category": entry.category,
+                    "confidence": entry.confidence,
+                    "reason": entry.reason or "",
+                }
+                self._touched.add(entry.key)
+
+        hits = sum(1 for key in keys if key in found)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        cache_stats.hits += hits
+        cache_stats.misses += len(keys) - hits
+        return found
+
+    async def put_many(self, results: dict[str, dict]) -> None:
+        """Buffer fresh results ({key: classification}) until ``flush``."""
+        for key, result in results.items():
+            if result.get("category"):
+                self._pending[key] = {
+                    "category": result["category"],
+                    "confidence": result.get("confidence"),
+                    "reason": result.get("reason") or "",
+                }
+
+    async def flush(self) -> None:
+        """Write buffered hits and results and evict overflow. Caller commits."""
+        now = datetime.now(tz=UTC)
+        touched = self._touched - set(self._pending)
+        if touched:
+            await self.db.execute(
+                update(ClassificationCacheEntry)
+                .where(ClassificationCacheEntry.key.in_(touched))
+                .values(
+                    hit_count=ClassificationCacheEntry.hit_count + 1,
+                    last_used_at=now,
+                )
+            )
+        self._touched.clear()
+
+        rows = [
+            {
+                "key": key,
+                "category": result["category"],
+                "confidence": result.get("confidence"),
+                "reason": result.get("reason"),
+                "hit_count": 0,
+                "created_at": now,
+                "last_used_at": now,
+            }
+            for key, result in self._pending.items()
+        ]
+        self._pending.clear()
+        if not rows:
+            return
+
+        if self.db.get_bind().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(ClassificationCacheEntry).values(rows)
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["key"],
+                set_={
+                    "category": stmt.excluded.category,
+                    "confidence": stmt.excluded.confidence,
+                    "reason": stmt.excluded.reason,
+                    "created_at": stmt.excluded.created_at,
+                    "last_used_at": stmt.excluded.last_used_at,
+                },
+            )
+        )
+        cache_stats.stores += len(rows)
+        await self._evict(now)
+
+    async def _evict(self, now: datetime) -> None:
+        cutoff = now - timedelta(days=settings.classify_cache_ttl_days)
+        expired = await self.db.execute(
+            delete(ClassificationCacheEntry).where(
+                ClassificationCacheEntry.created_at < cutoff
+            )
+        )
+        evicted = expired.rowcount or 0
+
+        count = await self.db.scalar(
+            select(func.count()).select_from(ClassificationCacheEntry)
+        )
+        excess = (count or 0) - settings.classify_cache_max_entries
+        if excess > 0:
+            oldest = (
+                select(ClassificationCacheEntry.id)
+                .order_by(ClassificationCacheEntry.last_used_at)
+                .limit(excess)
+            )
+            result = await self.db.execute(
+                delete(ClassificationCacheEntry).where(
+                    ClassificationCacheEntry.id.in_(oldest)
+                )
+            )
+            evicted += result.rowcount or 0
+        cache_stats.evictions += evicted
+
+
+def get_classification_cache(db: AsyncSession) -> ClassificationCache | None:
+    """Cache for ``db``, or None when caching is disabled."""
+    if not settings.classify_cache_enabled:
+        return None
+    return ClassificationCache(db)
@@ -0,0 +1,131 @@
+"""Denormalized "current classification" state.
+
+``Mail.current_label_id`` / ``current_classification_id`` point at a mail's
+latest classification, and ``CategoryCount`` keeps per (user, source, label)
+totals. Both are maintained in the same transaction as the classification
+write, so inbox filters are plain indexed predicates and category counts
+are an O(labels) read.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+
+from sqlalchemy import Connection, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.mail.models import CategoryCount, Classification, Mail
+
+_CountKey = tuple[int, str, int]
+
+
+def _insert(db: AsyncSession):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(CategoryCount)
+
+
+async def adjust_category_counts(
+    db: AsyncSession,
+    deltas: dict[_CountKey, int],
+) -> None:
+    """Add ``deltas`` ({(user_id, source, label_id): n}) to the counters."""
+    for (user_id, source, label_id), delta in deltas.items():
+        if delta == 0:
+            continue
+        stmt = _insert(db).values(
+            user_id=user_id, source=source, label_id=label_id, count=delta
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["user_id", "source", "label_id"],
+                set_={"count": CategoryCount.count + delta},
+            )
+        )
+
+
+async def apply_current_classifications(
+    db: AsyncSession,
+    pairs: list[tuple[Mail, Classification]],
+) -> None:
+    """Make each classification its mail's current one and update counters.
+
+    Works for new classifications and for relabeled existing ones.
+    Caller commits.
+    """
+    if not pairs:
+        return
+    await db.flush()  # 새 Classification의 id 확보
+
+    deltas: dict[_CountKey, int] = defaultdict(int)
+    for mail, classification in pairs:
+        old_label_id = mail.current_label_id
+        new_label_id = classification.label_id
+        if old_label_id != new_label_id:
+            if old_label_id is not None:
+                deltas[(mail.user_id, mail.source, old_label_id)] -= 1
+            deltas[(mail.user_id, mail.source, new_label_id)] += 1
+        mail.current_label_id = new_label_id
+        mail.current_classification_id = classification.id
+    await adjust_category_counts(db, deltas)
+
+
+async def forget_mails(db: AsyncSession, mail_query) -> None:
+    """Decrement counters for mails about to be deleted.
+
+    ``mail_query`` is a SELECT of Mail.id for the rows being removed.
+    """
+    result = await db.execute(
+        select(Mail.user_id, Mail.source, Mail.current_label_id, func.count())
+        .where(Mail.id.in_(mail_query), Mail.current_label_id.isnot(None))
+        .group_by(Mail.user_id, Mail.source, Mail.current_label_id)
+    )
+    await adjust_category_counts(
+        db,
+        {
+            (user_id, source, label_id): -count
+            for user_id, source, label_id, count in result.all()
+        },
+    )
+
+
+def backfill_classification_state(conn: Connection) -> None:
+    """Fill current_* columns and rebuild counters on an existing database.
+
+    Only runs when some classified mail has no current_classification_id
+    (i.e. the columns were just added).
+    """
+    pending = conn.execute(
+        text(
+            "SELECT 1 FROM mails m WHERE m.current_classification_id IS NULL "
+            "AND EXISTS (SELECT 1 FROM classifications c WHERE c.mail_id = m.id) "
+            "LIMIT 1"
+        )
+    ).first()
+    if pending is None:
+        return
+
+    latest = (
+        "SELECT c.{col} FROM classifications c WHERE c.mail_id = mails.id "
+        "ORDER BY c.created_at DESC, c.id DESC LIMIT 1"
+    )
+    latest_id = latest.format(col="id")
+    latest_label_id = latest.format(col="label_id")
+    conn.execute(
+        text(
+            f"UPDATE mails SET current_classification_id = ({latest_id}), "
+            f"current_label_id = ({latest_label_id}) "
+            "WHERE current_classification_id IS NULL"
+        )
+    )
+    conn.execute(text("DELETE FROM category_counts"))
+    conn.execute(
+        text(
+            "INSERT INTO category_counts (user_id, source, label_id, count) "
+            "SELECT user_id, source, current_label_id, COUNT(*) FROM mails "
+            "WHERE current_label_id IS NOT NULL "
+            "GROUP BY user_id, source, current_label_id"
+        )
+    )
@@ -2,11 +2,26 @@ from __future__ import annotations
 
 import asyncio
 import json
-from typing import Callable
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass, field
+from typing import Any
 
 from openai import AsyncOpenAI
 
 from app.config import settings
+from app.core.llm_client import get_llm_client
+from app.mail.services.classification_cache import (
+    ClassificationCache,
+    cache_key,
+    prompt_fingerprint,
+)
+from app.mail.services.llm_limiter import INTERACTIVE, get_llm_limiter
+from app.mail.services.local_classifier import LocalModel, classify_locally
+from app.mail.services.sender_rules import SenderRuleMatcher
+from app.mail.services.tokens import MESSAGE_OVERHEAD, estimate_tokens
+
+logger = logging.getLogger(__name__)
 
 DEFAULT_CATEGORIES = [
     "업무",       # Work
@@ -97,9 +112,9 @@ BATCH_RESPONSE_FORMAT = {
     },
 }
 
-# 최대 동시 API 호출 수
-_MAX_CONCURRENT = 3
-_semaphore = asyncio.Semaphore(_MAX_CONCURRENT)
+# 결과 1건(JSON 객체)의 출력 토큰 추정치와 응답 전체의 여유분
+_OUTPUT_TOKENS_PER_MAIL = 100
+_OUTPUT_OVERHEAD = 32
 
 
 def _truncate_body(body: str | None, max_chars: int = 300) -> str:
@@ -108,32 +123,112 @@ def _truncate_body(body: str | None, max_chars: int = 300) -> str:
     return body[:max_chars] + ("..." if len(body) > max_chars else "")
 
 
+# 피드백 블록 형식 버전 — 형식을 바꾸면 올려서 캐시 키(프롬프트 지문)를 분리
+FEEDBACK_BLOCK_VERSION = 2
+_FEEDBACK_MAX_EXAMPLES = 10
+_FEEDBACK_SUBJECT_CHARS = 80
+
+
 def _build_feedback_section(examples: list[dict]) -> str:
-    """사용자 피드백 예시를 프롬프트에 추가할 섹션으로 변환."""
+    """사용자 피드백 예시를 프롬프트에 추가할 섹션으로 변환.
+
+    최근 예시를 고른 뒤 정규화·중복 제거하고 내용 기준으로 정렬한다.
+    같은 수정 기록이면 항상 같은 문자열이 되어, 새 수정이 생기기 전까지
+    요청 간 프롬프트 접두부(공급자 프롬프트 캐시, 분류 캐시 키)가 유지된다.
+    """
     if not examples:
         return ""
 
+    entries: set[tuple[str, str, str, str, str]] = set()
+    for ex in examples:
+        if len(entries) >= _FEEDBACK_MAX_EXAMPLES:
+            break
+        subject = " ".join((ex.get("subject") or "").split())
+        entries.add((
+            ex.get("corrected_category") or "",
+            (ex.get("from_email") or "").strip().lower(),
+            " ".join((ex.get("from_name") or "").split()),
+            subject[:_FEEDBACK_SUBJECT_CHARS],
+            ex.get("original_category") or "",
+        ))
+
     lines = [
-        "## 사용자의 이전 분류 수정 기록 (이 패턴을 참고하세요):",
+        f"## 사용자의 이전 분류 수정 기록 (v{FEEDBACK_BLOCK_VERSION}, "
+        "이 패턴을 참고하세요):",
         "",
     ]
-
-    for ex in examples[:10]:
-        from_info = f"{ex.get('from_email', '')} ({ex.get('from_name', '')})"
-        subject = ex.get("subject", "")
-        original = ex.get("original_category", "")
-        corrected = ex.get("corrected_category", "")
-
+    for corrected, from_email, from_name, subject, original in sorted(entries):
         lines.append(
-            f'- "발신자: {from_info}, 제목: {subject}" '
+            f'- "발신자: {from_email} ({from_name}), 제목: {subject}" '
             f'→ 원래 "{original}"로 분류했으나 사용자가 "{corrected}"로 수정'
         )
 
     return "\n".join(lines)
 
 
+def _build_system_prompt(feedback_examples: list[dict] | None) -> str:
+    """고정 지시문 → 사용자별 피드백 블록 순 (메일 내용은 user 메시지로)."""
+    if not feedback_examples:
+        return SYSTEM_PROMPT
+    return f"{SYSTEM_PROMPT}\n\n{_build_feedback_section(feedback_examples)}"
+
+
+@dataclass
+class UsageStats:
+    requests: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def cached_rate(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "cached_rate": round(self.cached_rate, 4)}
+
+
+# 프로세스 시작 이후 누적 토큰 사용량
+usage_stats = UsageStats()
+
+
+def _record_usage(response: Any) -> None:
+    """Add a chat completion's token usage (incl. cached prompt tokens)."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = (getattr(details, "cached_tokens", None) or 0) if details else 0
+    usage_stats.requests += 1
+    usage_stats.prompt_tokens += usage.prompt_tokens or 0
+    usage_stats.cached_tokens += cached
+    usage_stats.completion_tokens += usage.completion_tokens or 0
+    logger.debug(
+        f"분류 요청 토큰: 입력 {usage.prompt_tokens} (캐시 {cached}) / "
+        f"출력 {usage.completion_tokens}"
+    )
+
+
 def _get_client() -> AsyncOpenAI:
-    return AsyncOpenAI(api_key=settings.openai_api_key)
+    return get_llm_client()
+
+
+async def _complete(client: AsyncOpenAI, request: dict[str, Any], lane: str) -> Any:
+    """Send a chat completion through the shared rate limiter."""
+
+    async def send() -> tuple[Any, Any]:
+        raw = await client.chat.completions.with_raw_response.create(**request)
+        return raw.parse(), raw.headers
+
+    prompt_tokens = sum(
+        estimate_tokens(message["content"]) + MESSAGE_OVERHEAD
+        for message in request["messages"]
+    )
+    response = await get_llm_limiter().call(
+        send, lane=lane, tokens=prompt_tokens + request["max_tokens"]
+    )
+    _record_usage(response)
+    return response
 
 
 async def classify_single(
@@ -142,22 +237,36 @@ async def classify_single(
     subject: str,
     body: str | None,
     feedback_examples: list[dict] | None = None,
-    sender_rules: dict[str, str] | None = None,
+    sender_rules: SenderRuleMatcher | dict[str, str] | None = None,
+    cache: ClassificationCache | None = None,
 ) -> dict:
-    """Classify a single email using OpenAI API."""
-    if sender_rules and from_email and from_email in sender_rules:
+    """Classify a single email using OpenAI API.
+
+    With ``cache``, a cached result (marked ``"cached": True``) skips the API.
+    """
+    rule = sender_rules.get(from_email) if sender_rules and from_email else None
+    if rule is not None:
         return {
-            "category": sender_rules[from_email],
+            "category": rule,
             "confidence": 1.0,
             "reason": "발신자 규칙 적용 (사용자 피드백 기반)",
         }
 
-    client = _get_client()
+    system_prompt = _build_system_prompt(feedback_examples)
+
+    key = None
+    if cache is not None:
+        key = cache_key(
+            prompt_fingerprint(MODEL, system_prompt),
+            from_email,
+            subject,
+            _truncate_body(body),
+        )
+        cached = await cache.get_many([key])
+        if key in cached:
+            return {**cached[key], "cached": True}
 
-    system_prompt = SYSTEM_PROMPT
-    if feedback_examples:
-        feedback_section = _build_feedback_section(feedback_examples)
-        system_prompt = f"{SYSTEM_PROMPT}\n\n{feedback_section}"
+    client = _get_client()
 
     user_message = SINGLE_TEMPLATE.format(
         from_email=from_email or "",
@@ -166,17 +275,103 @@ async def classify_single(
         body=_truncate_body(body),
     )
 
-    response = await client.chat.completions.create(
-        model=MODEL,
-        max_tokens=256,
-        response_format=SINGLE_RESPONSE_FORMAT,
-        messages=[
+    request = {
+        "model": MODEL,
+        "max_tokens": 256,
+        "response_format": SINGLE_RESPONSE_FORMAT,
+        "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_message},
         ],
+    }
+    response = await _complete(client, request, INTERACTIVE)
+
+    result = json.loads(response.choices[0].message.content)
+    if cache is not None and key is not None:
+        await cache.put_many({key: result})
+    return result
+
+
+def _mail_block(position: int, mail: dict) -> str:
+    return (
+        f"[메일 {position}]\n"
+        f"- 발신자: {mail.get('from_email', '')} "
+        f"({mail.get('from_name', '')})\n"
+        f"- 제목: {mail.get('subject', '(제목 없음)')}\n"
+        f"- 본문: {_truncate_body(mail.get('body'))}"
+    )
+
+
+def _max_output_tokens(count: int) -> int:
+    """Completion budget for a chunk of ``count`` mails."""
+    return min(
+        settings.classify_chunk_output_tokens,
+        _OUTPUT_OVERHEAD + count * _OUTPUT_TOKENS_PER_MAIL,
+    )
+
+
+@dataclass
+class Chunk:
+    """Consecutive mails ``[start, start + size)`` sent in one request."""
+
+    start: int
+    size: int = 0
+    input_tokens: int = 0
+
+    @property
+    def max_tokens(self) -> int:
+        return _max_output_tokens(self.size)
+
+
+def plan_chunks(mails: list[dict], system_prompt: str) -> list[Chunk]:
+    """Pack consecutive mails into requests within the token budgets.
+
+    Each chunk stays under ``classify_chunk_input_tokens`` of estimated
+    prompt (system prompt included) and under the number of results that
+    fit in ``classify_chunk_output_tokens``. A single oversized mail still
+    gets a chunk of its own.
+    """
+    base = (
+        estimate_tokens(system_prompt)
+        + estimate_tokens(BATCH_TEMPLATE)
+        + 2 * MESSAGE_OVERHEAD
+    )
+    output_room = settings.classify_chunk_output_tokens - _OUTPUT_OVERHEAD
+    max_mails = max(
+        1,
+        min(settings.classify_chunk_max_mails, output_room // _OUTPUT_TOKENS_PER_MAIL),
     )
 
-    return json.loads(response.choices[0].message.content)
+    chunks: list[Chunk] = []
+    current: Chunk | None = None
+    for i, mail in enumerate(mails):
+        # 청크 내 번호는 두 자리 이하라 토큰 수 차이가 없음
+        tokens = estimate_tokens(_mail_block(0, mail)) + 1  # 메일 사이 빈 줄
+        if (
+            current is None
+            or current.size >= max_mails
+            or current.input_tokens + tokens > settings.classify_chunk_input_tokens
+        ):
+            current = Chunk(start=i, input_tokens=base)
+            chunks.append(current)
+        current.size += 1
+        current.input_tokens += tokens
+    return chunks
+
+
+def _chunk_request(chunk: list[dict], system_prompt: str) -> dict[str, Any]:
+    """Chat completion request body for one chunk of mails."""
+    parts = [_mail_block(i, mail) for i, mail in enumerate(chunk)]
+    user_message = BATCH_TEMPLATE.format(emails_text="\n\n".join(parts))
+    return {
+        "model": MODEL,
+        "max_tokens": _max_output_tokens(len(chunk)),
+        "response_format": BATCH_RESPONSE_FORMAT,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message},
+        ],
+    }
 
 
 async def _process_chunk(
@@ -185,30 +380,10 @@ async def _process_chunk(
     index_map: dict[int, int],
     client: AsyncOpenAI,
     system_prompt: str,
+    lane: str = INTERACTIVE,
 ) -> list[dict]:
     """단일 청크를 처리하고 원본 인덱스로 매핑."""
-    parts = []
-    for i, mail in enumerate(chunk):
-        parts.append(
-            f"[메일 {i}]\n"
-            f"- 발신자: {mail.get('from_email', '')} "
-            f"({mail.get('from_name', '')})\n"
-            f"- 제목: {mail.get('subject', '(제목 없음)')}\n"
-            f"- 본문: {_truncate_body(mail.get('body'))}"
-        )
-
-    user_message = BATCH_TEMPLATE.format(emails_text="\n\n".join(parts))
-
-    async with _semaphore:
-        response = await client.chat.completions.create(
-            model=MODEL,
-            max_tokens=4096,
-            response_format=BATCH_RESPONSE_FORMAT,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message},
-            ],
-        )
+    response = await _complete(client, _chunk_request(chunk, system_prompt), lane)
 
     parsed = json.loads(response.choices[0].message.content)
     chunk_results = parsed["results"]
@@ -222,65 +397,173 @@ async def _process_chunk(
     return chunk_results
 
 
-async def classify_batch(
+@dataclass
+class ClassificationPlan:
+    """Outcome of the free tiers for a batch of mails.
+
+    ``resolved`` holds results from sender rules, the cache and the local
+    tier; ``pending`` lists the indices that still need the LLM (one per
+    distinct mail, see ``duplicates``).
+    """
+
+    system_prompt: str
+    resolved: list[dict] = field(default_factory=list)
+    pending: list[int] = field(default_factory=list)
+    duplicates: dict[int, list[int]] = field(default_factory=dict)
+    cache_keys: dict[int, str] = field(default_factory=dict)
+
+    def fan_out(self, results: list[dict]) -> list[dict]:
+        """Copy each LLM result to the identical mails it stands for."""
+        expanded = list(results)
+        for result in results:
+            for dup in self.duplicates.get(result.get("index"), []):
+                expanded.append({**result, "index": dup})
+        return expanded
+
+    def cache_entries(self, results: list[dict]) -> dict[str, dict]:
+        return {
+            self.cache_keys[r["index"]]: r
+            for r in results
+            if r.get("index") in self.cache_keys
+        }
+
+
+async def plan_classification(
     emails: list[dict],
     feedback_examples: list[dict] | None = None,
-    sender_rules: dict[str, str] | None = None,
-    on_progress: Callable[[int, int], None] | None = None,
-) -> list[dict]:
-    """Classify multiple emails with parallel chunk processing."""
-    if not emails:
-        return []
-
-    auto_classified = []
-    needs_ai = []
-    index_map: dict[int, int] = {}
+    sender_rules: SenderRuleMatcher | dict[str, str] | None = None,
+    cache: ClassificationCache | None = None,
+    local_model: LocalModel | None = None,
+) -> ClassificationPlan:
+    """Run the free tiers over ``emails``: sender rules, cache, local model.
+
+    Cached results are marked ``"cached": True`` and local ones
+    ``"local": True``; identical remaining mails are grouped.
+    """
+    plan = ClassificationPlan(system_prompt=_build_system_prompt(feedback_examples))
+    remaining: list[int] = []
 
     for i, mail in enumerate(emails):
         from_email = mail.get("from_email", "")
-        if sender_rules and from_email and from_email in sender_rules:
-            auto_classified.append({
+        rule = sender_rules.get(from_email) if sender_rules and from_email else None
+        if rule is not None:
+            plan.resolved.append({
                 "index": i,
-                "category": sender_rules[from_email],
+                "category": rule,
                 "confidence": 1.0,
                 "reason": "발신자 규칙 적용 (사용자 피드백 기반)",
             })
         else:
-            index_map[len(needs_ai)] = i
-            needs_ai.append(mail)
+            remaining.append(i)
+
+    # 캐시 조회
+    cached: dict[str, dict] = {}
+    if cache is not None and remaining:
+        fingerprint = prompt_fingerprint(MODEL, plan.system_prompt)
+        for i in remaining:
+            mail = emails[i]
+            plan.cache_keys[i] = cache_key(
+                fingerprint,
+                mail.get("from_email", ""),
+                mail.get("subject", ""),
+                _truncate_body(mail.get("body")),
+            )
+        cached = await cache.get_many(list(plan.cache_keys.values()))
+
+    # 캐시 → 로컬 분류 → 배치 내 중복 메일 묶기 순으로 LLM 대상 축소
+    first_by_key: dict[str, int] = {}
+    for i in remaining:
+        key = plan.cache_keys.get(i)
+        if key in cached:
+            plan.resolved.append({**cached[key], "index": i, "cached": True})
+            continue
+        if local_model is not None:
+            local = classify_locally(emails[i], local_model)
+            if local is not None:
+                plan.resolved.append({**local, "index": i, "local": True})
+                continue
+        if key is not None:
+            if key in first_by_key:
+                plan.duplicates.setdefault(first_by_key[key], []).append(i)
+                continue
+            first_by_key[key] = i
+        plan.pending.append(i)
+    return plan
+
+
+async def classify_batch(
+    emails: list[dict],
+    feedback_examples: list[dict] | None = None,
+    sender_rules: SenderRuleMatcher | dict[str, str] | None = None,
+    on_progress: Callable[[int, int], None] | None = None,
+    cache: ClassificationCache | None = None,
+    local_model: LocalModel | None = None,
+    lane: str = INTERACTIVE,
+    on_chunk: Callable[[list[dict]], Awaitable[None]] | None = None,
+) -> list[dict]:
+    """Classify multiple emails with parallel chunk processing.
+
+    Mails the free tiers resolve (see ``plan_classification``) never reach
+    the API; fresh LLM results are stored in ``cache``. ``lane`` is the
+    rate-limiter priority (background callers pass ``BACKGROUND``).
+    ``on_chunk`` is awaited with each group of results as soon as it is
+    ready: the free-tier results first, then every API chunk.
+    """
+    if not emails:
+        return []
+
+    plan = await plan_classification(
+        emails, feedback_examples, sender_rules, cache, local_model
+    )
+    auto_classified = plan.resolved
+    needs_ai = [emails[i] for i in plan.pending]
+    index_map: dict[int, int] = dict(enumerate(plan.pending))
 
     total = len(emails)
 
     if auto_classified and on_progress:
         on_progress(len(auto_classified), total)
+    if auto_classified and on_chunk:
+        await on_chunk(auto_classified)
 
     if not needs_ai:
+        auto_classified.sort(key=lambda x: x.get("index", 0))
         return auto_classified
 
     client = _get_client()
 
-    system_prompt = SYSTEM_PROMPT
-    if feedback_examples:
-        feedback_section = _build_feedback_section(feedback_examples)
-        system_prompt = f"{SYSTEM_PROMPT}\n\n{feedback_section}"
-
-    chunk_size = 15
     ai_results: list[dict] = []
 
     # 청크별 코루틴 생성
     tasks = []
-    chunk_starts = []
-    for chunk_start in range(0, len(needs_ai), chunk_size):
-        chunk = needs_ai[chunk_start : chunk_start + chunk_size]
+    chunks = plan_chunks(needs_ai, plan.system_prompt)
+    for chunk in chunks:
         tasks.append(
-            _process_chunk(chunk, chunk_start, index_map, client, system_prompt)
+            _process_chunk(
+                needs_ai[chunk.start : chunk.start + chunk.size],
+                chunk.start,
+                index_map,
+                client,
+                plan.system_prompt,
+                lane=lane,
+            )
+        )
+    logger.debug(
+        f"분류 청크 {len(chunks)}개: "
+        + ", ".join(
+            f"{c.size}개(입력 {c.input_tokens}, 출력 ≤{c.max_tokens} 토큰)"
+            for c in chunks
         )
-        chunk_starts.append(chunk_start)
+    )
 
     # 병렬 처리 + 진행률 콜백
     processed = len(auto_classified)
     for coro in asyncio.as_completed(tasks):
-        chunk_results = await coro
+        chunk_results = plan.fan_out(await coro)
+        if cache is not None:
+            await cache.put_many(plan.cache_entries(chunk_results))
+        if on_chunk:
+            await on_chunk(chunk_results)
         ai_results.extend(chunk_results)
         processed += len(chunk_results)
         if on_progress:
@@ -290,3 +573,73 @@ async def classify_batch(
     all_results.sort(key=lambda x: x.get("index", 0))
 
     return all_results
+
+
+# ---------------------------------------------------------------------------
+# OpenAI Batch API (백그라운드 분류 — 결과는 이후 틱에서 반영)
+# ---------------------------------------------------------------------------
+
+# 아직 처리 중인 batch 상태
+BATCH_IN_PROGRESS = frozenset({"validating", "in_progress", "finalizing"})
+
+
+def build_batch_requests(
+    plan: ClassificationPlan,
+    emails: list[dict],
+) -> tuple[list[dict], dict[str, list[int]]]:
+    """JSONL request lines for ``plan.pending`` and {custom_id: email indices}."""
+    lines: list[dict] = []
+    chunks: dict[str, list[int]] = {}
+    pending = [emails[i] for i in plan.pending]
+    for chunk in plan_chunks(pending, plan.system_prompt):
+        indices = plan.pending[chunk.start : chunk.start + chunk.size]
+        custom_id = f"chunk-{chunk.start}"
+        chunks[custom_id] = indices
+        lines.append({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": _chunk_request([emails[i] for i in indices], plan.system_prompt),
+        })
+    return lines, chunks
+
+
+async def submit_batch(lines: list[dict]) -> str:
+    """Upload request lines and create a batch job. Returns the batch id."""
+    client = _get_client()
+    payload = "\n".join(json.dumps(line, ensure_ascii=False) for line in lines)
+    input_file = await client.files.create(
+        file=("classify.jsonl", payload.encode(), "application/jsonl"),
+        purpose="batch",
+    )
+    batch = await client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    return batch.id
+
+
+async def fetch_batch_results(batch_id: str) -> tuple[str, dict[str, list[dict]]]:
+    """Batch status and parsed results so far ({custom_id: chunk results}).
+
+    Result indices are positions within the chunk. Failed requests are
+    omitted; expired batches may still return the part that finished.
+    """
+    client = _get_client()
+    batch = await client.batches.retrieve(batch_id)
+    if batch.status in BATCH_IN_PROGRESS or not batch.output_file_id:
+        return batch.status, {}
+
+    content = await client.files.content(batch.output_file_id)
+    outputs: dict[str, list[dict]] = {}
+    for line in content.text.splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        response = item.get("response") or {}
+        if response.get("status_code") != 200:
+            continue
+        message = response["body"]["choices"][0]["message"]["content"]
+        outputs[item["custom_id"]] = json.loads(message)["results"]
+    return batch.status, outputs
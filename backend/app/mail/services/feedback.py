@@ -50,21 +50,6 @@ async def get_feedback_examples(
     return examples
 
 
-async def get_sender_rules(
-    db: AsyncSession,
-    user_id: int,
-    min_count: int = 2,
-) -> dict[str, str]:
-    """발신자별로 사용자가 일관되게 수정한 카테고리를 규칙으로 추출.
-
-    같은 발신자의 메일을 min_count번 이상 동일 카테고리로 수정한 경우만 규칙으로 간주.
-
-    Returns: dict[from_email, category]
-    """
-    rules = await _get_sender_rules_with_counts(db, user_id, min_count)
-    return {email: category for email, (category, _) in rules.items()}
-
-
 async def _get_sender_rules_with_counts(
     db: AsyncSession,
     user_id: int,
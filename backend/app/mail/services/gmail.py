@@ -1,22 +1,46 @@
 from __future__ import annotations
 
+import asyncio
 import base64
 import email.utils
+import html
+import logging
 from datetime import UTC, datetime
 from typing import TYPE_CHECKING, Any
 
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+
+from app.auth.service import build_credentials
+from app.config import settings
+from app.core.google_clients import get_google_service
+from app.core.security import decrypt_value, encrypt_value
+from app.mail.services.local_classifier import is_bulk_mail
 
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncSession
 
-    from app.mail.models import User
+    from app.mail.models import Mail, User
+
+logger = logging.getLogger(__name__)
+
+# Gmail batch endpoint은 요청당 최대 100개까지 허용하지만 50개 초과 시
+# rateLimitExceeded가 잦아지므로 설정값도 이 범위로 제한
+_GMAIL_BATCH_LIMIT = 100
+
+# 1단계(메타데이터) 동기화에서 받는 헤더
+_METADATA_HEADERS = [
+    "From",
+    "To",
+    "Subject",
+    "Date",
+    "List-Unsubscribe",
+    "Precedence",
+]
 
 
 def _build_gmail(credentials: Credentials):
-    """Build Gmail API service client."""
-    return build("gmail", "v1", credentials=credentials)
+    """Return the cached Gmail API service client."""
+    return get_google_service("gmail", "v1", credentials)
 
 
 async def list_message_ids(
@@ -53,6 +77,93 @@ async def list_message_ids(
     }
 
 
+class HistoryExpiredError(Exception):
+    """Raised when the stored Gmail historyId is too old to resume from."""
+
+
+async def get_history_id(credentials: Credentials) -> str:
+    """Return the mailbox's current historyId."""
+    import asyncio
+
+    service = _build_gmail(credentials)
+
+    def _fetch():
+        return service.users().getProfile(userId="me").execute()
+
+    profile = await asyncio.to_thread(_fetch)
+    return str(profile["historyId"])
+
+
+async def list_history(
+    credentials: Credentials,
+    start_history_id: str,
+) -> dict[str, Any]:
+    """List mailbox changes since ``start_history_id``.
+
+    Returns dict with 'added_ids' (list[str], new messages outside
+    spam/trash), 'read_changes' ({message_id: is_read}) derived from
+    UNREAD label changes, and 'history_id' (str) to resume from next time.
+
+    Raises HistoryExpiredError if Gmail no longer has the start point.
+    """
+    import asyncio
+
+    from googleapiclient.errors import HttpError
+
+    service = _build_gmail(credentials)
+
+    def _fetch(page_token: str | None):
+        kwargs: dict[str, Any] = {
+            "userId": "me",
+            "startHistoryId": start_history_id,
+            "historyTypes": ["messageAdded", "labelAdded", "labelRemoved"],
+        }
+        if page_token:
+            kwargs["pageToken"] = page_token
+        return service.users().history().list(**kwargs).execute()
+
+    added_ids: list[str] = []
+    seen: set[str] = set()  # 순서는 added_ids, 중복 확인은 set
+    read_changes: dict[str, bool] = {}
+    history_id = start_history_id
+    page_token = None
+
+    while True:
+        try:
+            result = await asyncio.to_thread(_fetch, page_token)
+        except HttpError as exc:
+            if exc.resp.status == 404:
+                raise HistoryExpiredError(start_history_id) from exc
+            raise
+
+        for record in result.get("history", []):
+            for added in record.get("messagesAdded", []):
+                msg = added["message"]
+                labels = msg.get("labelIds", [])
+                if "SPAM" in labels or "TRASH" in labels:
+                    continue
+                if msg["id"] not in seen:
+                    seen.add(msg["id"])
+                    added_ids.append(msg["id"])
+            for change in record.get("labelsAdded", []):
+                if "UNREAD" in change.get("labelIds", []):
+                    read_changes[change["message"]["id"]] = False
+            for change in record.get("labelsRemoved", []):
+                if "UNREAD" in change.get("labelIds", []):
+                    read_changes[change["message"]["id"]] = True
+
+        history_id = str(result.get("historyId", history_id))
+        page_token = result.get("nextPageToken")
+        if not page_token:
+            break
+
+    return {
+        "added_ids": added_ids,
+        "read_changes": read_changes,
+        "history_id": history_id,
+    }
+
+
 async def get_message_detail(
     credentials: Credentials,
     message_id: str,
@@ -77,12 +188,80 @@ async def get_message_detail(
 async def get_messages_batch(
     credentials: Credentials,
     message_ids: list[str],
+    batch_size: int | None = None,
+    metadata_only: bool = False,
+    missing: set[str] | None = None,
 ) -> list[dict[str, Any]]:
-    """Fetch multiple messages in sequence."""
-    results = []
-    for mid in message_ids:
-        detail = await get_message_detail(credentials, mid)
-        results.append(detail)
+    """Fetch multiple messages via the Gmail batch HTTP endpoint.
+
+    Packs up to ``batch_size`` messages.get calls into a single HTTP
+    round trip. A failed item is logged and skipped so one bad message
+    does not abort the whole page. Results keep the input order.
+
+    With ``metadata_only`` only the From/To/Subject/Date headers and the
+    snippet are fetched; bodies are hydrated later (body_loaded=False).
+
+    IDs that Gmail answers with 404 (deleted upstream) are added to
+    ``missing`` when given, so callers can tell them from transient errors.
+    """
+    from googleapiclient.errors import HttpError
+
+    if not message_ids:
+        return []
+
+    size = max(1, min(batch_size or settings.gmail_batch_size, _GMAIL_BATCH_LIMIT))
+    service = _build_gmail(credentials)
+
+    def _fetch_chunk(chunk: list[str]) -> dict[int, dict]:
+        raws: dict[int, dict] = {}
+
+        def _callback(request_id: str, response: dict, exception) -> None:
+            if exception is not None:
+                if (
+                    missing is not None
+                    and isinstance(exception, HttpError)
+                    and exception.resp.status == 404
+                ):
+                    missing.add(chunk[int(request_id)])
+                    return
+                logger.warning(
+                    f"Gmail 메시지 조회 실패 (id={chunk[int(request_id)]}): "
+                    f"{exception}"
+                )
+                return
+            raws[int(request_id)] = response
+
+        batch = service.new_batch_http_request(callback=_callback)
+        for i, mid in enumerate(chunk):
+            if metadata_only:
+                request = service.users().messages().get(
+                    userId="me",
+                    id=mid,
+                    format="metadata",
+                    metadataHeaders=_METADATA_HEADERS,
+                )
+            else:
+                request = service.users().messages().get(
+                    userId="me", id=mid, format="full"
+                )
+            batch.add(request, request_id=str(i))
+        batch.execute()
+        return raws
+
+    results: list[dict[str, Any]] = []
+    for start in range(0, len(message_ids), size):
+        chunk = message_ids[start : start + size]
+        raws = await asyncio.to_thread(_fetch_chunk, chunk)
+        for i in sorted(raws):
+            try:
+                results.append(
+                    _parse_message(raws[i], with_body=not metadata_only)
+                )
+            except Exception as exc:
+                logger.warning(
+                    f"Gmail 메시지 파싱 실패 (id={chunk[i]}): "
+                    f"{exc.__class__.__name__}: {exc}"
+                )
     return results
 
 
@@ -182,8 +361,12 @@ async def get_or_create_gmail_label(
     return new_label["id"]
 
 
-def _parse_message(raw: dict) -> dict[str, Any]:
-    """Parse Gmail API message response into a flat dict."""
+def _parse_message(raw: dict, with_body: bool = True) -> dict[str, Any]:
+    """Parse Gmail API message response into a flat dict.
+
+    Set with_body=False for format="metadata" responses; body fields are
+    left empty and body_loaded is False.
+    """
     headers = {
         h["name"].lower(): h["value"]
         for h in raw.get("payload", {}).get("headers", [])
@@ -191,10 +374,14 @@ def _parse_message(raw: dict) -> dict[str, Any]:
 
     from_header = headers.get("from", "")
     from_name, from_email = _parse_from(from_header)
+    _, to_email = _parse_from(headers.get("to", ""))
 
     subject = headers.get("subject", "")
 
-    body = _extract_body(raw.get("payload", {}))
+    if with_body:
+        body = _extract_body(raw.get("payload", {}))
+    else:
+        body = {"text": None, "html": None}
 
     internal_date_ms = int(raw.get("internalDate", "0"))
     received_at = datetime.fromtimestamp(
@@ -208,11 +395,18 @@ def _parse_message(raw: dict) -> dict[str, Any]:
         "external_id": raw["id"],
         "from_email": from_email,
         "from_name": from_name,
+        "to_email": to_email or None,
         "subject": subject,
+        "snippet": html.unescape(raw.get("snippet", "")),
         "body_text": body["text"],
         "body_html": body["html"],
+        "body_loaded": with_body,
+        "size_bytes": raw.get("sizeEstimate"),
         "received_at": received_at,
         "is_read": is_read,
+        "is_bulk": is_bulk_mail(
+            headers.get("list-unsubscribe"), headers.get("precedence")
+        ),
     }
 
 
@@ -297,8 +491,7 @@ async def sync_gmail_messages(
     query: str | None,
 ) -> dict[str, Any]:
     """Sync Gmail messages (single page) and save new ones to DB."""
-    from app.mail.models import Mail
-    from app.mail.services.helpers import filter_new_external_ids
+    from app.mail.services.helpers import filter_new_external_ids, ingest_mails
 
     # List message IDs from Gmail
     result = await list_message_ids(
@@ -315,7 +508,7 @@ async def sync_gmail_messages(
             "next_page_token": None,
         }
 
-    # Filter out already-synced messages
+    # Skip messages already stored — saves the metadata API calls
     new_ids = await filter_new_external_ids(db, user.id, "gmail", gmail_ids)
 
     if not new_ids:
@@ -325,29 +518,15 @@ async def sync_gmail_messages(
             "next_page_token": result["next_page_token"],
         }
 
-    # Fetch full details for new messages
-    details = await get_messages_batch(credentials, new_ids)
+    # Fetch metadata for new messages (bodies are hydrated lazily)
+    details = await get_messages_batch(credentials, new_ids, metadata_only=True)
 
     # Save to DB
-    for detail in details:
-        mail = Mail(
-            user_id=user.id,
-            source="gmail",
-            external_id=detail["external_id"],
-            from_email=detail["from_email"],
-            from_name=detail["from_name"],
-            subject=detail["subject"],
-            body_text=detail["body_text"],
-            body_html=detail["body_html"],
-            received_at=detail["received_at"],
-            is_read=detail["is_read"],
-        )
-        db.add(mail)
-
+    inserted = await ingest_mails(db, user.id, "gmail", details)
     await db.commit()
 
     return {
-        "synced": len(details),
+        "synced": len(inserted),
         "total_fetched": len(gmail_ids),
         "next_page_token": result["next_page_token"],
     }
@@ -362,8 +541,7 @@ async def sync_all_gmail_messages(
     query: str | None,
 ) -> dict[str, int]:
     """Sync multiple pages of Gmail messages."""
-    from app.mail.models import Mail
-    from app.mail.services.helpers import filter_new_external_ids
+    from app.mail.services.helpers import filter_new_external_ids, ingest_mails
 
     total_synced = 0
     page_token = None
@@ -384,23 +562,12 @@ async def sync_all_gmail_messages(
         new_ids = await filter_new_external_ids(db, user.id, "gmail", gmail_ids)
 
         if new_ids:
-            details = await get_messages_batch(credentials, new_ids)
-            for detail in details:
-                mail = Mail(
-                    user_id=user.id,
-                    source="gmail",
-                    external_id=detail["external_id"],
-                    from_email=detail["from_email"],
-                    from_name=detail["from_name"],
-                    subject=detail["subject"],
-                    body_text=detail["body_text"],
-                    body_html=detail["body_html"],
-                    received_at=detail["received_at"],
-                    is_read=detail["is_read"],
-                )
-                db.add(mail)
+            details = await get_messages_batch(
+                credentials, new_ids, metadata_only=True
+            )
+            inserted = await ingest_mails(db, user.id, "gmail", details)
             await db.commit()
-            total_synced += len(details)
+            total_synced += len(inserted)
 
         page_token = result["next_page_token"]
         if not page_token:
@@ -409,6 +576,57 @@ async def sync_all_gmail_messages(
     return {"total_synced": total_synced}
 
 
+def _user_credentials(user: User) -> Credentials:
+    """Build Credentials from the user's encrypted stored tokens."""
+    return build_credentials(
+        decrypt_value(user.google_oauth_token),
+        decrypt_value(user.google_refresh_token),
+    )
+
+
+async def hydrate_mail_bodies(
+    db: AsyncSession,
+    user: User,
+    mails: list[Mail],
+) -> int:
+    """Phase 2: fetch full bodies for metadata-only Gmail rows.
+
+    Returns the number of mails hydrated. Caller commits.
+    """
+    pending = [m for m in mails if m.source == "gmail" and not m.body_loaded]
+    if not pending:
+        return 0
+
+    credentials = _user_credentials(user)
+    token = credentials.token
+    missing: set[str] = set()
+    details = await get_messages_batch(
+        credentials, [m.external_id for m in pending], missing=missing
+    )
+
+    by_external_id = {d["external_id"]: d for d in details}
+    hydrated = 0
+    for mail in pending:
+        detail = by_external_id.get(mail.external_id)
+        if detail is not None:
+            mail.body_text = detail["body_text"]
+            mail.body_html = detail["body_html"]
+        elif mail.external_id in missing:
+            # Gmail에서 삭제된 메일 — 미리보기로 대신해 큐에서 제외
+            mail.body_text = mail.body_text or mail.snippet
+        else:
+            # 일시적 오류는 다음 틱에 재시도
+            continue
+        mail.body_loaded = True
+        hydrated += 1
+
+    # OAuth 토큰이 갱신되었으면 DB에 암호화하여 저장
+    if credentials.token != token:
+        user.google_oauth_token = encrypt_value(credentials.token)
+
+    return hydrated
+
+
 async def apply_classification_labels_to_gmail(
     db: AsyncSession,
     user: User,
@@ -2,39 +2,106 @@
 
 from __future__ import annotations
 
-from sqlalchemy import func, select
+import base64
+import json
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import Select, func, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.exceptions import MessageNotFoundException
-from app.mail.models import Classification, Label, Mail
+from app.core.exceptions import InvalidCursorException, MessageNotFoundException
+from app.mail.models import Classification, Label, Mail, User
 
 
 async def get_mail_classifications(
     db: AsyncSession,
     mail_ids: list[int],
 ) -> dict[int, dict]:
-    """Get latest classification for each mail. Returns {mail_id: {...}}."""
+    """Get the current classification of each mail. Returns {mail_id: {...}}."""
     if not mail_ids:
         return {}
 
     result = await db.execute(
         select(Classification, Label)
+        .join(Mail, Mail.current_classification_id == Classification.id)
         .join(Label, Classification.label_id == Label.id)
-        .where(Classification.mail_id.in_(mail_ids))
-        .order_by(Classification.created_at.desc())
+        .where(Mail.id.in_(mail_ids))
     )
-    rows = result.all()
+    return {
+        cls.mail_id: {
+            "classification_id": cls.id,
+            "category": label.name,
+            "confidence": cls.confidence,
+            "user_feedback": cls.user_feedback,
+        }
+        for cls, label in result.all()
+    }
+
+
+# 한 INSERT 문에 담을 행 수 (SQLite 바인드 변수 한도 고려)
+_INGEST_BATCH_SIZE = 500
+
+
+def _mail_row(user_id: int, source: str, msg: dict[str, Any]) -> dict[str, Any]:
+    now = datetime.now(tz=UTC)
+    return {
+        "user_id": user_id,
+        "source": source,
+        "external_id": msg["external_id"],
+        "from_email": msg.get("from_email"),
+        "from_name": msg.get("from_name"),
+        "to_email": msg.get("to_email"),
+        "subject": msg.get("subject"),
+        "snippet": msg.get("snippet"),
+        "body_text": msg.get("body_text"),
+        "body_html": msg.get("body_html"),
+        "body_loaded": msg.get("body_loaded", True),
+        "body_parts": msg.get("body_parts"),
+        "size_bytes": msg.get("size_bytes"),
+        "folder": msg.get("folder"),
+        "received_at": msg.get("received_at"),
+        "is_read": msg.get("is_read", False),
+        "is_bulk": msg.get("is_bulk"),
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def _insert_ignoring_duplicates(db: AsyncSession):
+    """Dialect-specific INSERT supporting ON CONFLICT DO NOTHING."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(Mail).on_conflict_do_nothing(
+        index_elements=["user_id", "source", "external_id"]
+    )
+
 
-    classifications: dict[int, dict] = {}
-    for cls, label in rows:
-        if cls.mail_id not in classifications:
-            classifications[cls.mail_id] = {
-                "classification_id": cls.id,
-                "category": label.name,
-                "confidence": cls.confidence,
-                "user_feedback": cls.user_feedback,
-            }
-    return classifications
+async def ingest_mails(
+    db: AsyncSession,
+    user_id: int,
+    source: str,
+    messages: list[dict[str, Any]],
+) -> list[int]:
+    """Bulk-insert synced messages, skipping ones already stored.
+
+    Uses INSERT ... ON CONFLICT DO NOTHING on uq_mail_source, so concurrent
+    syncs of the same user cannot insert duplicates. Returns the IDs of the
+    newly inserted rows. Caller commits.
+    """
+    inserted: list[int] = []
+    for start in range(0, len(messages), _INGEST_BATCH_SIZE):
+        rows = [
+            _mail_row(user_id, source, msg)
+            for msg in messages[start : start + _INGEST_BATCH_SIZE]
+        ]
+        result = await db.execute(
+            _insert_ignoring_duplicates(db).values(rows).returning(Mail.id)
+        )
+        inserted.extend(result.scalars().all())
+    return inserted
 
 
 async def filter_new_external_ids(
@@ -58,37 +125,105 @@ async def filter_new_external_ids(
     return [eid for eid in external_ids if eid not in existing_ids]
 
 
+def encode_cursor(mail: Mail) -> str:
+    """Opaque keyset cursor pointing just after ``mail``."""
+    received_at = mail.received_at.isoformat() if mail.received_at else None
+    raw = json.dumps([received_at, mail.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime | None, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        received_at, mail_id = json.loads(base64.urlsafe_b64decode(padded))
+        return (
+            datetime.fromisoformat(received_at) if received_at else None,
+            int(mail_id),
+        )
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursorException() from exc
+
+
+async def fetch_mail_page(
+    db: AsyncSession,
+    query: Select,
+    cursor: str | None,
+    offset: int,
+    limit: int,
+) -> tuple[list[Mail], str | None]:
+    """Run ``query`` newest-first, one page at a time. Returns (mails, next_cursor).
+
+    With ``cursor`` the page is read by keyset on (received_at, id), which
+    the ix_mail_user_*_received indexes serve as a range scan; otherwise
+    ``offset`` is used. One extra row is read to know whether a next page
+    exists.
+    """
+    newest_first = (Mail.received_at.desc(), Mail.id.desc())
+    if not cursor:
+        result = await db.execute(
+            query.order_by(*newest_first).offset(offset).limit(limit + 1)
+        )
+        return _split_page(list(result.scalars().all()), limit)
+
+    received_at, mail_id = _decode_cursor(cursor)
+    rows: list[Mail] = []
+    if received_at is not None:
+        result = await db.execute(
+            query.where(tuple_(Mail.received_at, Mail.id) < (received_at, mail_id))
+            .order_by(*newest_first)
+            .limit(limit + 1)
+        )
+        rows = list(result.scalars().all())
+        mail_id = None
+    if len(rows) <= limit:
+        # received_at이 NULL인 메일은 DESC 정렬에서 맨 뒤 — 이어서 읽음
+        null_query = query.where(Mail.received_at.is_(None))
+        if mail_id is not None:
+            null_query = null_query.where(Mail.id < mail_id)
+        result = await db.execute(
+            null_query.order_by(Mail.id.desc()).limit(limit + 1 - len(rows))
+        )
+        rows.extend(result.scalars().all())
+    return _split_page(rows, limit)
+
+
+def _split_page(rows: list[Mail], limit: int) -> tuple[list[Mail], str | None]:
+    if len(rows) <= limit:
+        return rows, None
+    mails = rows[:limit]
+    return mails, encode_cursor(mails[-1])
+
+
 async def list_user_mails(
     db: AsyncSession,
     user_id: int,
     source: str | None,
     offset: int,
     limit: int,
-) -> tuple[list[Mail], int]:
-    """List user mails with pagination. Returns (mails, total).
+    cursor: str | None = None,
+    include_total: bool = True,
+) -> tuple[list[Mail], int | None, str | None]:
+    """List user mails newest-first. Returns (mails, total, next_cursor).
 
     If source is None, returns all mails. Otherwise filters by source.
+    With ``cursor`` the page starts after the cursor (offset is ignored).
+    ``total`` is None unless ``include_total``.
     """
     query_base = select(Mail).where(Mail.user_id == user_id)
     if source:
         query_base = query_base.where(Mail.source == source)
 
-    query = (
-        query_base
-        .order_by(Mail.received_at.desc())
-        .offset(offset)
-        .limit(limit)
-    )
-    result = await db.execute(query)
-    mails = list(result.scalars().all())
+    mails, next_cursor = await fetch_mail_page(db, query_base, cursor, offset, limit)
 
-    count_query = select(func.count(Mail.id)).where(Mail.user_id == user_id)
-    if source:
-        count_query = count_query.where(Mail.source == source)
-    count_result = await db.execute(count_query)
-    total = count_result.scalar() or 0
+    total = None
+    if include_total:
+        count_query = select(func.count(Mail.id)).where(Mail.user_id == user_id)
+        if source:
+            count_query = count_query.where(Mail.source == source)
+        count_result = await db.execute(count_query)
+        total = count_result.scalar() or 0
 
-    return mails, total
+    return mails, total, next_cursor
 
 
 async def get_user_mail(
@@ -133,7 +268,8 @@ def format_mail_response(
         "from_email": mail.from_email,
         "from_name": mail.from_name,
         "subject": mail.subject,
-        "body_text": mail.body_text,
+        # 본문 하이드레이션 전이면 스니펫으로 대체
+        "body_text": mail.body_text if mail.body_loaded else mail.snippet,
         "body_html": mail.body_html,
         "received_at": (
             mail.received_at.isoformat() if mail.received_at else None
@@ -145,3 +281,22 @@ def format_mail_response(
         result["to_email"] = mail.to_email
         result["folder"] = mail.folder
     return result
+
+
+async def hydrate_bodies(
+    db: AsyncSession,
+    user: User,
+    mails: list[Mail],
+) -> int:
+    """Fetch bodies for metadata-only mails of any source. Caller commits.
+
+    Returns the number of mails hydrated.
+    """
+    from app.mail.services import gmail, naver
+
+    hydrated = 0
+    if any(m.source == "gmail" and not m.body_loaded for m in mails):
+        hydrated += await gmail.hydrate_mail_bodies(db, user, mails)
+    if any(m.source == "naver" and not m.body_loaded for m in mails):
+        hydrated += await naver.hydrate_mail_bodies(db, user, mails)
+    return hydrated
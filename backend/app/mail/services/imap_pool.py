@@ -0,0 +1,297 @@
+"""Persistent IMAP connection pool and IDLE watcher for Naver accounts.
+
+Opening an IMAP session costs a TLS handshake plus LOGIN. The pool keeps
+authenticated sessions per account, validates them with NOOP after they
+have been idle for a while and transparently reconnects broken ones.
+
+All pool methods are blocking and meant to run inside ``asyncio.to_thread``.
+"""
+
+from __future__ import annotations
+
+import imaplib
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_AccountKey = tuple[str, int, str]
+
+# 연결 자체가 끊겼음을 뜻하는 예외 — 이 경우 연결을 풀에 돌려놓지 않음
+_CONNECTION_ERRORS = (imaplib.IMAP4.abort, OSError)
+
+
+@dataclass
+class _PooledConnection:
+    conn: imaplib.IMAP4_SSL
+    last_used: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _Account:
+    password: str
+    idle: list[_PooledConnection] = field(default_factory=list)
+    in_use: int = 0
+
+
+def _close(conn: imaplib.IMAP4_SSL) -> None:
+    try:
+        conn.logout()
+    except Exception:
+        pass
+
+
+def _noop(conn: imaplib.IMAP4_SSL) -> bool:
+    try:
+        status, _ = conn.noop()
+    except _CONNECTION_ERRORS:
+        return False
+    return status == "OK"
+
+
+def _open(host: str, port: int, user: str, password: str) -> imaplib.IMAP4_SSL:
+    conn = imaplib.IMAP4_SSL(host, port, timeout=settings.naver_imap_timeout_seconds)
+    try:
+        conn.login(user, password)
+    except Exception:
+        _close(conn)
+        raise
+    return conn
+
+
+class IMAPConnectionPool:
+    """Per-account pool of authenticated IMAP sessions."""
+
+    def __init__(
+        self,
+        max_per_account: int,
+        keepalive_seconds: float,
+        max_idle_seconds: float,
+    ) -> None:
+        self.max_per_account = max_per_account
+        self.keepalive_seconds = keepalive_seconds
+        self.max_idle_seconds = max_idle_seconds
+        self._accounts: dict[_AccountKey, _Account] = {}
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def connection(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+    ) -> Iterator[imaplib.IMAP4_SSL]:
+        """Borrow an authenticated connection for the duration of the block."""
+        key = (host, port, user)
+        pooled = self._acquire(key, password)
+        broken = False
+        try:
+            if pooled is None:
+                pooled = _PooledConnection(_open(host, port, user, password))
+            yield pooled.conn
+        except _CONNECTION_ERRORS:
+            broken = True
+            raise
+        finally:
+            self._release(key, pooled, broken)
+
+    def _acquire(self, key: _AccountKey, password: str) -> _PooledConnection | None:
+        """Return a live idle connection, or None if the caller should open one."""
+        stale: list[_PooledConnection] = []
+        with self._cond:
+            account = self._accounts.get(key)
+            if account is not None and account.password != password:
+                # 비밀번호 변경 — 기존 세션 폐기
+                stale, account.idle = account.idle, []
+                account.password = password
+            if account is None:
+                account = _Account(password=password)
+                self._accounts[key] = account
+
+            while not account.idle and account.in_use >= self.max_per_account:
+                self._cond.wait()
+
+            account.in_use += 1
+            pooled = account.idle.pop() if account.idle else None
+
+        for old in stale:
+            _close(old.conn)
+        if pooled is not None and not self._is_alive(pooled):
+            _close(pooled.conn)
+            pooled = None
+        return pooled
+
+    def _release(
+        self,
+        key: _AccountKey,
+        pooled: _PooledConnection | None,
+        broken: bool,
+    ) -> None:
+        with self._cond:
+            account = self._accounts.get(key)
+            if account is not None:
+                account.in_use -= 1
+                if pooled is not None and not broken:
+                    pooled.last_used = time.monotonic()
+                    account.idle.append(pooled)
+                    pooled = None
+            self._cond.notify()
+        if pooled is not None:
+            _close(pooled.conn)
+
+    def _is_alive(self, pooled: _PooledConnection) -> bool:
+        """NOOP a connection that has been idle longer than the keepalive period."""
+        if time.monotonic() - pooled.last_used < self.keepalive_seconds:
+            return True
+        return _noop(pooled.conn)
+
+    def keepalive(self) -> None:
+        """NOOP idle connections and close those unused for too long."""
+        with self._cond:
+            checked_out: list[tuple[_AccountKey, _PooledConnection]] = []
+            for key, account in self._accounts.items():
+                checked_out.extend((key, pooled) for pooled in account.idle)
+                account.in_use += len(account.idle)
+                account.idle = []
+
+        now = time.monotonic()
+        alive = set()
+        for key, pooled in checked_out:
+            if now - pooled.last_used > self.max_idle_seconds or not _noop(pooled.conn):
+                _close(pooled.conn)
+            else:
+                alive.add(id(pooled))
+
+        with self._cond:
+            for key, pooled in checked_out:
+                account = self._accounts.get(key)
+                if account is None:
+                    if id(pooled) in alive:
+                        _close(pooled.conn)
+                    continue
+                account.in_use -= 1
+                if id(pooled) in alive:
+                    account.idle.append(pooled)
+            self._cond.notify_all()
+
+    def discard(self, host: str, port: int, user: str) -> None:
+        """Close every pooled session of an account (e.g. on disconnect)."""
+        with self._cond:
+            account = self._accounts.pop((host, port, user), None)
+        if account is not None:
+            for pooled in account.idle:
+                _close(pooled.conn)
+
+    def close_all(self) -> None:
+        """Close every pooled session (shutdown)."""
+        with self._cond:
+            accounts = list(self._accounts.values())
+            self._accounts.clear()
+        for account in accounts:
+            for pooled in account.idle:
+                _close(pooled.conn)
+
+
+class IMAPIdleWatcher:
+    """Background thread holding an IMAP IDLE session on a folder.
+
+    Calls ``on_new_mail`` whenever the server announces a new message
+    (untagged EXISTS). The session is re-established after
+    naver_idle_timeout_seconds without activity or on any error.
+    """
+
+    _TAG = b"GT1"
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        on_new_mail: Callable[[], None],
+        folder: str = "INBOX",
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.folder = folder
+        self._on_new_mail = on_new_mail
+        self._stop = threading.Event()
+        self._conn: imaplib.IMAP4_SSL | None = None
+        self._thread = threading.Thread(
+            target=self._run, name=f"imap-idle-{user}", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        conn = self._conn
+        if conn is not None:
+            # 블로킹 중인 readline을 깨움
+            try:
+                conn.shutdown()
+            except Exception:
+                pass
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._conn = _open(self.host, self.port, self.user, self.password)
+                self._conn.select(self.folder, readonly=True)
+                while not self._stop.is_set():
+                    if self._idle_once(self._conn):
+                        self._on_new_mail()
+            except TimeoutError:
+                # 변화 없이 IDLE 시간 초과 — 세션을 새로 열어 재시작
+                pass
+            except Exception as exc:
+                if not self._stop.is_set():
+                    logger.warning(
+                        f"IMAP IDLE 연결 실패 ({self.user}): "
+                        f"{exc.__class__.__name__}: {exc}"
+                    )
+                    self._stop.wait(settings.naver_idle_retry_seconds)
+            finally:
+                if self._conn is not None:
+                    _close(self._conn)
+                    self._conn = None
+
+    def _idle_once(self, conn: imaplib.IMAP4_SSL) -> bool:
+        """Run one IDLE cycle. Returns True if a new message arrived."""
+        conn.send(self._TAG + b" IDLE\r\n")
+        line = conn.readline()
+        if not line.startswith(b"+"):
+            raise imaplib.IMAP4.error(f"IDLE rejected: {line!r}")
+
+        conn.sock.settimeout(settings.naver_idle_timeout_seconds)
+        try:
+            while True:
+                line = conn.readline()
+                if not line:
+                    raise imaplib.IMAP4.abort("connection closed during IDLE")
+                if line.startswith(b"*") and line.rstrip().endswith(b"EXISTS"):
+                    break
+        finally:
+            conn.sock.settimeout(settings.naver_imap_timeout_seconds)
+
+        conn.send(b"DONE\r\n")
+        while not conn.readline().startswith(self._TAG):
+            pass
+        return True
+
+
+imap_pool = IMAPConnectionPool(
+    max_per_account=settings.naver_imap_pool_size,
+    keepalive_seconds=settings.naver_imap_keepalive_seconds,
+    max_idle_seconds=settings.naver_imap_pool_max_idle_seconds,
+)
@@ -0,0 +1,124 @@
+"""IMAP BODYSTRUCTURE parsing for header-only Naver sync.
+
+Header-only sync stores just the headers and the location of the
+text/plain and text/html parts. The body is downloaded later by section
+number, skipping attachments entirely.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import quopri
+import re
+from typing import Any
+
+_BODYSTRUCTURE_RE = re.compile(r"BODYSTRUCTURE \(")
+
+
+def _tokenize(text: str, pos: int) -> tuple[list[Any], int]:
+    """Parse one parenthesized list starting at ``text[pos] == '('``."""
+    assert text[pos] == "("
+    items: list[Any] = []
+    pos += 1
+    length = len(text)
+    while pos < length:
+        ch = text[pos]
+        if ch == ")":
+            return items, pos + 1
+        if ch == "(":
+            sub, pos = _tokenize(text, pos)
+            items.append(sub)
+        elif ch == '"':
+            pos += 1
+            buf = []
+            while pos < length and text[pos] != '"':
+                if text[pos] == "\\" and pos + 1 < length:
+                    pos += 1
+                buf.append(text[pos])
+                pos += 1
+            items.append("".join(buf))
+            pos += 1
+        elif ch.isspace():
+            pos += 1
+        else:
+            start = pos
+            while pos < length and text[pos] not in ' ()"':
+                pos += 1
+            atom = text[start:pos]
+            items.append(None if atom.upper() == "NIL" else atom)
+    return items, pos
+
+
+def parse_bodystructure(meta: str) -> list[Any] | None:
+    """Extract the BODYSTRUCTURE s-expression from a FETCH response line."""
+    match = _BODYSTRUCTURE_RE.search(meta)
+    if match is None:
+        return None
+    structure, _ = _tokenize(meta, match.end() - 1)
+    return structure
+
+
+def _walk(node: list[Any], prefix: str):
+    if node and isinstance(node[0], list):
+        index = 0
+        for child in node:
+            if not isinstance(child, list):
+                break
+            index += 1
+            yield from _walk(child, f"{prefix}.{index}" if prefix else str(index))
+    else:
+        yield prefix or "1", node
+
+
+def _params(value: Any) -> dict[str, str]:
+    if not isinstance(value, list):
+        return {}
+    return {
+        str(value[i]).lower(): str(value[i + 1])
+        for i in range(0, len(value) - 1, 2)
+    }
+
+
+def find_text_parts(structure: list[Any]) -> dict[str, dict[str, str]]:
+    """Locate the first inline text/plain and text/html parts.
+
+    Returns {"plain"|"html": {"section", "encoding", "charset"}}.
+    """
+    parts: dict[str, dict[str, str]] = {}
+    for section, node in _walk(structure, ""):
+        if len(node) < 6 or not isinstance(node[0], str):
+            continue
+        if node[0].lower() != "text":
+            continue
+        subtype = str(node[1]).lower()
+        if subtype not in ("plain", "html") or subtype in parts:
+            continue
+        # text 파트 확장 필드: md5(8), disposition(9)
+        disposition = node[9] if len(node) > 9 else None
+        if (
+            isinstance(disposition, list)
+            and str(disposition[0]).lower() == "attachment"
+        ):
+            continue
+        parts[subtype] = {
+            "section": section,
+            "encoding": str(node[5] or "7BIT").upper(),
+            "charset": _params(node[2]).get("charset", "utf-8"),
+        }
+    return parts
+
+
+def decode_part(data: bytes, encoding: str, charset: str) -> str:
+    """Decode a fetched body section using its transfer encoding and charset."""
+    try:
+        if encoding == "BASE64":
+            data = base64.b64decode(data)
+        elif encoding == "QUOTED-PRINTABLE":
+            data = quopri.decodestring(data)
+    except (binascii.Error, ValueError):
+        pass
+    try:
+        return data.decode(charset, errors="replace")
+    except LookupError:
+        return data.decode("utf-8", errors="replace")
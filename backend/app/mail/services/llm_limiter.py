@@ -0,0 +1,321 @@
+"""Process-wide rate limiting for OpenAI calls.
+
+Every chat completion goes through one ``LLMRateLimiter``:
+
+- token buckets for requests per minute and tokens per minute, resynced
+  from the ``x-ratelimit-*`` response headers;
+- an AIMD concurrency limit that grows by one slot per window of
+  successes and halves on every 429;
+- two priority lanes. Interactive callers (SSE, single classification)
+  are woken before background ones, and background traffic never takes
+  the last ``openai_interactive_reserved`` slots;
+- retries with full-jitter exponential backoff for 429s, timeouts,
+  connection errors and 5xx responses, honoring ``retry-after``.
+
+The limiter is created on first use, inside the running event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import re
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Mapping
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, TypeVar
+
+from openai import APIConnectionError, InternalServerError, RateLimitError
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+_LANES = (INTERACTIVE, BACKGROUND)
+
+_BACKOFF_BASE_SECONDS = 0.5
+_BACKOFF_MAX_SECONDS = 30.0
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+T = TypeVar("T")
+
+
+def parse_duration(value: str | None) -> float | None:
+    """Seconds in an OpenAI reset header ("1s", "6m0s", "20ms")."""
+    if not value:
+        return None
+    parts = _DURATION.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+
+
+def _header_int(headers: Mapping[str, str], name: str) -> int | None:
+    value = headers.get(name)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _retry_after(headers: Mapping[str, str]) -> float | None:
+    ms = headers.get("retry-after-ms")
+    if ms is not None:
+        try:
+            return float(ms) / 1000
+        except ValueError:
+            pass
+    seconds = headers.get("retry-after")
+    try:
+        return float(seconds) if seconds is not None else None
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """Per-minute budget refilled continuously."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self.level = min(self.capacity, self.level + elapsed * self.capacity / 60)
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` is available (0 if it is now)."""
+        self._refill(now)
+        # 한도보다 큰 요청은 가득 찰 때까지만 기다림
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing * 60 / self.capacity) if self.capacity else 0.0
+
+    def take(self, amount: float) -> None:
+        self.level -= amount
+
+    def sync(self, limit: int | None, remaining: int | None) -> None:
+        """Adopt the server's view of the limit and what is left."""
+        if limit:
+            self.capacity = float(limit)
+        if remaining is not None:
+            self.level = min(self.level, float(remaining))
+
+
+@dataclass
+class LimiterStats:
+    requests: int = 0
+    rate_limited: int = 0
+    retries: int = 0
+    failures: int = 0
+    waited_seconds: float = 0.0
+
+
+class LLMRateLimiter:
+    """Request/token budgets, adaptive concurrency and retries."""
+
+    def __init__(
+        self,
+        rpm: int,
+        tpm: int,
+        max_concurrency: int,
+        interactive_reserved: int = 1,
+    ) -> None:
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.concurrency = float(max_concurrency)  # AIMD로 조정되는 현재 한도
+        self.interactive_reserved = interactive_reserved
+        self.in_flight = 0
+        self.stats = LimiterStats()
+        self._blocked_until = 0.0
+        self._waiters: dict[str, deque[asyncio.Future]] = {
+            lane: deque() for lane in _LANES
+        }
+
+    # -- 동시 실행 슬롯 --------------------------------------------------
+
+    def _limit(self, lane: str) -> int:
+        limit = max(1, int(self.concurrency))
+        if lane == BACKGROUND:
+            limit = max(1, limit - self.interactive_reserved)
+        return limit
+
+    def _has_priority_waiters(self, lane: str) -> bool:
+        for other in _LANES:
+            if any(not f.done() for f in self._waiters[other]):
+                return True
+            if other == lane:
+                return False
+        return False
+
+    async def _acquire(self, lane: str) -> None:
+        if not self._has_priority_waiters(lane) and self.in_flight < self._limit(lane):
+            self.in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[lane].append(future)
+        try:
+            # 깨울 때 슬롯을 넘겨받음 (in_flight는 _wake에서 증가)
+            await future
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        for lane in _LANES:
+            queue = self._waiters[lane]
+            while queue and self.in_flight < self._limit(lane):
+                future = queue.popleft()
+                if future.done():
+                    continue
+                self.in_flight += 1
+                future.set_result(None)
+            if queue:
+                # 우선 레인이 막혀 있으면 다음 레인도 대기
+                return
+
+    # -- 요청/토큰 예산 --------------------------------------------------
+
+    async def _wait_for_budget(self, tokens: int) -> None:
+        while True:
+            now = time.monotonic()
+            delay = max(
+                self.requests.delay(1, now),
+                self.tokens.delay(tokens, now),
+                self._blocked_until - now,
+            )
+            if delay <= 0:
+                self.requests.take(1)
+                self.tokens.take(tokens)
+                return
+            self.stats.waited_seconds += delay
+            await asyncio.sleep(delay)
+
+    @asynccontextmanager
+    async def slot(self, lane: str, tokens: int) -> AsyncIterator[None]:
+        """Hold a concurrency slot with request and token budget reserved."""
+        await self._acquire(lane)
+        try:
+            await self._wait_for_budget(tokens)
+            yield
+        finally:
+            self._release()
+
+    # -- 응답 반영 -------------------------------------------------------
+
+    def _sync_headers(self, headers: Mapping[str, str]) -> None:
+        self.requests.sync(
+            _header_int(headers, "x-ratelimit-limit-requests"),
+            _header_int(headers, "x-ratelimit-remaining-requests"),
+        )
+        self.tokens.sync(
+            _header_int(headers, "x-ratelimit-limit-tokens"),
+            _header_int(headers, "x-ratelimit-remaining-tokens"),
+        )
+
+    def on_success(self, headers: Mapping[str, str]) -> None:
+        self._sync_headers(headers)
+        # additive increase: 현재 한도만큼 성공하면 슬롯 1개 증가
+        self.concurrency = min(
+            float(self.max_concurrency), self.concurrency + 1 / self.concurrency
+        )
+        self._wake()
+
+    def on_rate_limited(self, headers: Mapping[str, str]) -> float | None:
+        """Halve concurrency and pause everyone until the reset. Returns the pause."""
+        self.stats.rate_limited += 1
+        self._sync_headers(headers)
+        self.concurrency = max(1.0, self.concurrency / 2)
+        pause = _retry_after(headers)
+        if pause is None:
+            pause = parse_duration(headers.get("x-ratelimit-reset-requests"))
+        if pause:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+        logger.warning(
+            f"OpenAI 요청 한도 초과 — 동시 요청 {int(self.concurrency)}개로 축소"
+            + (f", {pause:.1f}초 대기" if pause else "")
+        )
+        return pause
+
+    # -- 호출 ------------------------------------------------------------
+
+    async def call(
+        self,
+        send: Callable[[], Awaitable[tuple[T, Mapping[str, str]]]],
+        *,
+        lane: str = INTERACTIVE,
+        tokens: int = 0,
+    ) -> T:
+        """Run ``send`` (returning result and response headers) with retries."""
+        attempt = 0
+        while True:
+            pause: float | None = None
+            async with self.slot(lane, tokens):
+                self.stats.requests += 1
+                try:
+                    result, headers = await send()
+                except RateLimitError as exc:
+                    # 크레딧 소진은 기다려도 해결되지 않음
+                    if getattr(exc, "code", None) == "insufficient_quota":
+                        self.stats.failures += 1
+                        raise
+                    error: Exception = exc
+                    pause = self.on_rate_limited(exc.response.headers)
+                except (APIConnectionError, InternalServerError) as exc:
+                    error = exc
+                else:
+                    self.on_success(headers)
+                    return result
+
+            if attempt >= settings.openai_max_retries:
+                self.stats.failures += 1
+                raise error
+            backoff = min(_BACKOFF_MAX_SECONDS, _BACKOFF_BASE_SECONDS * 2**attempt)
+            attempt += 1
+            self.stats.retries += 1
+            await asyncio.sleep(max(pause or 0.0, random.uniform(0, backoff)))
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            **asdict(self.stats),
+            "concurrency": round(self.concurrency, 2),
+            "in_flight": self.in_flight,
+            "waiting": {lane: len(q) for lane, q in self._waiters.items()},
+            "requests_level": round(self.requests.level, 1),
+            "tokens_level": round(self.tokens.level, 1),
+        }
+
+
+_limiter: LLMRateLimiter | None = None
+
+
+def get_llm_limiter() -> LLMRateLimiter:
+    """The shared limiter (created on first use)."""
+    global _limiter
+    if _limiter is None:
+        _limiter = LLMRateLimiter(
+            rpm=settings.openai_rpm,
+            tpm=settings.openai_tpm,
+            max_concurrency=settings.openai_max_concurrency,
+            interactive_reserved=settings.openai_interactive_reserved,
+        )
+    return _limiter
+
+
+def reset() -> None:
+    """Drop the shared limiter (tests)."""
+    global _limiter
+    _limiter = None
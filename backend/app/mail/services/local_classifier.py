@@ -0,0 +1,274 @@
+"""In-process classification tier that runs before the LLM.
+
+Two parts, both CPU-only:
+
+- Header/domain rules for unambiguous mail: "(광고)"-tagged subjects (the
+  Korean anti-spam law requires the tag on advertising mail), bulk mail
+  (List-Unsubscribe/Precedence), transactional mail from known finance and
+  shipping domains, and one-way no-reply senders.
+- A per-user multinomial logistic regression over hashed sender, subject
+  n-gram and body word features. It is bootstrapped from the user's current
+  classifications, then updated online from confident LLM results and
+  (more heavily) from user corrections.
+
+Only predictions at or above ``local_classify_threshold`` are used; the
+rest go to the LLM as before. Models live in process memory and are
+rebuilt from the database on first use after a restart.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import zlib
+from collections import OrderedDict
+from typing import Any
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.mail.models import Classification, Label, Mail
+
+_AD_SUBJECT = re.compile(r"^\s*[\(\[]\s*(광고|ad)\s*[\)\]]", re.IGNORECASE)
+_NO_REPLY = re.compile(r"^(no-?reply|do-?not-?reply|notice|noti|alert|mailer)")
+# 규칙용은 더 엄격하게 — 답장을 받지 않는 주소만
+_NO_REPLY_SENDER = re.compile(r"^(no-?reply|do-?not-?reply)\b")
+_PROMO_SUBJECT = re.compile(
+    r"할인|쿠폰|특가|세일|적립|이벤트|\bsale\b|% off", re.IGNORECASE
+)
+_WORD = re.compile(r"\w+")
+_DIGITS = re.compile(r"\d+")
+
+# 거래·결제 알림을 보내는 금융사 도메인
+FINANCE_DOMAINS = (
+    "kbstar.com", "kbcard.com", "shinhan.com", "shinhancard.com",
+    "wooribank.com", "wooricard.com", "hanabank.com", "hanacard.co.kr",
+    "ibk.co.kr", "nonghyup.com", "kakaobank.com", "toss.im",
+    "samsungcard.com", "hyundaicard.com", "lottecard.co.kr", "bccard.com",
+    "paypal.com",
+)
+# 배송 안내를 보내는 택배사 도메인
+SHIPPING_DOMAINS = (
+    "cjlogistics.com", "epost.go.kr", "hanjin.com", "lotteglogis.com",
+    "ilogen.com", "dhl.com", "fedex.com", "ups.com",
+)
+
+_N_FEATURES = 1 << 18
+_LEARNING_RATE = 0.5
+# 사용자 수정은 LLM 결과보다 강하게 반영
+FEEDBACK_WEIGHT = 3.0
+# 이 신뢰도 이상인 LLM 결과만 학습
+_MIN_TRAIN_CONFIDENCE = 0.8
+_MAX_MODELS = 256
+
+
+def is_bulk_mail(list_unsubscribe: str | None, precedence: str | None) -> bool:
+    """Bulk/list mail per List-Unsubscribe or Precedence headers."""
+    if list_unsubscribe:
+        return True
+    return (precedence or "").strip().lower() in ("bulk", "list", "junk")
+
+
+def classification_input(mail: Mail) -> dict[str, Any]:
+    """Classifier input dict for a stored mail."""
+    return {
+        "from_email": mail.from_email or "",
+        "from_name": mail.from_name or "",
+        "subject": mail.subject or "",
+        "body": mail.body_text or mail.snippet,
+        "is_bulk": mail.is_bulk,
+    }
+
+
+def _domain(from_email: str) -> str:
+    return from_email.rpartition("@")[2].lower()
+
+
+def _matches(domain: str, domains: tuple[str, ...]) -> bool:
+    return any(domain == d or domain.endswith(f".{d}") for d in domains)
+
+
+def match_rules(mail: dict) -> tuple[str, float, str] | None:
+    """(category, confidence, reason) for mail a rule recognizes, else None."""
+    subject = mail.get("subject") or ""
+    if _AD_SUBJECT.match(subject):
+        return "프로모션", 0.97, "로컬 규칙: 광고 표기 제목"
+    from_email = (mail.get("from_email") or "").lower()
+    domain = _domain(from_email)
+    known_sender = _matches(domain, FINANCE_DOMAINS + SHIPPING_DOMAINS)
+    if mail.get("is_bulk"):
+        # 금융사·택배사도 마케팅 메일은 대량 발송 — 이 경우는 모델/LLM에 맡김
+        if known_sender:
+            return None
+        if _PROMO_SUBJECT.search(subject):
+            return "프로모션", 0.92, "로컬 규칙: 대량 발송 + 판촉 제목"
+        # 구독 메일은 뉴스레터·프로모션이 섞여 기본 임계값 아래로 둠
+        return "뉴스레터", 0.85, "로컬 규칙: 대량 발송 (수신거부 헤더)"
+    if _matches(domain, FINANCE_DOMAINS):
+        return "금융", 0.93, "로컬 규칙: 금융사 발신"
+    if _matches(domain, SHIPPING_DOMAINS):
+        return "알림", 0.92, "로컬 규칙: 택배사 발신"
+    if _NO_REPLY_SENDER.match(from_email):
+        return "알림", 0.9, "로컬 규칙: 회신 불가 주소 발신"
+    return None
+
+
+def _features(mail: dict) -> list[int]:
+    from_email = (mail.get("from_email") or "").lower()
+    local_part, _, domain = from_email.rpartition("@")
+    subject = _DIGITS.sub("0", (mail.get("subject") or "").lower())
+    body = _DIGITS.sub("0", (mail.get("body") or "")[:300].lower())
+
+    tokens = [
+        f"from:{from_email}",
+        f"domain:{domain}",
+        f"bulk:{bool(mail.get('is_bulk'))}",
+        f"noreply:{bool(_NO_REPLY.match(local_part))}",
+    ]
+    # 한국어는 띄어쓰기가 불규칙해 글자 n-gram을 함께 사용
+    compact = "".join(subject.split())
+    tokens += [f"s2:{compact[i:i + 2]}" for i in range(len(compact) - 1)]
+    tokens += [f"s3:{compact[i:i + 3]}" for i in range(len(compact) - 2)]
+    tokens += [f"sw:{w}" for w in _WORD.findall(subject)]
+    tokens += [f"bw:{w}" for w in _WORD.findall(body)]
+    return sorted({zlib.crc32(t.encode()) % _N_FEATURES for t in tokens})
+
+
+class LocalModel:
+    """Sparse multinomial logistic regression trained by online SGD."""
+
+    def __init__(self) -> None:
+        self.weights: dict[str, dict[int, float]] = {}
+        self.bias: dict[str, float] = {}
+        self.examples = 0
+
+    def _probabilities(self, features: list[int]) -> dict[str, float]:
+        scale = 1 / math.sqrt(len(features)) if features else 0.0
+        scores = {
+            category: self.bias[category]
+            + scale * sum(weights.get(f, 0.0) for f in features)
+            for category, weights in self.weights.items()
+        }
+        top = max(scores.values())
+        exp = {c: math.exp(s - top) for c, s in scores.items()}
+        total = sum(exp.values())
+        return {c: v / total for c, v in exp.items()}
+
+    def learn(self, mail: dict, category: str, weight: float = 1.0) -> None:
+        if category not in self.weights:
+            self.weights[category] = {}
+            self.bias[category] = 0.0
+        features = _features(mail)
+        scale = 1 / math.sqrt(len(features)) if features else 0.0
+        probabilities = self._probabilities(features)
+        for c, p in probabilities.items():
+            gradient = _LEARNING_RATE * weight * (p - (1.0 if c == category else 0.0))
+            self.bias[c] -= gradient
+            weights = self.weights[c]
+            for f in features:
+                weights[f] = weights.get(f, 0.0) - gradient * scale
+        self.examples += 1
+
+    def predict(self, mail: dict) -> tuple[str, float] | None:
+        if len(self.weights) < 2 or self.examples < settings.local_model_min_examples:
+            return None
+        probabilities = self._probabilities(_features(mail))
+        category = max(probabilities, key=probabilities.__getitem__)
+        return category, probabilities[category]
+
+
+_models: OrderedDict[int, LocalModel] = OrderedDict()
+
+
+async def _bootstrap(db: AsyncSession, user_id: int) -> LocalModel:
+    result = await db.execute(
+        select(
+            Mail,
+            Label.name,
+            Classification.confidence,
+            Classification.user_feedback,
+        )
+        .join(Classification, Mail.current_classification_id == Classification.id)
+        .join(Label, Classification.label_id == Label.id)
+        .where(
+            Mail.user_id == user_id,
+            # 로컬 단계 자신의 결과로 학습하면 오분류가 굳어짐 (수정된 것은 사용)
+            or_(
+                Classification.is_local.is_(False),
+                Classification.user_feedback.is_not(None),
+            ),
+        )
+        .order_by(Classification.id.desc())
+        .limit(settings.local_model_bootstrap_limit)
+    )
+    model = LocalModel()
+    # 오래된 것부터 학습 (최근 결과가 마지막에 반영되도록)
+    for mail, category, confidence, feedback in reversed(result.all()):
+        if feedback:
+            model.learn(classification_input(mail), category, FEEDBACK_WEIGHT)
+        elif (confidence or 0.0) >= _MIN_TRAIN_CONFIDENCE:
+            model.learn(classification_input(mail), category)
+    return model
+
+
+async def get_local_model(db: AsyncSession, user_id: int) -> LocalModel | None:
+    """The user's model (built on first use), or None when the tier is off."""
+    if not settings.local_classify_enabled:
+        return None
+    model = _models.get(user_id)
+    if model is None:
+        model = await _bootstrap(db, user_id)
+        _models[user_id] = model
+        while len(_models) > _MAX_MODELS:
+            _models.popitem(last=False)
+    _models.move_to_end(user_id)
+    return model
+
+
+def loaded_model(user_id: int) -> LocalModel | None:
+    """The user's model if already in memory (no bootstrap)."""
+    return _models.get(user_id)
+
+
+def classify_locally(mail: dict, model: LocalModel | None) -> dict | None:
+    """Confident local result for one mail, or None to defer to the LLM."""
+    threshold = settings.local_classify_threshold
+    rule = match_rules(mail)
+    if rule is not None and rule[1] >= threshold:
+        category, confidence, reason = rule
+        return {"category": category, "confidence": confidence, "reason": reason}
+    if model is None:
+        return None
+    prediction = model.predict(mail)
+    if prediction is None or prediction[1] < threshold:
+        return None
+    category, confidence = prediction
+    return {
+        "category": category,
+        "confidence": round(confidence, 4),
+        "reason": "로컬 모델 (사용자 분류 이력 기반)",
+    }
+
+
+def learn_from_results(
+    model: LocalModel | None,
+    emails: list[dict],
+    results: list[dict],
+) -> None:
+    """Train on confident non-local results of a classify_batch call."""
+    if model is None:
+        return
+    for result in results:
+        if result.get("local") or not result.get("category"):
+            continue
+        if (result.get("confidence") or 0.0) < _MIN_TRAIN_CONFIDENCE:
+            continue
+        index = result.get("index", 0)
+        if index < len(emails):
+            model.learn(emails[index], result["category"])
+
+
+def reset() -> None:
+    """Drop all in-memory models (tests)."""
+    _models.clear()
@@ -5,20 +5,44 @@ import email
 import email.header
 import email.utils
 import imaplib
+import json
 import re
+from collections.abc import Iterator
 from contextlib import contextmanager
 from datetime import UTC, datetime
 from typing import TYPE_CHECKING, Any
 
+from app.config import settings
 from app.core.exceptions import ExternalServiceException, IMAPAuthenticationException
 from app.core.security import decrypt_value
 from app.mail.models import Mail, SyncState
+from app.mail.services.imap_pool import imap_pool
+from app.mail.services.imap_structure import (
+    decode_part,
+    find_text_parts,
+    parse_bodystructure,
+)
+from app.mail.services.local_classifier import is_bulk_mail
 
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncSession
 
     from app.mail.models import User
 
+_FULL_FETCH_ITEMS = "(UID FLAGS BODY.PEEK[])"
+_HEADER_FETCH_ITEMS = (
+    "(UID FLAGS RFC822.SIZE BODYSTRUCTURE "
+    "BODY.PEEK[HEADER.FIELDS "
+    "(FROM TO SUBJECT DATE LIST-UNSUBSCRIBE PRECEDENCE)])"
+)
+
+_FETCH_START_RE = re.compile(r"^\d+ \(")
+_FETCH_SECTION_RE = re.compile(r"(BODY\[[^\]]*\])(?:<\d+>)? \{\d+\}$")
+_FETCH_LITERAL_RE = re.compile(r"\{\d+\}$")
+_FETCH_UID_RE = re.compile(r"UID (\d+)")
+_FETCH_FLAGS_RE = re.compile(r"FLAGS \(([^)]*)\)")
+_FETCH_SIZE_RE = re.compile(r"RFC822\.SIZE (\d+)")
+
 
 @contextmanager
 def _imap_connection(
@@ -27,16 +51,9 @@ def _imap_connection(
     user: str,
     password: str,
 ):
-    """Context manager for IMAP connection with guaranteed cleanup."""
-    conn = imaplib.IMAP4_SSL(host, port)
-    try:
-        conn.login(user, password)
+    """Borrow an authenticated IMAP connection from the shared pool."""
+    with imap_pool.connection(host, port, user, password) as conn:
         yield conn
-    finally:
-        try:
-            conn.logout()
-        except Exception:
-            pass
 
 
 async def verify_credentials(
@@ -101,10 +118,24 @@ async def fetch_messages(
     folder: str = "INBOX",
     since_uid: str | None = None,
     max_results: int = 50,
+    headers_only: bool | None = None,
+    uidvalidity: str | None = None,
 ) -> dict[str, Any]:
-    """Fetch messages from a folder via IMAP."""
+    """Fetch messages from a folder via IMAP.
+
+    With ``headers_only`` (default: settings.naver_headers_only) only the
+    headers, BODYSTRUCTURE and size are downloaded; bodies are fetched
+    later by section number via fetch_bodies (body_loaded=False).
+
+    If the folder's UIDVALIDITY differs from ``uidvalidity`` the stored
+    UIDs are meaningless: ``since_uid`` is ignored and the result has
+    ``uidvalidity_changed=True``.
+    """
+    if headers_only is None:
+        headers_only = settings.naver_headers_only
 
     def _fetch():
+        nonlocal since_uid
         with _imap_connection(
             host, port, user, password
         ) as conn:
@@ -113,8 +144,24 @@ async def fetch_messages(
                 return {
                     "messages": [],
                     "last_uid": since_uid,
+                    "uidvalidity": uidvalidity,
+                    "uidvalidity_changed": False,
                 }
 
+            _, validity_data = conn.response("UIDVALIDITY")
+            current_validity = (
+                _uid_to_str(validity_data[0])
+                if validity_data and validity_data[0]
+                else uidvalidity
+            )
+            changed = bool(uidvalidity) and current_validity != uidvalidity
+            if changed:
+                since_uid = None
+            state = {
+                "uidvalidity": current_validity,
+                "uidvalidity_changed": changed,
+            }
+
             # Search for messages
             if since_uid:
                 try:
@@ -134,6 +181,7 @@ async def fetch_messages(
                 return {
                     "messages": [],
                     "last_uid": since_uid,
+                    **state,
                 }
 
             uids = data[0].split()
@@ -153,16 +201,15 @@ async def fetch_messages(
                 return {
                     "messages": [],
                     "last_uid": since_uid,
+                    **state,
                 }
 
             # Take most recent N messages
             uids = uids[-max_results:]
 
-            messages = []
-            for uid in uids:
-                msg = _fetch_single(conn, uid, folder)
-                if msg:
-                    messages.append(msg)
+            messages = list(
+                _iter_fetch_bulk(conn, uids, folder, headers_only=headers_only)
+            )
 
             if uids:
                 last = uids[-1]
@@ -173,44 +220,239 @@ async def fetch_messages(
             return {
                 "messages": messages,
                 "last_uid": last_uid,
+                **state,
             }
 
     return await asyncio.to_thread(_fetch)
 
 
-def _fetch_single(
+async def fetch_folders(
+    host: str,
+    port: int,
+    user: str,
+    password: str,
+    cursors: dict[str, tuple[str | None, str | None]],
+    max_results: int = 50,
+) -> dict[str, dict[str, Any] | BaseException]:
+    """Fetch several folders concurrently.
+
+    ``cursors`` maps folder -> (last_uid, uidvalidity). Each folder borrows
+    a pooled session, so at most naver_imap_pool_size folders of an account
+    are in flight. A failing folder is returned as its exception.
+    """
+    semaphore = asyncio.Semaphore(settings.naver_imap_pool_size)
+
+    async def _one(folder: str) -> dict[str, Any]:
+        last_uid, uidvalidity = cursors[folder]
+        async with semaphore:
+            return await fetch_messages(
+                host,
+                port,
+                user,
+                password,
+                folder=folder,
+                since_uid=last_uid,
+                max_results=max_results,
+                uidvalidity=uidvalidity,
+            )
+
+    folders = list(cursors)
+    results = await asyncio.gather(
+        *(_one(folder) for folder in folders), return_exceptions=True
+    )
+    return dict(zip(folders, results, strict=True))
+
+
+def naver_external_id(folder: str, uid: str) -> str:
+    """Mail.external_id for a message; UIDs are only unique per folder."""
+    # INBOX는 폴더 구분 이전에 저장된 행과 호환되도록 UID 그대로 사용
+    return uid if folder == "INBOX" else f"{folder}:{uid}"
+
+
+def _uid_of(external_id: str) -> str:
+    return external_id.rsplit(":", 1)[-1]
+
+
+def _compact_uid_set(uids: list[bytes | str]) -> str:
+    """Collapse UIDs into an IMAP sequence set, e.g. ``1:3,7,9:10``."""
+    numbers = sorted({int(_uid_to_str(u)) for u in uids})
+    ranges: list[str] = []
+    start = prev = numbers[0]
+    for n in numbers[1:]:
+        if n == prev + 1:
+            prev = n
+            continue
+        ranges.append(f"{start}:{prev}" if start != prev else str(start))
+        start = prev = n
+    ranges.append(f"{start}:{prev}" if start != prev else str(start))
+    return ",".join(ranges)
+
+
+def _iter_fetch_bulk(
     conn: imaplib.IMAP4_SSL,
-    uid: bytes | str,
+    uids: list[bytes | str],
     folder: str,
-) -> dict[str, Any] | None:
-    """Fetch and parse a single message by UID."""
-    status, msg_data = conn.uid(
-        "FETCH", uid, "(RFC822 FLAGS)"
-    )
-    if status != "OK" or not msg_data or not msg_data[0]:
-        return None
+    page_size: int | None = None,
+    headers_only: bool = False,
+) -> Iterator[dict[str, Any]]:
+    """Fetch and parse messages with one UID FETCH per page of UIDs.
+
+    Each page is requested over a compact UID set so N messages cost
+    ceil(N / page_size) round trips instead of N.
+    """
+    size = page_size or settings.naver_fetch_page_size
+    items = _HEADER_FETCH_ITEMS if headers_only else _FULL_FETCH_ITEMS
+    for start in range(0, len(uids), size):
+        page = uids[start : start + size]
+        status, data = conn.uid("FETCH", _compact_uid_set(page), items)
+        if status != "OK" or not data:
+            continue
+        for uid_str, meta, sections in _split_fetch_response(data):
+            if headers_only:
+                header = next(
+                    (v for k, v in sections.items() if k.startswith("BODY[HEADER")),
+                    b"",
+                )
+                parsed = _parse_email(header, uid_str, with_body=False)
+                size_match = _FETCH_SIZE_RE.search(meta)
+                parsed["size_bytes"] = int(size_match.group(1)) if size_match else None
+                structure = parse_bodystructure(meta)
+                parts = find_text_parts(structure) if structure else {}
+                parsed["body_parts"] = json.dumps(parts)
+            else:
+                parsed = _parse_email(sections.get("BODY[]", b""), uid_str)
+            flags_match = _FETCH_FLAGS_RE.search(meta)
+            parsed["is_read"] = flags_match is not None and (
+                "\\Seen" in flags_match.group(1)
+            )
+            parsed["external_id"] = naver_external_id(folder, uid_str)
+            parsed["folder"] = folder
+            yield parsed
+
+
+def _split_fetch_response(
+    data: list,
+) -> Iterator[tuple[str, str, dict[str, bytes]]]:
+    """Split a multi-message FETCH response into (uid, meta, sections).
+
+    imaplib returns one (prefix, literal) tuple per literal and a bytes
+    item for whatever follows the last literal of a message. A new message
+    starts with "<seq> (". ``sections`` maps e.g. "BODY[]" or "BODY[1.2]"
+    to its literal; any other literal (e.g. inside BODYSTRUCTURE) is
+    inlined into ``meta`` as a quoted string.
+    """
+    messages: list[tuple[list[str], dict[str, bytes]]] = []
+    for item in data:
+        if isinstance(item, tuple):
+            prefix = item[0].decode("utf-8", errors="replace")
+            literal = item[1]
+            if _FETCH_START_RE.match(prefix) or not messages:
+                messages.append(([], {}))
+            meta, sections = messages[-1]
+            section = _FETCH_SECTION_RE.search(prefix)
+            if section:
+                meta.append(prefix[: section.start()])
+                sections[section.group(1)] = literal
+            else:
+                text = literal.decode("utf-8", errors="replace")
+                escaped = text.replace("\\", "\\\\").replace('"', '\\"')
+                meta.append(_FETCH_LITERAL_RE.sub("", prefix) + f'"{escaped}"')
+        elif isinstance(item, bytes) and messages:
+            messages[-1][0].append(item.decode("utf-8", errors="replace"))
 
-    raw_email = msg_data[0]
-    if not isinstance(raw_email, tuple):
-        return None
+    for meta_parts, sections in messages:
+        meta = " ".join(meta_parts)
+        uid_match = _FETCH_UID_RE.search(meta)
+        if uid_match is None:
+            continue
+        yield uid_match.group(1), meta, sections
 
-    flags_part = raw_email[0]
-    body = raw_email[1]
 
-    uid_str = _uid_to_str(uid)
-    parsed = _parse_email(body, uid_str)
+def _fetch_bodies_sync(
+    conn: imaplib.IMAP4_SSL,
+    mails: list[tuple[str, str | None]],
+    missing: set[str] | None = None,
+) -> dict[str, dict[str, str | None]]:
+    """Download text parts by section for (uid, body_parts_json) pairs.
+
+    UIDs without stored part info get one BODYSTRUCTURE round trip first.
+    UIDs sharing the same section layout are fetched in one UID FETCH.
+    UIDs absent from a successful FETCH (expunged) are added to ``missing``.
+    """
+    parts_by_uid: dict[str, dict[str, dict[str, str]]] = {}
+    unknown: list[str] = []
+    for uid, body_parts in mails:
+        if body_parts:
+            parts_by_uid[uid] = json.loads(body_parts)
+        else:
+            unknown.append(uid)
 
-    # Check flags for read status
-    if isinstance(flags_part, bytes):
-        flags_str = flags_part.decode(
-            "utf-8", errors="replace"
+    if unknown:
+        status, data = conn.uid(
+            "FETCH", _compact_uid_set(unknown), "(UID BODYSTRUCTURE)"
         )
-    else:
-        flags_str = str(flags_part)
-    parsed["is_read"] = "\\Seen" in flags_str
-    parsed["folder"] = folder
+        if status == "OK":
+            for uid, meta, _ in _split_fetch_response(data or []):
+                structure = parse_bodystructure(meta)
+                parts_by_uid[uid] = find_text_parts(structure) if structure else {}
+            if missing is not None:
+                missing.update(uid for uid in unknown if uid not in parts_by_uid)
+
+    groups: dict[tuple[str, ...], list[str]] = {}
+    bodies: dict[str, dict[str, str | None]] = {}
+    for uid, parts in parts_by_uid.items():
+        sections = tuple(sorted(p["section"] for p in parts.values()))
+        if not sections:
+            bodies[uid] = {"text": "", "html": None}
+            continue
+        groups.setdefault(sections, []).append(uid)
+
+    for sections, uids in groups.items():
+        items = " ".join(f"BODY.PEEK[{sec}]" for sec in sections)
+        status, data = conn.uid("FETCH", _compact_uid_set(uids), f"(UID {items})")
+        if status != "OK":
+            continue
+        for uid, _, fetched in _split_fetch_response(data or []):
+            parts = parts_by_uid.get(uid, {})
+            decoded: dict[str, str | None] = {"plain": None, "html": None}
+            for kind, part in parts.items():
+                raw = fetched.get(f"BODY[{part['section']}]")
+                if raw is not None:
+                    decoded[kind] = decode_part(
+                        raw, part["encoding"], part["charset"]
+                    )
+            html_body = decoded["html"]
+            text = decoded["plain"] or (_strip_html(html_body) if html_body else "")
+            bodies[uid] = {"text": text, "html": html_body}
+        if missing is not None:
+            missing.update(uid for uid in uids if uid not in bodies)
 
-    return parsed
+    return bodies
+
+
+async def fetch_bodies(
+    host: str,
+    port: int,
+    user: str,
+    password: str,
+    folder: str,
+    mails: list[tuple[str, str | None]],
+    missing: set[str] | None = None,
+) -> dict[str, dict[str, str | None]]:
+    """Download only the text/plain and text/html parts of header-only mails.
+
+    ``mails`` is a list of (uid, body_parts_json). Returns
+    {uid: {"text", "html"}}; expunged UIDs are added to ``missing``.
+    """
+
+    def _fetch():
+        with _imap_connection(host, port, user, password) as conn:
+            status, _ = conn.select(folder, readonly=True)
+            if status != "OK":
+                return {}
+            return _fetch_bodies_sync(conn, mails, missing)
+
+    return await asyncio.to_thread(_fetch)
 
 
 def _uid_to_str(uid: bytes | str) -> str:
@@ -221,9 +463,13 @@ def _uid_to_str(uid: bytes | str) -> str:
 
 
 def _parse_email(
-    raw_bytes: bytes, uid: str
+    raw_bytes: bytes, uid: str, with_body: bool = True
 ) -> dict[str, Any]:
-    """Parse raw email bytes into a flat dict."""
+    """Parse raw email bytes into a flat dict.
+
+    Set with_body=False when ``raw_bytes`` holds headers only; body fields
+    are left empty and body_loaded is False.
+    """
     msg = email.message_from_bytes(raw_bytes)
 
     from_header = msg.get("From", "")
@@ -236,7 +482,10 @@ def _parse_email(
 
     subject = _decode_header_value(msg.get("Subject", ""))
 
-    body = _extract_body(msg)
+    if with_body:
+        body = _extract_body(msg)
+    else:
+        body = {"text": None, "html": None}
 
     date_header = msg.get("Date", "")
     received_at = _parse_date(date_header)
@@ -249,8 +498,10 @@ def _parse_email(
         "subject": subject,
         "body_text": body["text"],
         "body_html": body["html"],
+        "body_loaded": with_body,
         "received_at": received_at,
         "is_read": False,
+        "is_bulk": is_bulk_mail(msg.get("List-Unsubscribe"), msg.get("Precedence")),
         "folder": "INBOX",
     }
 
@@ -347,90 +598,178 @@ def _parse_date(date_str: str) -> datetime | None:
 # ---------------------------------------------------------------------------
 
 
-async def sync_naver_messages(
+async def get_folder_states(db: AsyncSession, user_id: int) -> dict[str, SyncState]:
+    """Load the user's Naver SyncState rows keyed by folder."""
+    from sqlalchemy import select
+
+    result = await db.execute(
+        select(SyncState).where(
+            SyncState.user_id == user_id,
+            SyncState.source == "naver",
+        )
+    )
+    states = {state.folder: state for state in result.scalars().all()}
+    # 폴더 구분 이전의 커서(folder="")는 INBOX 커서로 이어서 사용
+    legacy = states.pop("", None)
+    if legacy is not None and "INBOX" not in states:
+        legacy.folder = "INBOX"
+        states["INBOX"] = legacy
+    return states
+
+
+async def _discard_folder_mails(db: AsyncSession, user_id: int, folder: str) -> None:
+    """Delete cached mails of a folder whose UIDVALIDITY changed."""
+    from sqlalchemy import delete, select
+
+    from app.mail.models import Classification, mail_labels
+    from app.mail.services.classification_state import forget_mails
+
+    stale_ids = select(Mail.id).where(
+        Mail.user_id == user_id,
+        Mail.source == "naver",
+        Mail.folder == folder,
+    )
+    await forget_mails(db, stale_ids)
+    await db.execute(
+        delete(Classification).where(Classification.mail_id.in_(stale_ids))
+    )
+    await db.execute(delete(mail_labels).where(mail_labels.c.mail_id.in_(stale_ids)))
+    await db.execute(
+        delete(Mail).where(
+            Mail.user_id == user_id,
+            Mail.source == "naver",
+            Mail.folder == folder,
+        )
+    )
+
+
+async def sync_folders(
     db: AsyncSession,
     user: User,
     host: str,
     port: int,
-    folder: str,
+    folders: list[str],
     max_results: int,
-) -> dict[str, int]:
-    """Sync Naver IMAP messages and save new ones to DB."""
-    from sqlalchemy import select
+) -> dict[str, dict[str, int] | BaseException]:
+    """Sync several IMAP folders concurrently and add new mails. Caller commits.
+
+    Each folder keeps its own cursor (last UID + UIDVALIDITY). When a
+    folder's UIDVALIDITY changes its cached mails are dropped and it is
+    synced again from scratch. Failed folders are returned as exceptions.
+    """
+    from app.mail.services.helpers import ingest_mails
+
+    states = await get_folder_states(db, user.id)
+    results = await fetch_folders(
+        host,
+        port,
+        user.naver_email,
+        decrypt_value(user.naver_app_password),
+        {
+            folder: (
+                (states[folder].last_uid, states[folder].uidvalidity)
+                if folder in states
+                else (None, None)
+            )
+            for folder in folders
+        },
+        max_results=max_results,
+    )
 
-    from app.mail.services.helpers import filter_new_external_ids
+    summary: dict[str, dict[str, int] | BaseException] = {}
+    for folder, result in results.items():
+        if isinstance(result, BaseException):
+            summary[folder] = result
+            continue
 
-    sync_result = await db.execute(
-        select(SyncState).where(
-            SyncState.user_id == user.id,
-            SyncState.source == "naver",
-        )
-    )
-    sync_state = sync_result.scalar_one_or_none()
-    since_uid = sync_state.last_uid if sync_state else None
+        if result["uidvalidity_changed"]:
+            await _discard_folder_mails(db, user.id, folder)
+
+        messages = result["messages"]
+        # 커서 이후 UID만 받으므로 사전 조회 없이 삽입 (중복은 DB가 무시)
+        inserted = await ingest_mails(db, user.id, "naver", messages)
 
-    # Fetch messages from IMAP
+        state = states.get(folder)
+        if state is None and (result["last_uid"] or result["uidvalidity"]):
+            state = SyncState(user_id=user.id, source="naver", folder=folder)
+            db.add(state)
+        if state is not None:
+            state.last_uid = result["last_uid"]
+            state.uidvalidity = result["uidvalidity"]
+            state.last_synced_at = datetime.now(tz=UTC)
+
+        summary[folder] = {
+            "synced": len(inserted),
+            "total_fetched": len(messages),
+        }
+    return summary
+
+
+async def sync_naver_messages(
+    db: AsyncSession,
+    user: User,
+    host: str,
+    port: int,
+    folder: str,
+    max_results: int,
+) -> dict[str, int]:
+    """Sync one Naver IMAP folder and save new messages to DB."""
     try:
-        result = await fetch_messages(
-            host,
-            port,
-            user.naver_email,
-            decrypt_value(user.naver_app_password),
-            folder=folder,
-            since_uid=since_uid,
-            max_results=max_results,
-        )
+        summary = await sync_folders(db, user, host, port, [folder], max_results)
+        result = summary[folder]
+        if isinstance(result, BaseException):
+            raise result
     except imaplib.IMAP4.error as exc:
         raise IMAPAuthenticationException(detail=f"네이버 IMAP 인증 실패: {exc}")
     except (TimeoutError, OSError) as exc:
         raise ExternalServiceException(detail=f"네이버 IMAP 서버 연결 실패: {exc}")
 
-    messages = result["messages"]
-    last_uid = result["last_uid"]
-
-    if not messages:
-        return {"synced": 0, "total_fetched": 0}
-
-    # Filter out already-synced messages
-    external_ids = [m["external_id"] for m in messages]
-    new_external_ids = await filter_new_external_ids(db, user.id, "naver", external_ids)
-    new_messages = [m for m in messages if m["external_id"] in set(new_external_ids)]
-
-    # Save new messages to DB
-    for msg in new_messages:
-        mail = Mail(
-            user_id=user.id,
-            source="naver",
-            external_id=msg["external_id"],
-            from_email=msg["from_email"],
-            from_name=msg["from_name"],
-            to_email=msg["to_email"],
-            subject=msg["subject"],
-            body_text=msg["body_text"],
-            body_html=msg["body_html"],
-            folder=msg["folder"],
-            received_at=msg["received_at"],
-            is_read=msg["is_read"],
-        )
-        db.add(mail)
-
-    # Update sync state
-    if last_uid:
-        if sync_state is None:
-            sync_state = SyncState(
-                user_id=user.id,
-                source="naver",
-                last_uid=last_uid,
-                last_synced_at=datetime.now(tz=UTC),
-            )
-            db.add(sync_state)
-        else:
-            sync_state.last_uid = last_uid
-            sync_state.last_synced_at = datetime.now(tz=UTC)
-
     await db.commit()
+    return result
 
-    return {
-        "synced": len(new_messages),
-        "total_fetched": len(messages),
-    }
+
+async def hydrate_mail_bodies(
+    db: AsyncSession,
+    user: User,
+    mails: list[Mail],
+) -> int:
+    """Download text parts for header-only Naver rows.
+
+    Returns the number of mails hydrated. Caller commits.
+    """
+    pending = [m for m in mails if m.source == "naver" and not m.body_loaded]
+    if not pending:
+        return 0
+
+    by_folder: dict[str, list[Mail]] = {}
+    for mail in pending:
+        by_folder.setdefault(mail.folder or "INBOX", []).append(mail)
+
+    password = decrypt_value(user.naver_app_password)
+    hydrated = 0
+    for folder, folder_mails in by_folder.items():
+        missing: set[str] = set()
+        bodies = await fetch_bodies(
+            settings.naver_imap_host,
+            settings.naver_imap_port,
+            user.naver_email,
+            password,
+            folder,
+            [(_uid_of(m.external_id), m.body_parts) for m in folder_mails],
+            missing=missing,
+        )
+        for mail in folder_mails:
+            uid = _uid_of(mail.external_id)
+            body = bodies.get(uid)
+            if body is not None:
+                mail.body_text = body["text"]
+                mail.body_html = body["html"]
+            elif uid in missing:
+                # 서버에서 삭제된 메일 — 미리보기로 대신해 큐에서 제외
+                mail.body_text = mail.body_text or mail.snippet or ""
+            else:
+                # 일시적 오류는 다음 틱에 재시도
+                continue
+            mail.body_loaded = True
+            hydrated += 1
+    return hydrated
@@ -0,0 +1,177 @@
+"""Local full-text search over synced mail (SQLite FTS5).
+
+``mails_fts`` is an external-content FTS5 table over subject, sender and
+body_text, kept in sync with ``mails`` by triggers, so every ingestion path
+(bulk INSERT, body hydration, folder discards) maintains it incrementally.
+The trigram tokenizer matches substrings, which suits Korean text without
+word segmentation.
+
+Trigram matching needs at least 3 characters, so shorter terms (common for
+Korean words like "회의") are applied as substring filters instead.
+"""
+
+from __future__ import annotations
+
+import html
+from typing import Any
+
+from sqlalchemy import (
+    Connection,
+    column,
+    func,
+    literal_column,
+    null,
+    or_,
+    select,
+    table,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.mail.models import Label, Mail
+
+FTS_TABLE = "mails_fts"
+_INDEXED_COLUMNS = ("subject", "from_name", "from_email", "body_text")
+# trigram 토크나이저가 MATCH로 찾을 수 있는 최소 길이
+_MIN_MATCH_LENGTH = 3
+
+# 하이라이트 구분자 — 본문을 HTML 이스케이프한 뒤 <mark>로 치환
+_HL_START = "\x02"
+_HL_END = "\x03"
+
+_fts = table(FTS_TABLE, column("rowid"))
+_fts_ref = literal_column(FTS_TABLE)
+
+
+def create_search_index(conn: Connection) -> None:
+    """Create the FTS table and its sync triggers, then index existing mail."""
+    if conn.dialect.name != "sqlite":
+        return
+    columns = ", ".join(_INDEXED_COLUMNS)
+    new_values = ", ".join(f"new.{c}" for c in _INDEXED_COLUMNS)
+    old_values = ", ".join(f"old.{c}" for c in _INDEXED_COLUMNS)
+    conn.exec_driver_sql(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"{columns}, content='mails', content_rowid='id', tokenize='trigram')"
+    )
+    insert_new = (
+        f"INSERT INTO {FTS_TABLE} (rowid, {columns}) VALUES (new.id, {new_values});"
+    )
+    delete_old = (
+        f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {columns}) "
+        f"VALUES ('delete', old.id, {old_values});"
+    )
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON mails "
+        f"BEGIN {insert_new} END"
+    )
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON mails "
+        f"BEGIN {delete_old} END"
+    )
+    # 읽음 표시·분류 갱신 등 색인 대상이 아닌 컬럼 변경에는 반응하지 않음
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au "
+        f"AFTER UPDATE OF {columns} ON mails "
+        f"BEGIN {delete_old} {insert_new} END"
+    )
+    conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def _split_terms(query: str) -> tuple[list[str], list[str]]:
+    """Split a query into (FTS-matchable terms, short substring terms)."""
+    terms = list(dict.fromkeys(query.split()))
+    long_terms = [t for t in terms if len(t) >= _MIN_MATCH_LENGTH]
+    short_terms = [t for t in terms if len(t) < _MIN_MATCH_LENGTH]
+    return long_terms, short_terms
+
+
+def _match_expression(terms: list[str]) -> str:
+    # 각 단어를 문자열 리터럴로 감싸 FTS 쿼리 문법(AND/OR/NEAR, *, :) 무력화
+    return " ".join('"' + t.replace('"', '""') + '"' for t in terms)
+
+
+def _render_highlight(value: str | None) -> str | None:
+    if value is None:
+        return None
+    return (
+        html.escape(value)
+        .replace(_HL_START, "<mark>")
+        .replace(_HL_END, "</mark>")
+    )
+
+
+async def search_mails(
+    db: AsyncSession,
+    user_id: int,
+    query: str,
+    source: str | None = None,
+    category: str | None = None,
+    offset: int = 0,
+    limit: int = 20,
+) -> tuple[list[dict[str, Any]], int]:
+    """Search a user's mail. Returns (hits, total), best matches first.
+
+    Each hit has ``mail``, ``rank`` (bm25, lower is better; None when only
+    short terms were given), and HTML-escaped ``subject_highlight`` /
+    ``snippet`` with matches wrapped in ``<mark>``.
+    """
+    long_terms, short_terms = _split_terms(query)
+
+    where_clauses = [Mail.user_id == user_id]
+    if source:
+        where_clauses.append(Mail.source == source)
+    for term in short_terms:
+        where_clauses.append(
+            or_(
+                *(
+                    getattr(Mail, c).contains(term, autoescape=True)
+                    for c in _INDEXED_COLUMNS
+                )
+            )
+        )
+
+    if long_terms:
+        # bm25 가중치: 제목 > 발신자 > 본문
+        rank = func.bm25(_fts_ref, 10.0, 5.0, 5.0, 1.0)
+        columns = [
+            Mail,
+            rank.label("rank"),
+            func.highlight(_fts_ref, 0, _HL_START, _HL_END).label("subject_hl"),
+            func.snippet(_fts_ref, -1, _HL_START, _HL_END, "…", 16).label("snippet"),
+        ]
+        stmt = select(*columns).join(_fts, _fts.c.rowid == Mail.id)
+        count_stmt = select(func.count(Mail.id)).join(_fts, _fts.c.rowid == Mail.id)
+        match = _fts_ref.op("MATCH")(_match_expression(long_terms))
+        where_clauses.append(match)
+        order_by = [rank, Mail.id.desc()]
+    else:
+        stmt = select(
+            Mail,
+            null().label("rank"),
+            null().label("subject_hl"),
+            null().label("snippet"),
+        )
+        count_stmt = select(func.count(Mail.id))
+        order_by = [Mail.received_at.desc(), Mail.id.desc()]
+
+    if category == "unclassified":
+        where_clauses.append(Mail.current_label_id.is_(None))
+    elif category:
+        stmt = stmt.join(Label, Mail.current_label_id == Label.id)
+        count_stmt = count_stmt.join(Label, Mail.current_label_id == Label.id)
+        where_clauses.append(Label.name == category)
+
+    result = await db.execute(
+        stmt.where(*where_clauses).order_by(*order_by).offset(offset).limit(limit)
+    )
+    hits = [
+        {
+            "mail": mail,
+            "rank": rank_value,
+            "subject_highlight": _render_highlight(subject_hl),
+            "snippet": _render_highlight(snippet),
+        }
+        for mail, rank_value, subject_hl, snippet in result.all()
+    ]
+    total = await db.scalar(count_stmt.where(*where_clauses)) or 0
+    return hits, total
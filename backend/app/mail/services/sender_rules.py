@@ -0,0 +1,210 @@
+"""Sender rules generalized from user feedback.
+
+Corrections are aggregated at three levels:
+
+- exact address (``billing@shop.com``), as before;
+- local-part pattern within a domain, with digits and ``+tag`` suffixes
+  generalized (``order-1234@shop.com`` → ``order-#@shop.com``);
+- domain and parent domains (``*@notice.bank.co.kr``, ``*@bank.co.kr``),
+  stored in a reversed-label trie so a lookup is one walk from the TLD.
+
+Pattern and domain rules need agreeing corrections from several
+addresses. Free-mail and public-suffix domains never become domain
+rules. Compiled matchers are cached per user and invalidated whenever the
+user corrects a classification.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.mail.models import Classification, Mail
+
+# 정확한 주소 규칙 최소 수정 횟수 (기존 get_sender_rules와 동일)
+_ADDRESS_MIN_COUNT = 2
+# 패턴/도메인 규칙: 최소 수정 횟수, 서로 다른 주소 수, 최다 카테고리 비율
+_GROUP_MIN_COUNT = 3
+_GROUP_MIN_ADDRESSES = 2
+_GROUP_MIN_SHARE = 0.8
+
+# 여러 사람이 쓰는 메일 서비스 — 도메인 단위로 일반화하지 않음
+_FREE_MAIL_DOMAINS = frozenset({
+    "gmail.com", "naver.com", "daum.net", "hanmail.net", "kakao.com",
+    "nate.com", "outlook.com", "hotmail.com", "live.com", "yahoo.com",
+    "icloud.com", "me.com",
+})
+_PUBLIC_SUFFIXES = frozenset({
+    "co.kr", "or.kr", "go.kr", "ac.kr", "ne.kr", "re.kr", "pe.kr",
+    "co.jp", "ne.jp", "co.uk", "org.uk", "com.au", "com.cn",
+})
+
+_DIGITS = re.compile(r"\d+")
+_TERMINAL = ""  # trie 노드에서 카테고리를 담는 키 (도메인 라벨은 빈 문자열 불가)
+
+
+def _split(from_email: str) -> tuple[str, str]:
+    local, _, domain = from_email.strip().lower().rpartition("@")
+    return local, domain
+
+
+def _local_pattern(local: str) -> str:
+    return _DIGITS.sub("#", local.split("+", 1)[0])
+
+
+def _domain_suffixes(domain: str) -> list[str]:
+    """The domain and its parents that may carry a rule."""
+    if domain in _FREE_MAIL_DOMAINS:
+        return []
+    labels = domain.split(".")
+    suffixes = []
+    for i in range(len(labels) - 1):
+        suffix = ".".join(labels[i:])
+        if suffix in _PUBLIC_SUFFIXES or suffix in _FREE_MAIL_DOMAINS:
+            break
+        suffixes.append(suffix)
+    return suffixes
+
+
+def _winner(
+    counts: dict[str, int], addresses: int, min_count: int, min_addresses: int
+) -> str | None:
+    total = sum(counts.values())
+    category, best = max(counts.items(), key=lambda item: item[1])
+    if total < min_count or addresses < min_addresses:
+        return None
+    if best / total < _GROUP_MIN_SHARE:
+        return None
+    return category
+
+
+class SenderRuleMatcher:
+    """Compiled sender rules; ``get(from_email)`` returns a category or None."""
+
+    def __init__(self) -> None:
+        self.addresses: dict[str, str] = {}
+        self.patterns: dict[tuple[str, str], str] = {}
+        self._trie: dict = {}
+        self.domain_rules = 0
+
+    @classmethod
+    def compile(cls, feedback: list[tuple[str, str, int]]) -> SenderRuleMatcher:
+        """Build from (from_email, corrected_category, count) rows."""
+        matcher = cls()
+        by_address: dict[str, dict[str, int]] = defaultdict(dict)
+        for from_email, category, count in feedback:
+            local, domain = _split(from_email)
+            if not local or not domain:
+                continue
+            counts = by_address[f"{local}@{domain}"]
+            counts[category] = counts.get(category, 0) + count
+
+        patterns: dict[tuple[str, str], dict[str, int]] = defaultdict(dict)
+        pattern_addresses: dict[tuple[str, str], int] = defaultdict(int)
+        domains: dict[str, dict[str, int]] = defaultdict(dict)
+        domain_addresses: dict[str, int] = defaultdict(int)
+
+        for address, counts in by_address.items():
+            # 정확한 주소: 기존 규칙과 같은 기준 (최다 카테고리, 최소 횟수)
+            category, best = max(counts.items(), key=lambda item: item[1])
+            if best >= _ADDRESS_MIN_COUNT:
+                matcher.addresses[address] = category
+
+            local, domain = _split(address)
+            key = (_local_pattern(local), domain)
+            pattern_addresses[key] += 1
+            for c, n in counts.items():
+                patterns[key][c] = patterns[key].get(c, 0) + n
+            for suffix in _domain_suffixes(domain):
+                domain_addresses[suffix] += 1
+                for c, n in counts.items():
+                    domains[suffix][c] = domains[suffix].get(c, 0) + n
+
+        for key, counts in patterns.items():
+            category = _winner(
+                counts, pattern_addresses[key], _GROUP_MIN_COUNT, _GROUP_MIN_ADDRESSES
+            )
+            if category is not None:
+                matcher.patterns[key] = category
+
+        for suffix, counts in domains.items():
+            category = _winner(
+                counts, domain_addresses[suffix], _GROUP_MIN_COUNT, _GROUP_MIN_ADDRESSES
+            )
+            if category is not None:
+                matcher._add_domain(suffix, category)
+        return matcher
+
+    def _add_domain(self, domain: str, category: str) -> None:
+        node = self._trie
+        for label in reversed(domain.split(".")):
+            node = node.setdefault(label, {})
+        node[_TERMINAL] = category
+        self.domain_rules += 1
+
+    def get(self, from_email: str | None, default: str | None = None) -> str | None:
+        """Most specific rule for the sender: address, pattern, then domain."""
+        if not from_email:
+            return default
+        local, domain = _split(from_email)
+        address = f"{local}@{domain}"
+        if address in self.addresses:
+            return self.addresses[address]
+        pattern = self.patterns.get((_local_pattern(local), domain))
+        if pattern is not None:
+            return pattern
+
+        # 가장 긴 도메인 접미사 규칙
+        found = default
+        node = self._trie
+        for label in reversed(domain.split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            found = node.get(_TERMINAL, found)
+        return found
+
+    def __bool__(self) -> bool:
+        return bool(self.addresses or self.patterns or self.domain_rules)
+
+    def __len__(self) -> int:
+        return len(self.addresses) + len(self.patterns) + self.domain_rules
+
+
+_matchers: dict[int, SenderRuleMatcher] = {}
+
+
+async def get_sender_rule_matcher(
+    db: AsyncSession, user_id: int
+) -> SenderRuleMatcher:
+    """The user's compiled rules, rebuilt after feedback changes."""
+    matcher = _matchers.get(user_id)
+    if matcher is not None:
+        return matcher
+
+    result = await db.execute(
+        select(Mail.from_email, Classification.user_feedback, func.count())
+        .join(Mail, Classification.mail_id == Mail.id)
+        .where(
+            Mail.user_id == user_id,
+            Classification.user_feedback.isnot(None),
+            Mail.from_email.isnot(None),
+        )
+        .group_by(Mail.from_email, Classification.user_feedback)
+    )
+    matcher = SenderRuleMatcher.compile(list(result.all()))
+    _matchers[user_id] = matcher
+    return matcher
+
+
+def invalidate_sender_rules(user_id: int) -> None:
+    """Drop the user's compiled rules (call after a feedback change)."""
+    _matchers.pop(user_id, None)
+
+
+def reset() -> None:
+    """Drop all compiled rules (tests)."""
+    _matchers.clear()
@@ -0,0 +1,41 @@
+"""Token estimates for classification prompts.
+
+Uses tiktoken's ``o200k_base`` encoding (the gpt-4o family) when the
+package is installed. Otherwise a character-class heuristic is used that
+errs on the high side: about four ASCII characters per token and one token
+per Hangul/CJK or other non-ASCII character.
+"""
+
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # 선택 의존성 — 없으면 휴리스틱 사용
+    tiktoken = None
+
+# 메시지 1개당 role/구분자 오버헤드 (chat 포맷)
+MESSAGE_OVERHEAD = 4
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:  # 인코딩 파일을 받을 수 없는 환경 (오프라인 등)
+        return None
+
+
+def estimate_tokens(text: str | None) -> int:
+    """Approximate token count of ``text``."""
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    ascii_chars = sum(1 for ch in text if ch.isascii())
+    return math.ceil(ascii_chars / 4) + (len(text) - ascii_chars)
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
+from dataclasses import asdict
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from fastapi import FastAPI
@@ -12,13 +14,28 @@ from app.auth.router import router as auth_router
 from app.bookmark.router import router as bookmark_router
 from app.calendar.router import router as calendar_router
 from app.config import settings
-from app.core.background_sync import sync_all_users
-from app.core.database import Base, engine
+from app.core import background_sync
+from app.core.background_sync import (
+    refresh_naver_idle_watchers,
+    stop_naver_idle_watchers,
+    sync_due_users,
+)
+from app.core.database import engine, write_engine
 from app.core.error_reporter import ErrorReporterMiddleware
+from app.core.llm_client import (
+    close_llm_client,
+    connection_stats,
+    start_llm_client,
+)
+from app.core.migrations import run_migrations
 from app.mail.routers.classify import router as classify_router
 from app.mail.routers.gmail import router as gmail_router
 from app.mail.routers.inbox import router as inbox_router
 from app.mail.routers.naver import router as naver_router
+from app.mail.services.classification_cache import cache_stats
+from app.mail.services.classifier import usage_stats
+from app.mail.services.imap_pool import imap_pool
+from app.mail.services.llm_limiter import get_llm_limiter
 from app.todo.router import router as todo_router
 
 logger = logging.getLogger(__name__)
@@ -26,28 +43,55 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    # DB 테이블 생성
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # DB 테이블 생성 + 스키마 마이그레이션
+    async with write_engine.begin() as conn:
+        await conn.run_sync(run_migrations)
+
+    # 공유 OpenAI 클라이언트 (연결 풀 재사용, 키가 없으면 첫 사용 시 오류)
+    if settings.openai_api_key:
+        start_llm_client()
 
     # 스케줄러 시작
     scheduler = AsyncIOScheduler()
     scheduler.add_job(
-        sync_all_users,
+        sync_due_users,
+        "interval",
+        seconds=settings.sync_tick_seconds,
+        id="sync_due_users",
+        name="동기화 시각이 된 사용자 메일 동기화",
+    )
+    scheduler.add_job(
+        asyncio.to_thread,
         "interval",
-        minutes=settings.sync_interval_minutes,
-        id="sync_all_users",
-        name="전체 사용자 메일 동기화",
+        args=[imap_pool.keepalive],
+        seconds=settings.naver_imap_keepalive_seconds,
+        id="imap_pool_keepalive",
+        name="IMAP 연결 풀 keepalive",
     )
+    if settings.naver_idle_enabled:
+        await refresh_naver_idle_watchers()
+        scheduler.add_job(
+            refresh_naver_idle_watchers,
+            "interval",
+            minutes=settings.sync_interval_minutes,
+            id="refresh_naver_idle_watchers",
+            name="네이버 IMAP IDLE 감시 갱신",
+        )
     scheduler.start()
     logger.info(
-        f"백그라운드 스케줄러 시작 (간격: {settings.sync_interval_minutes}분)"
+        f"백그라운드 스케줄러 시작 (틱: {settings.sync_tick_seconds}초, "
+        f"기본 간격: {settings.sync_interval_minutes}분)"
     )
 
     yield
 
     # 스케줄러 종료
     scheduler.shutdown()
+    stop_naver_idle_watchers()
+    await asyncio.to_thread(imap_pool.close_all)
+    await close_llm_client()
+    await engine.dispose()
+    await write_engine.dispose()
     logger.info("백그라운드 스케줄러 종료")
 
 
@@ -78,3 +122,30 @@ app.include_router(todo_router)
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
+
+
+@app.get("/health/sync")
+async def sync_health():
+    """Timing of the last background sync run (for sizing the interval)."""
+    run = background_sync.last_sync_run
+    return {
+        "tick_seconds": settings.sync_tick_seconds,
+        "default_interval_minutes": settings.sync_interval_minutes,
+        "last_run": asdict(run) if run is not None else None,
+    }
+
+
+@app.get("/health/classification-cache")
+async def classification_cache_health():
+    """Classification cache hit rate since startup."""
+    return cache_stats.as_dict()
+
+
+@app.get("/health/llm-usage")
+async def llm_usage_health():
+    """Classifier token usage, rate limiter state and connection reuse."""
+    return {
+        **usage_stats.as_dict(),
+        "limiter": get_llm_limiter().as_dict(),
+        "connections": connection_stats.as_dict(),
+    }
@@ -30,12 +30,22 @@ TestingSessionLocal = async_sessionmaker(
 
 @pytest.fixture(autouse=True)
 async def setup_db():
-    """Create tables before each test, drop after."""
+    """Create tables (and run migrations) before each test, drop after."""
+    from app.core.migrations import run_migrations
+    from app.mail.services import llm_limiter, local_classifier, sender_rules
+    from app.mail.services.search import FTS_TABLE
+
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(run_migrations)
     yield
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+        # 모델 MetaData 밖의 테이블
+        await conn.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+        await conn.exec_driver_sql("DROP TABLE IF EXISTS schema_migrations")
+    llm_limiter.reset()
+    local_classifier.reset()
+    sender_rules.reset()
 
 
 @pytest.fixture
@@ -44,6 +54,19 @@ async def db_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+@pytest.fixture
+def background_sessions(monkeypatch):
+    """Point sessions opened outside a request at the test database.
+
+    Covers background jobs and the detached SSE classification task.
+    """
+    from app.core import background_sync
+    from app.mail.routers import classify
+
+    monkeypatch.setattr(background_sync, "AsyncSessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(classify, "AsyncSessionLocal", TestingSessionLocal)
+
+
 @pytest.fixture
 async def client() -> AsyncGenerator[AsyncClient, None]:
     # Import app lazily to avoid triggering lifespan (scheduler)
@@ -166,6 +189,9 @@ async def sample_classification(
 ):
     """Create a sample classification for the first Gmail mail."""
     from app.mail.models import Classification
+    from app.mail.services.classification_state import (
+        apply_current_classifications,
+    )
 
     classification = Classification(
         mail_id=sample_mails["gmail1"].id,
@@ -173,6 +199,9 @@ async def sample_classification(
         confidence=0.9,
     )
     db_session.add(classification)
+    await apply_current_classifications(
+        db_session, [(sample_mails["gmail1"], classification)]
+    )
     await db_session.commit()
     await db_session.refresh(classification)
     return classification
@@ -2,8 +2,15 @@
 
 from __future__ import annotations
 
+import json
+from types import SimpleNamespace
+
 from httpx import AsyncClient
+from sqlalchemy import select
 
+from app.config import settings
+from app.mail.models import Mail
+from app.mail.services import classifier
 from tests.conftest import auth_cookie
 
 
@@ -116,3 +123,80 @@ async def test_get_feedback_stats(
     assert isinstance(data["total_feedbacks"], int)
     assert isinstance(data["sender_rules"], list)
     assert isinstance(data["recent_feedbacks"], list)
+
+
+class _FakeCompletions:
+    async def _create(self, **kwargs):
+        count = kwargs["messages"][-1]["content"].count("[메일 ")
+        results = [
+            {"index": i, "category": "업무", "confidence": 0.9, "reason": "r"}
+            for i in range(count)
+        ]
+        response = SimpleNamespace(choices=[SimpleNamespace(
+            message=SimpleNamespace(content=json.dumps({"results": results}))
+        )])
+        return SimpleNamespace(headers={}, parse=lambda: response)
+
+    @property
+    def with_raw_response(self):
+        return SimpleNamespace(create=self._create)
+
+
+async def test_classify_stream_persists_and_sends_each_chunk(
+    client: AsyncClient,
+    db_session,
+    sample_user,
+    sample_mails,
+    background_sessions,
+    monkeypatch,
+):
+    """Each API chunk is committed and streamed before the run finishes."""
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=_FakeCompletions()))
+    monkeypatch.setattr(classifier, "_get_client", lambda: fake)
+    monkeypatch.setattr(settings, "classify_chunk_max_mails", 1)
+    monkeypatch.setattr(settings, "classify_cache_enabled", False)
+
+    response = await client.post(
+        "/api/classify/mails", headers=auth_cookie(sample_user.id)
+    )
+    assert response.status_code == 200
+    events = [
+        json.loads(line[6:])
+        for line in response.text.splitlines()
+        if line.startswith("data: ")
+    ]
+
+    chunks = [e for e in events if e["type"] == "chunk"]
+    assert len(chunks) == 3
+    assert all(len(e["results"]) == 1 for e in chunks)
+    assert all(e["results"][0]["classification_id"] for e in chunks)
+    assert events[-1]["type"] == "done"
+    assert events[-1]["classified"] == 3
+
+    db_session.expire_all()
+    mails = (await db_session.execute(select(Mail))).scalars().all()
+    assert all(m.current_label_id is not None for m in mails)
+
+
+async def test_classify_single_without_cache(client: AsyncClient, monkeypatch):
+    """POST /api/classify/single works with the result cache turned off."""
+    content = json.dumps({"category": "업무", "confidence": 0.9, "reason": "회의"})
+    completion = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+    )
+
+    async def create(**kwargs):
+        return SimpleNamespace(headers={}, parse=lambda: completion)
+
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+        with_raw_response=SimpleNamespace(create=create)
+    )))
+    monkeypatch.setattr(classifier, "_get_client", lambda: fake)
+    monkeypatch.setattr(settings, "classify_cache_enabled", False)
+
+    response = await client.post(
+        "/api/classify/single",
+        json={"from_email": "boss@corp.com", "subject": "회의 안건"},
+    )
+    assert response.status_code == 200
+    assert response.json()["category"] == "업무"
@@ -74,3 +74,40 @@ async def test_get_gmail_message_not_authenticated(client: AsyncClient):
     assert response.status_code == 401
     data = response.json()
     assert "Not authenticated" in data["detail"]
+
+
+async def test_get_gmail_message_hydrates_body(
+    client: AsyncClient, sample_user, db_session, monkeypatch
+):
+    """GET /api/gmail/messages/{id} should fetch the body of a metadata-only mail."""
+    from app.auth.service import build_credentials
+    from app.mail.models import Mail
+    from app.mail.services import gmail
+
+    mail = Mail(
+        user_id=sample_user.id,
+        source="gmail",
+        external_id="gmail_meta",
+        subject="Metadata only",
+        snippet="preview",
+        body_loaded=False,
+    )
+    db_session.add(mail)
+    await db_session.commit()
+
+    async def fake_batch(credentials, ids, **kwargs):
+        return [
+            {"external_id": ids[0], "body_text": "full body", "body_html": None}
+        ]
+
+    monkeypatch.setattr(
+        gmail, "_user_credentials", lambda user: build_credentials("t", "r")
+    )
+    monkeypatch.setattr(gmail, "get_messages_batch", fake_batch)
+
+    response = await client.get(
+        f"/api/gmail/messages/{mail.id}",
+        headers=auth_cookie(sample_user.id),
+    )
+    assert response.status_code == 200
+    assert response.json()["body_text"] == "full body"
@@ -111,3 +111,142 @@ async def test_get_category_counts(
     assert work_category is not None
     assert work_category["count"] == 1
     assert work_category["color"] == "blue"
+
+
+async def test_category_counts_follow_reclassification(
+    client: AsyncClient, sample_user, sample_mails, sample_classification, sample_labels
+):
+    """Relabeling a mail should move it between category counters and filters."""
+    response = await client.put(
+        "/api/classify/update",
+        json={
+            "classification_id": sample_classification.id,
+            "new_category": "개인",
+        },
+        headers=auth_cookie(sample_user.id),
+    )
+    assert response.status_code == 200
+
+    response = await client.get(
+        "/api/inbox/category-counts",
+        headers=auth_cookie(sample_user.id),
+    )
+    counts = {c["name"]: c["count"] for c in response.json()["categories"]}
+    assert counts == {"개인": 1}
+
+    response = await client.get(
+        "/api/inbox/messages?category=개인",
+        headers=auth_cookie(sample_user.id),
+    )
+    messages = response.json()["messages"]
+    assert [m["id"] for m in messages] == [sample_mails["gmail1"].id]
+    assert messages[0]["classification"]["category"] == "개인"
+
+
+async def test_list_inbox_messages_cursor_pagination(
+    client: AsyncClient, sample_user, sample_mails
+):
+    """Following next_cursor walks every message exactly once, newest first."""
+    headers = auth_cookie(sample_user.id)
+    response = await client.get(
+        "/api/inbox/messages?limit=2&include_total=false", headers=headers
+    )
+    first = response.json()
+    assert first["total"] is None
+    assert len(first["messages"]) == 2
+    assert first["next_cursor"]
+
+    response = await client.get(
+        f"/api/inbox/messages?limit=2&cursor={first['next_cursor']}",
+        headers=headers,
+    )
+    second = response.json()
+    assert second["next_cursor"] is None
+
+    ids = [m["id"] for m in first["messages"] + second["messages"]]
+    assert sorted(ids) == sorted(m.id for m in sample_mails.values())
+    received = [m["received_at"] for m in first["messages"] + second["messages"]]
+    assert received == sorted(received, reverse=True)
+
+
+async def test_list_inbox_messages_rejects_bad_cursor(
+    client: AsyncClient, sample_user
+):
+    response = await client.get(
+        "/api/inbox/messages?cursor=not-a-cursor",
+        headers=auth_cookie(sample_user.id),
+    )
+    assert response.status_code == 400
+
+
+async def test_search_messages_ranks_and_highlights(
+    client: AsyncClient, sample_user, sample_mails
+):
+    """GET /api/inbox/search should return FTS matches with highlights."""
+    response = await client.get(
+        "/api/inbox/search?q=gmail&source=gmail",
+        headers=auth_cookie(sample_user.id),
+    )
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["total"] == 2
+    ids = {m["id"] for m in data["messages"]}
+    assert ids == {sample_mails["gmail1"].id, sample_mails["gmail2"].id}
+    first = data["messages"][0]
+    assert first["rank"] is not None
+    assert "<mark>Gmail</mark>" in first["subject_highlight"]
+
+
+async def test_search_messages_korean_and_category_filter(
+    client: AsyncClient, sample_user, sample_mails, sample_classification, db_session
+):
+    """Short Korean terms and category filters should narrow the results."""
+    from app.mail.services.helpers import ingest_mails
+
+    await ingest_mails(
+        db_session,
+        sample_user.id,
+        "naver",
+        [{"external_id": "k1", "subject": "프로젝트 일정 변경 안내"}],
+    )
+    await db_session.commit()
+
+    response = await client.get(
+        "/api/inbox/search?q=프로젝트 일정",
+        headers=auth_cookie(sample_user.id),
+    )
+    messages = response.json()["messages"]
+    assert [m["external_id"] for m in messages] == ["k1"]
+    assert "<mark>프로젝트</mark>" in messages[0]["subject_highlight"]
+
+    # 두 글자 단어만 있으면 부분 문자열 필터로 검색
+    response = await client.get(
+        "/api/inbox/search?q=일정",
+        headers=auth_cookie(sample_user.id),
+    )
+    assert [m["external_id"] for m in response.json()["messages"]] == ["k1"]
+
+    response = await client.get(
+        "/api/inbox/search?q=message&category=업무",
+        headers=auth_cookie(sample_user.id),
+    )
+    messages = response.json()["messages"]
+    assert [m["id"] for m in messages] == [sample_mails["gmail1"].id]
+
+
+async def test_search_index_follows_body_updates(
+    client: AsyncClient, sample_user, sample_mails, db_session
+):
+    """Hydrated bodies should become searchable without a rebuild."""
+    mail = sample_mails["naver1"]
+    mail.body_text = "quarterly budget review"
+    await db_session.commit()
+
+    response = await client.get(
+        "/api/inbox/search?q=budget",
+        headers=auth_cookie(sample_user.id),
+    )
+    messages = response.json()["messages"]
+    assert [m["id"] for m in messages] == [mail.id]
+    assert "<mark>budget</mark>" in messages[0]["snippet"]
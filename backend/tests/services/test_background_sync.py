@@ -0,0 +1,394 @@
+"""Tests for background sync functions."""
+
+from __future__ import annotations
+
+import json
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.core import background_sync, database
+from app.core.migrations import run_migrations
+from app.core.security import encrypt_value
+from app.mail.models import ClassificationBatchJob, Mail, SyncState, User
+from app.mail.services import classifier
+
+
+@pytest.fixture
+async def google_user(db_session):
+    user = User(
+        email="sync@example.com",
+        google_oauth_token=encrypt_value("token"),
+        google_refresh_token=encrypt_value("refresh"),
+    )
+    db_session.add(user)
+    await db_session.commit()
+    await db_session.refresh(user)
+    return user
+
+
+def _detail(external_id: str) -> dict:
+    return {
+        "external_id": external_id,
+        "from_email": "a@example.com",
+        "from_name": "A",
+        "subject": "hello",
+        "body_text": "body",
+        "body_html": None,
+        "received_at": datetime.now(tz=UTC),
+        "is_read": False,
+    }
+
+
+async def test_gmail_history_sync_fetches_only_added(
+    db_session, google_user, monkeypatch
+):
+    """With a stored historyId only messagesAdded are fetched."""
+    db_session.add(SyncState(user_id=google_user.id, source="gmail", history_id="10"))
+    await db_session.commit()
+
+    async def fake_history(credentials, start_history_id):
+        assert start_history_id == "10"
+        return {"added_ids": ["m1"], "read_changes": {}, "history_id": "15"}
+
+    async def fake_batch(credentials, ids, **kwargs):
+        return [_detail(mid) for mid in ids]
+
+    async def fail_list(*args, **kwargs):
+        raise AssertionError("list_message_ids should not be called")
+
+    monkeypatch.setattr(background_sync, "list_history", fake_history)
+    monkeypatch.setattr(background_sync, "get_messages_batch", fake_batch)
+    monkeypatch.setattr(background_sync, "list_message_ids", fail_list)
+
+    assert await background_sync.sync_user_gmail(google_user, db_session) == 1
+
+    state = (await db_session.execute(select(SyncState))).scalar_one()
+    assert state.history_id == "15"
+    mails = (await db_session.execute(select(Mail))).scalars().all()
+    assert [m.external_id for m in mails] == ["m1"]
+
+
+async def test_gmail_history_expired_falls_back_to_resync(
+    db_session, google_user, monkeypatch
+):
+    """An expired historyId triggers a bounded full resync."""
+    db_session.add(SyncState(user_id=google_user.id, source="gmail", history_id="1"))
+    await db_session.commit()
+
+    async def expired(credentials, start_history_id):
+        raise background_sync.HistoryExpiredError(start_history_id)
+
+    async def fake_profile(credentials):
+        return "99"
+
+    async def fake_list(credentials, max_results, **kwargs):
+        return {"message_ids": ["m1", "m2"], "next_page_token": None}
+
+    async def fake_batch(credentials, ids, **kwargs):
+        return [_detail(mid) for mid in ids]
+
+    monkeypatch.setattr(background_sync, "list_history", expired)
+    monkeypatch.setattr(background_sync, "get_history_id", fake_profile)
+    monkeypatch.setattr(background_sync, "list_message_ids", fake_list)
+    monkeypatch.setattr(background_sync, "get_messages_batch", fake_batch)
+
+    assert await background_sync.sync_user_gmail(google_user, db_session) == 2
+
+    state = (await db_session.execute(select(SyncState))).scalar_one()
+    assert state.history_id == "99"
+
+
+@pytest.fixture
+async def naver_user(db_session):
+    user = User(
+        email="naver@example.com",
+        naver_email="me@naver.com",
+        naver_app_password=encrypt_value("app-password"),
+    )
+    db_session.add(user)
+    await db_session.commit()
+    await db_session.refresh(user)
+    return user
+
+
+def _naver_message(folder: str, uid: str) -> dict:
+    message = _detail(uid if folder == "INBOX" else f"{folder}:{uid}")
+    message.update(to_email=None, body_loaded=True, folder=folder)
+    return message
+
+
+async def test_naver_sync_tracks_each_folder(db_session, naver_user, monkeypatch):
+    """Every folder keeps its own cursor; a UIDVALIDITY change resyncs it."""
+    db_session.add(
+        SyncState(
+            user_id=naver_user.id,
+            source="naver",
+            folder="INBOX",
+            last_uid="5",
+            uidvalidity="100",
+        )
+    )
+    db_session.add(
+        Mail(user_id=naver_user.id, source="naver", external_id="5", folder="INBOX")
+    )
+    await db_session.commit()
+
+    calls = {}
+
+    async def fake_fetch(host, port, user, password, folder, since_uid, **kwargs):
+        calls[folder] = (since_uid, kwargs["uidvalidity"])
+        if folder == "INBOX":
+            # 서버 측 UIDVALIDITY 변경 — 기존 UID는 무효
+            return {
+                "messages": [_naver_message("INBOX", "1")],
+                "last_uid": "1",
+                "uidvalidity": "200",
+                "uidvalidity_changed": True,
+            }
+        return {
+            "messages": [_naver_message(folder, "1")],
+            "last_uid": "1",
+            "uidvalidity": "7",
+            "uidvalidity_changed": False,
+        }
+
+    monkeypatch.setattr(
+        background_sync.settings, "naver_sync_folders", ["INBOX", "Sent"]
+    )
+    monkeypatch.setattr("app.mail.services.naver.fetch_messages", fake_fetch)
+
+    synced = await background_sync.sync_user_naver(naver_user, db_session)
+
+    assert synced == 2
+    assert calls == {"INBOX": ("5", "100"), "Sent": (None, None)}
+    mails = (await db_session.execute(select(Mail.external_id))).scalars().all()
+    assert sorted(mails) == ["1", "Sent:1"]
+    states = (await db_session.execute(select(SyncState))).scalars().all()
+    assert {(s.folder, s.last_uid, s.uidvalidity) for s in states} == {
+        ("INBOX", "1", "200"),
+        ("Sent", "1", "7"),
+    }
+
+
+async def test_sync_all_users_runs_sources_in_parallel(
+    db_session, google_user, background_sessions, monkeypatch
+):
+    """Gmail and Naver of one user overlap; a user still running is skipped."""
+    import asyncio
+
+    running: set[str] = set()
+    overlapped = []
+
+    def _job(name: str):
+        async def job(user, db):
+            running.add(name)
+            await asyncio.sleep(0.01)
+            overlapped.append(running == {"gmail", "naver"})
+            running.discard(name)
+            return 1
+
+        return job
+
+    async def no_op(user, db):
+        return 0
+
+    monkeypatch.setattr(background_sync, "sync_user_gmail", _job("gmail"))
+    monkeypatch.setattr(background_sync, "sync_user_naver", _job("naver"))
+    monkeypatch.setattr(background_sync, "hydrate_user_bodies", no_op)
+    monkeypatch.setattr(background_sync, "classify_user_mails", no_op)
+
+    stats = await background_sync.sync_all_users()
+
+    assert any(overlapped)
+    assert (stats.users, stats.gmail, stats.naver) == (1, 1, 1)
+    assert set(stats.phase_seconds) == {"gmail", "imap", "hydrate", "llm"}
+
+    async with background_sync._user_lock(google_user.id):
+        stats = await background_sync.sync_all_users()
+    assert (stats.users, stats.skipped) == (0, 1)
+
+
+class FakeBatchClient:
+    """files/batches API 흉내: 제출된 요청마다 '업무'로 응답."""
+
+    def __init__(self) -> None:
+        self.status = "in_progress"
+        self.lines: list[dict] = []
+        self.files = SimpleNamespace(create=self._upload, content=self._content)
+        self.batches = SimpleNamespace(
+            create=self._create_batch, retrieve=self._retrieve
+        )
+
+    async def _upload(self, file, purpose):
+        assert purpose == "batch"
+        self.lines = [json.loads(line) for line in file[1].decode().splitlines()]
+        return SimpleNamespace(id="file-in")
+
+    async def _create_batch(self, input_file_id, endpoint, completion_window):
+        return SimpleNamespace(id="batch-1")
+
+    async def _retrieve(self, batch_id):
+        output = "file-out" if self.status == "completed" else None
+        return SimpleNamespace(status=self.status, output_file_id=output)
+
+    async def _content(self, file_id):
+        rows = []
+        for line in self.lines:
+            count = line["body"]["messages"][-1]["content"].count("[메일 ")
+            results = [
+                {"index": i, "category": "업무", "confidence": 0.9, "reason": "r"}
+                for i in range(count)
+            ]
+            content = json.dumps({"results": results})
+            body = {"choices": [{"message": {"content": content}}]}
+            rows.append(json.dumps({
+                "custom_id": line["custom_id"],
+                "response": {"status_code": 200, "body": body},
+            }))
+        return SimpleNamespace(text="\n".join(rows))
+
+
+async def test_batch_api_mode_submits_then_applies(
+    db_session, google_user, monkeypatch
+):
+    """Batch API mode submits unresolved mail once and applies results later."""
+    monkeypatch.setattr(settings, "classify_use_batch_api", True)
+    fake = FakeBatchClient()
+    monkeypatch.setattr(classifier, "_get_client", lambda: fake)
+    for i in range(3):
+        db_session.add(Mail(
+            user_id=google_user.id,
+            source="gmail",
+            external_id=f"b{i}",
+            from_email=f"person{i}@example.com",
+            subject=f"회의 {i}",
+            body_text=f"본문 {i}",
+            received_at=datetime.now(tz=UTC),
+        ))
+    await db_session.commit()
+
+    assert await background_sync.classify_user_mails(google_user, db_session) == 0
+    job = (await db_session.execute(select(ClassificationBatchJob))).scalar_one()
+    assert (job.batch_id, job.status, job.mail_count) == ("batch-1", "pending", 3)
+    mails = (await db_session.execute(select(Mail))).scalars().all()
+    assert {m.batch_job_id for m in mails} == {job.id}
+
+    # 진행 중: 같은 메일을 다시 제출하지 않음
+    assert await background_sync.classify_user_mails(google_user, db_session) == 0
+    assert len(fake.lines) == 1
+
+    fake.status = "completed"
+    assert await background_sync.classify_user_mails(google_user, db_session) == 3
+    await db_session.refresh(job)
+    assert job.status == "applied"
+    mails = (await db_session.execute(select(Mail))).scalars().all()
+    assert all(m.current_classification_id is not None for m in mails)
+    assert all(m.batch_job_id is None for m in mails)
+
+
+@pytest.fixture
+async def routing_db(tmp_path, monkeypatch):
+    """File database with the app's reader pool and single-connection writer."""
+    url = f"sqlite+aiosqlite:///{tmp_path / 'app.db'}"
+    reader = create_async_engine(url)
+    writer = create_async_engine(url, pool_size=1, max_overflow=0, pool_timeout=1)
+    for engine in (reader, writer):
+        event.listen(engine.sync_engine, "connect", database._set_sqlite_pragmas)
+    monkeypatch.setattr(database, "engine", reader)
+    monkeypatch.setattr(database, "write_engine", writer)
+    async with writer.begin() as conn:
+        await conn.run_sync(run_migrations)
+
+    async def assert_writer_free() -> None:
+        # 다른 세션이 writer를 잡고 있으면 pool_timeout 후 TimeoutError
+        async with writer.connect():
+            pass
+
+    sessions = async_sessionmaker(
+        class_=AsyncSession,
+        sync_session_class=database.RoutingSession,
+        expire_on_commit=False,
+    )
+    yield sessions, assert_writer_free
+    await reader.dispose()
+    await writer.dispose()
+
+
+async def test_writer_is_free_during_network_calls(routing_db, monkeypatch):
+    """Sync and classification never hold the SQLite writer across I/O."""
+    sessions, assert_writer_free = routing_db
+    meeting = {
+        "from_email": "boss@example.com",
+        "subject": "회의 안건",
+        "body_text": "내일 회의 안건입니다",
+    }
+    calls: list[int] = []
+
+    async def create(**kwargs):
+        await assert_writer_free()
+        count = kwargs["messages"][-1]["content"].count("[메일 ")
+        calls.append(count)
+        content = json.dumps({"results": [
+            {"index": i, "category": "업무", "confidence": 0.9, "reason": "r"}
+            for i in range(count)
+        ]})
+        response = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+        )
+        return SimpleNamespace(headers={}, parse=lambda: response)
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+        with_raw_response=SimpleNamespace(create=create)
+    )))
+    monkeypatch.setattr(classifier, "_get_client", lambda: client)
+
+    async def fake_history(credentials, start_history_id):
+        return {
+            "added_ids": ["m1", "m2"],
+            "read_changes": {"m0": True},
+            "history_id": "11",
+        }
+
+    async def fake_batch(credentials, ids, **kwargs):
+        await assert_writer_free()
+        details = [_detail(mid) for mid in ids]
+        details[0].update(meeting)  # m1은 m0과 같은 캐시 키
+        return details
+
+    monkeypatch.setattr(background_sync, "list_history", fake_history)
+    monkeypatch.setattr(background_sync, "get_messages_batch", fake_batch)
+
+    async with sessions() as db:
+        user = User(
+            email="writer@example.com",
+            google_oauth_token=encrypt_value("token"),
+            google_refresh_token=encrypt_value("refresh"),
+        )
+        db.add(user)
+        await db.flush()
+        db.add(SyncState(user_id=user.id, source="gmail", history_id="10"))
+        db.add(Mail(
+            user_id=user.id,
+            source="gmail",
+            external_id="m0",
+            received_at=datetime.now(tz=UTC),
+            **meeting,
+        ))
+        await db.commit()
+        # m0 분류 결과가 캐시에 남음
+        assert await background_sync.classify_user_mails(user, db) == 1
+
+        assert await background_sync.sync_user_gmail(user, db) == 2
+        m0 = await db.scalar(select(Mail).where(Mail.external_id == "m0"))
+        assert m0.is_read is True
+
+        # m1은 캐시 적중, m2만 API 호출 — 적중 기록은 호출 뒤에 씀
+        assert await background_sync.classify_user_mails(user, db) == 2
+        assert "writing" not in db.info
+
+    assert calls == [1, 1]
@@ -0,0 +1,109 @@
+"""Tests for the classification result cache."""
+
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.mail.models import ClassificationCacheEntry
+from app.mail.services import classifier
+from app.mail.services.classification_cache import (
+    ClassificationCache,
+    cache_key,
+    prompt_fingerprint,
+)
+
+
+class FakeCompletions:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        count = kwargs["messages"][-1]["content"].count("[메일 ")
+        results = [
+            {"index": i, "category": "뉴스레터", "confidence": 0.9, "reason": "r"}
+            for i in range(count)
+        ]
+        content = json.dumps({"results": results})
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+        )
+
+    @property
+    def with_raw_response(self):
+        async def create(**kwargs):
+            response = await self.create(**kwargs)
+            return SimpleNamespace(headers={}, parse=lambda: response)
+
+        return SimpleNamespace(create=create)
+
+
+def _newsletter(issue: int) -> dict:
+    return {
+        "from_email": "news@example.com",
+        "from_name": "News",
+        "subject": f"Weekly digest #{issue}",
+        "body": f"Issue {issue} of our newsletter",
+    }
+
+
+def test_cache_key_ignores_numbers_and_reply_prefixes():
+    fp = prompt_fingerprint("model", "prompt")
+    assert cache_key(fp, "A@x.com", "Order 123 shipped", "body 1") == cache_key(
+        fp, "a@x.com", "RE: Order 456 shipped", "body 2"
+    )
+    other = prompt_fingerprint("model", "prompt + feedback")
+    assert cache_key(fp, "a@x.com", "s", "b") != cache_key(other, "a@x.com", "s", "b")
+
+
+async def test_classify_batch_skips_api_for_cached_and_duplicate_mails(
+    db_session, monkeypatch
+):
+    completions = FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(classifier, "_get_client", lambda: client)
+
+    cache = ClassificationCache(db_session)
+    results = await classifier.classify_batch(
+        [_newsletter(1), _newsletter(2)], cache=cache
+    )
+    await cache.flush()
+    await db_session.commit()
+
+    assert [r["index"] for r in results] == [0, 1]
+    assert completions.calls == 1
+    stored = await db_session.scalar(
+        select(func.count()).select_from(ClassificationCacheEntry)
+    )
+    assert stored == 1  # 두 메일이 같은 키
+
+    cache = ClassificationCache(db_session)
+    results = await classifier.classify_batch([_newsletter(3)], cache=cache)
+
+    assert completions.calls == 1
+    assert results[0]["category"] == "뉴스레터"
+    assert results[0]["cached"] is True
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+async def test_cache_evicts_least_recently_used(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "classify_cache_max_entries", 2)
+    cache = ClassificationCache(db_session)
+
+    for key in ("a", "b"):
+        await cache.put_many({key: {"category": "알림"}})
+        await cache.flush()
+    await cache.get_many(["a"])  # a를 최근 사용으로 갱신
+    await cache.flush()
+    await cache.put_many({"c": {"category": "알림"}})
+    await cache.flush()
+    await db_session.commit()
+
+    keys = set(
+        (await db_session.execute(select(ClassificationCacheEntry.key))).scalars()
+    )
+    assert keys == {"a", "c"}
@@ -0,0 +1,107 @@
+"""Tests for classifier request planning."""
+
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+
+from app.config import settings
+from app.mail.services import classifier, tokens
+from app.mail.services.tokens import estimate_tokens
+
+
+def _mail(body: str) -> dict:
+    return {
+        "from_email": "noti@example.com",
+        "from_name": "Noti",
+        "subject": "알림",
+        "body": body,
+    }
+
+
+def test_estimate_tokens_heuristic(monkeypatch):
+    monkeypatch.setattr(tokens, "tiktoken", None)
+    tokens._encoding.cache_clear()
+    try:
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("abcdefgh") == 2
+        assert estimate_tokens("안녕하세요") == 5
+    finally:
+        tokens._encoding.cache_clear()
+
+
+def test_plan_chunks_packs_short_mails_and_splits_long_ones(monkeypatch):
+    monkeypatch.setattr(settings, "classify_chunk_input_tokens", 3000)
+    monkeypatch.setattr(settings, "classify_chunk_max_mails", 40)
+
+    short = classifier.plan_chunks([_mail("배송 출발")] * 30, classifier.SYSTEM_PROMPT)
+    assert [c.size for c in short] == [30]
+
+    long = classifier.plan_chunks([_mail("가" * 300)] * 30, classifier.SYSTEM_PROMPT)
+    assert len(long) > 1
+    assert sum(c.size for c in long) == 30
+    assert all(c.input_tokens <= 3000 for c in long)
+    assert [c.start for c in long] == [
+        sum(c.size for c in long[:i]) for i in range(len(long))
+    ]
+
+
+def test_chunk_request_scales_max_tokens():
+    small = classifier._chunk_request([_mail("a")], classifier.SYSTEM_PROMPT)
+    large = classifier._chunk_request([_mail("a")] * 30, classifier.SYSTEM_PROMPT)
+    assert small["max_tokens"] < large["max_tokens"]
+    assert large["max_tokens"] <= settings.classify_chunk_output_tokens
+
+
+def _example(from_email: str, subject: str, corrected: str) -> dict:
+    return {
+        "from_email": from_email,
+        "from_name": "",
+        "subject": subject,
+        "original_category": "알림",
+        "corrected_category": corrected,
+    }
+
+
+def test_system_prompt_is_stable_across_feedback_order():
+    a = _example("a@x.com", "Invoice", "금융")
+    b = _example("B@x.com ", "Meeting  notes", "업무")
+    first = classifier._build_system_prompt([a, b, a])
+    second = classifier._build_system_prompt([b, a])
+
+    assert first == second
+    assert first.startswith(classifier.SYSTEM_PROMPT)
+    assert f"v{classifier.FEEDBACK_BLOCK_VERSION}" in first
+    assert "b@x.com" in first and "Meeting notes" in first
+
+
+async def test_cached_prompt_tokens_are_recorded(monkeypatch):
+    async def create(**kwargs):
+        usage = SimpleNamespace(
+            prompt_tokens=1200,
+            completion_tokens=40,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=1024),
+        )
+        content = json.dumps({"category": "알림", "confidence": 0.9, "reason": ""})
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=usage,
+        )
+
+    async def raw_create(**kwargs):
+        response = await create(**kwargs)
+        return SimpleNamespace(headers={}, parse=lambda: response)
+
+    completions = SimpleNamespace(
+        with_raw_response=SimpleNamespace(create=raw_create)
+    )
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(classifier, "_get_client", lambda: client)
+    monkeypatch.setattr(classifier, "usage_stats", classifier.UsageStats())
+
+    await classifier.classify_single("a@x.com", "A", "hi", "body")
+
+    stats = classifier.usage_stats
+    assert (stats.requests, stats.prompt_tokens, stats.cached_tokens) == (
+        1, 1200, 1024
+    )
@@ -0,0 +1,122 @@
+"""Tests for Gmail service helpers."""
+
+from __future__ import annotations
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from app.auth.service import build_credentials
+from app.mail.models import Mail, User
+from app.mail.services import gmail
+
+
+class _FakeBatch:
+    def __init__(self, callback, calls: list[int]):
+        self._callback = callback
+        self._requests: list[tuple[str, str]] = []
+        self._calls = calls
+
+    def add(self, message_id: str, request_id: str) -> None:
+        self._requests.append((request_id, message_id))
+
+    def execute(self) -> None:
+        self._calls.append(len(self._requests))
+        for request_id, message_id in self._requests:
+            if message_id == "bad":
+                self._callback(request_id, None, RuntimeError("503"))
+            elif message_id == "gone":
+                resp = httplib2.Response({"status": 404})
+                self._callback(request_id, None, HttpError(resp, b"Not Found"))
+            else:
+                self._callback(request_id, _raw_message(message_id), None)
+
+
+class _FakeMessages:
+    def get(self, userId: str, id: str, format: str) -> str:  # noqa: A002, N803
+        return id
+
+
+class _FakeUsers:
+    def messages(self) -> _FakeMessages:
+        return _FakeMessages()
+
+
+class _FakeService:
+    def __init__(self) -> None:
+        self.batch_calls: list[int] = []
+
+    def users(self) -> _FakeUsers:
+        return _FakeUsers()
+
+    def new_batch_http_request(self, callback) -> _FakeBatch:
+        return _FakeBatch(callback, self.batch_calls)
+
+
+def _raw_message(message_id: str) -> dict:
+    return {
+        "id": message_id,
+        "internalDate": "1700000000000",
+        "labelIds": ["INBOX"],
+        "payload": {
+            "mimeType": "text/plain",
+            "headers": [
+                {"name": "From", "value": "Sender <sender@example.com>"},
+                {"name": "Subject", "value": f"subject {message_id}"},
+            ],
+            "body": {"data": ""},
+        },
+    }
+
+
+async def test_get_messages_batch_packs_requests(monkeypatch):
+    """Messages are fetched in batch round trips of at most batch_size."""
+    service = _FakeService()
+    monkeypatch.setattr(gmail, "_build_gmail", lambda credentials: service)
+
+    ids = [f"m{i}" for i in range(5)]
+    results = await gmail.get_messages_batch(None, ids, batch_size=2)
+
+    assert service.batch_calls == [2, 2, 1]
+    assert [r["external_id"] for r in results] == ids
+
+
+async def test_get_messages_batch_skips_failed_items(monkeypatch):
+    """One failing message does not abort the rest of the batch."""
+    service = _FakeService()
+    monkeypatch.setattr(gmail, "_build_gmail", lambda credentials: service)
+
+    results = await gmail.get_messages_batch(None, ["m1", "bad", "m2"])
+
+    assert [r["external_id"] for r in results] == ["m1", "m2"]
+
+
+async def test_hydrate_marks_deleted_messages_loaded(db_session, monkeypatch):
+    """A message deleted upstream leaves the queue with its snippet as body."""
+    service = _FakeService()
+    monkeypatch.setattr(gmail, "_build_gmail", lambda credentials: service)
+    monkeypatch.setattr(
+        gmail, "_user_credentials", lambda user: build_credentials("t", "r")
+    )
+    user = User(email="hydrate@example.com")
+    db_session.add(user)
+    await db_session.flush()
+    mails = [
+        Mail(
+            user_id=user.id,
+            source="gmail",
+            external_id=external_id,
+            snippet=f"preview {external_id}",
+            body_loaded=False,
+        )
+        for external_id in ("m1", "gone", "bad")
+    ]
+    db_session.add_all(mails)
+    await db_session.commit()
+
+    assert await gmail.hydrate_mail_bodies(db_session, user, mails) == 2
+
+    loaded, gone, failed = mails
+    assert loaded.body_loaded is True
+    assert (gone.body_loaded, gone.body_text) == (True, "preview gone")
+    # 일시적 오류는 다음 틱에 다시 시도
+    assert failed.body_loaded is False
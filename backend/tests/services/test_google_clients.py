@@ -0,0 +1,28 @@
+"""Tests for the cached Google API client factory."""
+
+from __future__ import annotations
+
+from app.auth.service import build_credentials
+from app.core import google_clients
+from app.core.google_clients import get_google_service
+
+
+def test_services_share_one_template():
+    """Callers reuse the parsed service instead of rebuilding it."""
+    first = get_google_service("gmail", "v1", build_credentials("tok", "refresh-a"))
+    second = get_google_service("gmail", "v1", build_credentials("tok", "refresh-a"))
+    template = google_clients._template("gmail", "v1")
+    assert first is not second
+    assert first._resourceDesc is second._resourceDesc is template._resourceDesc
+
+
+def test_requests_use_the_callers_credentials():
+    """Each caller's requests (and token refreshes) use its own credentials."""
+    mine = build_credentials("old", "refresh-b")
+    theirs = build_credentials("old", "refresh-b")
+    service = get_google_service("gmail", "v1", mine)
+    get_google_service("gmail", "v1", theirs)
+
+    request = service.users().messages().get(userId="me", id="m1")
+    assert request.http.credentials is mine
+    assert google_clients._template("gmail", "v1")._http.credentials is None
@@ -0,0 +1,71 @@
+"""Tests for shared mail helpers."""
+
+from __future__ import annotations
+
+from sqlalchemy import func, select
+
+from app.mail.models import Mail
+from app.mail.services.helpers import ingest_mails
+
+
+def _message(external_id: str) -> dict:
+    return {
+        "external_id": external_id,
+        "from_email": "a@example.com",
+        "subject": f"subject {external_id}",
+        "is_read": False,
+    }
+
+
+async def test_ingest_mails_skips_existing_rows(db_session, sample_user, sample_mails):
+    """Duplicates are ignored by the database; only new IDs are returned."""
+    existing = sample_mails["gmail1"]
+    messages = [_message(existing.external_id), _message("new-1"), _message("new-2")]
+
+    inserted = await ingest_mails(db_session, sample_user.id, existing.source, messages)
+    await db_session.commit()
+
+    rows = await db_session.execute(
+        select(Mail).where(Mail.id.in_(inserted)).order_by(Mail.id)
+    )
+    assert [m.external_id for m in rows.scalars()] == ["new-1", "new-2"]
+
+    again = await ingest_mails(db_session, sample_user.id, existing.source, messages)
+    assert again == []
+    total = await db_session.scalar(select(func.count()).select_from(Mail))
+    assert total == len(sample_mails) + 2
+
+
+async def test_list_user_mails_cursor_reaches_undated_mails(db_session, sample_user):
+    """Keyset pages continue into mails without received_at (sorted last)."""
+    from datetime import datetime
+
+    from app.mail.services.helpers import list_user_mails
+
+    for i in range(3):
+        db_session.add(
+            Mail(
+                user_id=sample_user.id,
+                source="naver",
+                external_id=f"dated-{i}",
+                received_at=datetime(2024, 1, i + 1),
+            )
+        )
+        db_session.add(
+            Mail(user_id=sample_user.id, source="naver", external_id=f"undated-{i}")
+        )
+    await db_session.commit()
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        mails, total, cursor = await list_user_mails(
+            db_session, sample_user.id, "naver", 0, 2, cursor, include_total=False
+        )
+        seen.extend(m.external_id for m in mails)
+        assert total is None
+        if cursor is None:
+            break
+
+    assert seen[:3] == ["dated-2", "dated-1", "dated-0"]
+    assert sorted(seen[3:]) == ["undated-0", "undated-1", "undated-2"]
@@ -0,0 +1,89 @@
+"""Tests for the IMAP connection pool."""
+
+from __future__ import annotations
+
+import imaplib
+
+import pytest
+
+from app.mail.services import imap_pool as pool_module
+from app.mail.services.imap_pool import IMAPConnectionPool
+
+
+class _FakeConn:
+    def __init__(self, password: str) -> None:
+        self.password = password
+        self.noop_ok = True
+        self.logged_out = False
+
+    def noop(self):
+        if not self.noop_ok:
+            raise imaplib.IMAP4.abort("socket closed")
+        return "OK", [b""]
+
+    def logout(self):
+        self.logged_out = True
+
+
+@pytest.fixture
+def opened(monkeypatch) -> list[_FakeConn]:
+    conns: list[_FakeConn] = []
+
+    def fake_open(host, port, user, password):
+        conn = _FakeConn(password)
+        conns.append(conn)
+        return conn
+
+    monkeypatch.setattr(pool_module, "_open", fake_open)
+    return conns
+
+
+def _pool() -> IMAPConnectionPool:
+    return IMAPConnectionPool(
+        max_per_account=2, keepalive_seconds=0, max_idle_seconds=600
+    )
+
+
+def test_connection_is_reused(opened):
+    """A released session is handed out again without a new login."""
+    pool = _pool()
+    with pool.connection("h", 993, "u", "pw") as first:
+        pass
+    with pool.connection("h", 993, "u", "pw") as second:
+        pass
+    assert first is second
+    assert len(opened) == 1
+
+
+def test_dead_connection_is_replaced(opened):
+    """A session failing NOOP is closed and a new one is opened."""
+    pool = _pool()
+    with pool.connection("h", 993, "u", "pw") as first:
+        pass
+    first.noop_ok = False
+    with pool.connection("h", 993, "u", "pw") as second:
+        pass
+    assert second is not first
+    assert first.logged_out
+
+
+def test_broken_connection_is_not_returned(opened):
+    """A connection error inside the block discards the session."""
+    pool = _pool()
+    with pytest.raises(imaplib.IMAP4.abort):
+        with pool.connection("h", 993, "u", "pw"):
+            raise imaplib.IMAP4.abort("reset")
+    with pool.connection("h", 993, "u", "pw"):
+        pass
+    assert len(opened) == 2
+    assert opened[0].logged_out
+
+
+def test_password_change_drops_sessions(opened):
+    """Changing the password logs in again."""
+    pool = _pool()
+    with pool.connection("h", 993, "u", "old"):
+        pass
+    with pool.connection("h", 993, "u", "new") as conn:
+        assert conn.password == "new"
+    assert opened[0].logged_out
@@ -0,0 +1,87 @@
+"""Tests for the shared OpenAI rate limiter."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from openai import RateLimitError
+
+from app.mail.services import llm_limiter
+from app.mail.services.llm_limiter import (
+    BACKGROUND,
+    INTERACTIVE,
+    LLMRateLimiter,
+    parse_duration,
+)
+
+
+def _limiter(max_concurrency: int = 4) -> LLMRateLimiter:
+    return LLMRateLimiter(rpm=1000, tpm=1_000_000, max_concurrency=max_concurrency)
+
+
+def _rate_limit_error(headers: dict[str, str]) -> RateLimitError:
+    response = SimpleNamespace(status_code=429, headers=headers, request=None)
+    return RateLimitError("rate limited", response=response, body=None)
+
+
+def test_parse_duration():
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("1.5s") == 1.5
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration(None) is None
+
+
+async def test_rate_limit_retries_and_halves_concurrency(monkeypatch):
+    monkeypatch.setattr(llm_limiter.random, "uniform", lambda a, b: 0.0)
+    limiter = _limiter(max_concurrency=8)
+    calls = 0
+
+    async def send():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise _rate_limit_error({"retry-after-ms": "1"})
+        return "ok", {"x-ratelimit-remaining-requests": "10"}
+
+    assert await limiter.call(send, lane=BACKGROUND, tokens=100) == "ok"
+    assert calls == 2
+    assert limiter.stats.rate_limited == 1
+    assert limiter.stats.retries == 1
+    assert 4 <= limiter.concurrency < 5  # 8 → 4, 성공 후 소폭 증가
+    assert limiter.requests.level <= 10
+    assert limiter.in_flight == 0
+
+
+async def test_insufficient_quota_is_not_retried():
+    limiter = _limiter()
+
+    async def send():
+        error = _rate_limit_error({})
+        error.code = "insufficient_quota"
+        raise error
+
+    with pytest.raises(RateLimitError):
+        await limiter.call(send)
+    assert limiter.stats.retries == 0
+
+
+async def test_interactive_lane_is_served_first():
+    limiter = _limiter(max_concurrency=1)
+    order: list[str] = []
+
+    async def job(lane: str) -> None:
+        async with limiter.slot(lane, tokens=1):
+            order.append(lane)
+
+    async with limiter.slot(BACKGROUND, tokens=1):
+        waiting = [
+            asyncio.create_task(job(BACKGROUND)),
+            asyncio.create_task(job(INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+    await asyncio.gather(*waiting)
+
+    assert order == [INTERACTIVE, BACKGROUND]
+    assert limiter.in_flight == 0
@@ -0,0 +1,134 @@
+"""Tests for the local (pre-LLM) classification tier."""
+
+from __future__ import annotations
+
+from app.config import settings
+from app.mail.models import Classification, Label, Mail
+from app.mail.services import classifier
+from app.mail.services.gmail import _parse_message
+from app.mail.services.local_classifier import (
+    LocalModel,
+    classify_locally,
+    get_local_model,
+    match_rules,
+)
+
+
+def _mail(from_email: str, subject: str, body: str = "", is_bulk=False) -> dict:
+    return {
+        "from_email": from_email,
+        "from_name": "",
+        "subject": subject,
+        "body": body,
+        "is_bulk": is_bulk,
+    }
+
+
+def test_bulk_headers_are_parsed():
+    raw = {
+        "id": "m1",
+        "payload": {
+            "headers": [
+                {"name": "From", "value": "News <news@example.com>"},
+                {"name": "List-Unsubscribe", "value": "<mailto:u@example.com>"},
+            ]
+        },
+    }
+    assert _parse_message(raw, with_body=False)["is_bulk"] is True
+
+
+def test_rules_label_unambiguous_mail():
+    assert match_rules(_mail("shop@example.com", "(광고) 봄맞이 할인"))[0] == "프로모션"
+    assert match_rules(_mail("alert@card.samsungcard.com", "결제 승인"))[0] == "금융"
+    # 금융사의 대량 발송 메일은 규칙으로 확정하지 않음
+    assert match_rules(_mail("ad@samsungcard.com", "이벤트", is_bulk=True)) is None
+
+
+def test_rules_label_bulk_and_no_reply_mail():
+    promo = match_rules(_mail("deals@shop.com", "주말 특가 쿠폰", is_bulk=True))
+    assert promo[0] == "프로모션"
+    assert promo[1] >= settings.local_classify_threshold
+    # 일반 구독 메일은 규칙 후보로만 남고 모델/LLM이 확정
+    digest = match_rules(_mail("hello@letters.io", "이번 주 소식", is_bulk=True))
+    assert digest[0] == "뉴스레터"
+    assert classify_locally(
+        _mail("hello@letters.io", "이번 주 소식", is_bulk=True), None
+    ) is None
+    assert match_rules(_mail("no-reply@accounts.example.com", "비밀번호 변경"))[0] == (
+        "알림"
+    )
+    assert match_rules(_mail("notion@example.com", "회의록 공유")) is None
+
+
+def test_model_learns_user_labels():
+    model = LocalModel()
+    for i in range(30):
+        model.learn(_mail("boss@corp.com", f"주간 회의 안건 {i}"), "업무")
+        model.learn(
+            _mail("news@letters.io", f"이번 주 소식 {i}", is_bulk=True), "뉴스레터"
+        )
+
+    result = classify_locally(_mail("boss@corp.com", "주간 회의 안건 공유"), model)
+    assert result is not None
+    assert result["category"] == "업무"
+    assert result["confidence"] >= settings.local_classify_threshold
+    assert classify_locally(_mail("stranger@else.com", "안녕하세요"), model) is None
+
+
+async def test_bootstrap_skips_local_tier_results(db_session, sample_user):
+    """Rows the local tier produced only train the model once corrected."""
+    label = Label(user_id=sample_user.id, name="알림")
+    db_session.add(label)
+    await db_session.flush()
+    for i, (is_local, feedback) in enumerate(
+        [(True, None), (False, None), (True, "알림")]
+    ):
+        mail = Mail(user_id=sample_user.id, source="gmail", external_id=f"m{i}")
+        db_session.add(mail)
+        await db_session.flush()
+        classification = Classification(
+            mail_id=mail.id,
+            label_id=label.id,
+            confidence=0.95,
+            is_local=is_local,
+            user_feedback=feedback,
+        )
+        db_session.add(classification)
+        await db_session.flush()
+        mail.current_classification_id = classification.id
+    await db_session.commit()
+
+    model = await get_local_model(db_session, sample_user.id)
+    assert model.examples == 2
+
+
+async def test_classify_batch_sends_only_uncertain_mail_to_llm(
+    db_session, sample_user, monkeypatch
+):
+    sent: list[list[dict]] = []
+
+    async def fake_chunk(
+        chunk, chunk_start, index_map, client, system_prompt, lane
+    ):
+        sent.append(chunk)
+        return [
+            {"index": index_map[chunk_start + i], "category": "개인",
+             "confidence": 0.9, "reason": ""}
+            for i in range(len(chunk))
+        ]
+
+    monkeypatch.setattr(classifier, "_process_chunk", fake_chunk)
+    monkeypatch.setattr(classifier, "_get_client", lambda: None)
+
+    model = await get_local_model(db_session, sample_user.id)
+    results = await classifier.classify_batch(
+        [
+            _mail("shop@example.com", "[광고] 특가"),
+            _mail("friend@example.com", "주말에 뭐해?"),
+        ],
+        local_model=model,
+    )
+
+    assert [r["category"] for r in results] == ["프로모션", "개인"]
+    assert results[0]["local"] is True
+    assert [m["subject"] for m in sent[0]] == ["주말에 뭐해?"]
@@ -0,0 +1,163 @@
+"""Tests for Naver IMAP service helpers."""
+
+from __future__ import annotations
+
+from app.core.security import encrypt_value
+from app.mail.models import Mail, User
+from app.mail.services import naver
+from app.mail.services.imap_structure import find_text_parts, parse_bodystructure
+from app.mail.services.naver import (
+    _compact_uid_set,
+    _fetch_bodies_sync,
+    _iter_fetch_bulk,
+)
+
+_RAW = (
+    b"From: Sender <sender@example.com>\r\n"
+    b"Subject: hello\r\n"
+    b"Date: Mon, 1 Jan 2024 00:00:00 +0000\r\n"
+    b"\r\n"
+    b"body\r\n"
+)
+
+
+class _FakeConn:
+    def __init__(self) -> None:
+        self.fetches: list[str] = []
+
+    def uid(self, command: str, uid_set: str, items: str):
+        self.fetches.append(uid_set)
+        data = []
+        for n, uid in enumerate(uid_set.replace(":", ",").split(",")):
+            data.append(
+                (f"{n + 1} (UID {uid} BODY[] {{{len(_RAW)}}}".encode(), _RAW)
+            )
+            data.append(b" FLAGS (\\Seen))" if n % 2 == 0 else b")")
+        return "OK", data
+
+
+def test_compact_uid_set_collapses_ranges():
+    assert _compact_uid_set([b"1", b"2", b"3", b"7", b"9", b"10"]) == "1:3,7,9:10"
+    assert _compact_uid_set(["5"]) == "5"
+
+
+def test_bulk_fetch_uses_one_round_trip_per_page():
+    """UIDs are fetched in pages and parsed with their flags."""
+    conn = _FakeConn()
+    uids = [b"1", b"4", b"6"]
+    messages = list(_iter_fetch_bulk(conn, uids, "INBOX", page_size=2))
+
+    assert conn.fetches == ["1,4", "6"]
+    assert [m["external_id"] for m in messages] == ["1", "4", "6"]
+    assert [m["is_read"] for m in messages] == [True, False, True]
+    assert messages[0]["subject"] == "hello"
+
+
+_STRUCTURE = (
+    '(("TEXT" "PLAIN" ("CHARSET" "UTF-8") NIL NIL "BASE64" 8 1 NIL NIL NIL)'
+    '("TEXT" "HTML" ("CHARSET" "UTF-8") NIL NIL "7BIT" 10 1 NIL NIL NIL)'
+    ' "ALTERNATIVE" NIL NIL NIL)'
+    '("APPLICATION" "PDF" ("NAME" "a.pdf") NIL NIL "BASE64" 999 NIL'
+    ' ("ATTACHMENT" ("FILENAME" "a.pdf")) NIL) "MIXED"'
+)
+
+
+def test_find_text_parts_skips_attachments():
+    structure = parse_bodystructure(f"1 (UID 3 BODYSTRUCTURE ({_STRUCTURE}))")
+    parts = find_text_parts(structure)
+
+    assert parts == {
+        "plain": {"section": "1.1", "encoding": "BASE64", "charset": "UTF-8"},
+        "html": {"section": "1.2", "encoding": "7BIT", "charset": "UTF-8"},
+    }
+
+
+class _HeaderOnlyConn:
+    def __init__(self) -> None:
+        self.items: list[str] = []
+
+    def uid(self, command: str, uid_set: str, items: str):
+        self.items.append(items)
+        if "BODYSTRUCTURE" in items:
+            header = _RAW.split(b"\r\n\r\n")[0] + b"\r\n\r\n"
+            return "OK", [
+                (
+                    f"1 (UID 3 RFC822.SIZE 2048 FLAGS () BODYSTRUCTURE "
+                    f"({_STRUCTURE}) BODY[HEADER.FIELDS (FROM TO SUBJECT DATE)]"
+                    f" {{{len(header)}}}".encode(),
+                    header,
+                ),
+                b")",
+            ]
+        return "OK", [
+            (b"1 (UID 3 BODY[1.1] {8}", b"aGVsbG8="),
+            (b" BODY[1.2] {9}", b"<p>hi</p>"),
+            b")",
+        ]
+
+
+def test_headers_only_fetch_then_bodies_by_section():
+    """Header-only sync records part locations; bodies come back by section."""
+    conn = _HeaderOnlyConn()
+    [message] = list(_iter_fetch_bulk(conn, [b"3"], "INBOX", headers_only=True))
+
+    assert message["body_loaded"] is False
+    assert message["size_bytes"] == 2048
+    assert message["subject"] == "hello"
+    assert "BODY[]" not in conn.items[0]
+
+    bodies = _fetch_bodies_sync(conn, [("3", message["body_parts"])])
+
+    assert conn.items[-1] == "(UID BODY.PEEK[1.1] BODY.PEEK[1.2])"
+    assert bodies["3"]["text"] == "hello"
+    assert bodies["3"]["html"] == "<p>hi</p>"
+
+
+def test_fetch_bodies_reports_expunged_uids():
+    """UIDs missing from a successful UID FETCH are reported as missing."""
+    conn = _HeaderOnlyConn()
+    [message] = list(_iter_fetch_bulk(conn, [b"3"], "INBOX", headers_only=True))
+    missing: set[str] = set()
+
+    bodies = _fetch_bodies_sync(
+        conn, [("3", message["body_parts"]), ("4", message["body_parts"])], missing
+    )
+
+    assert set(bodies) == {"3"}
+    assert missing == {"4"}
+
+
+async def test_hydrate_marks_expunged_mails_loaded(db_session, monkeypatch):
+    """Expunged mails leave the hydration queue; transient misses stay."""
+    user = User(
+        email="naver-hydrate@example.com",
+        naver_email="me@naver.com",
+        naver_app_password=encrypt_value("pw"),
+    )
+    db_session.add(user)
+    await db_session.flush()
+    mails = [
+        Mail(
+            user_id=user.id,
+            source="naver",
+            external_id=f"INBOX:{uid}",
+            folder="INBOX",
+            body_loaded=False,
+        )
+        for uid in ("3", "4", "5")
+    ]
+    db_session.add_all(mails)
+    await db_session.commit()
+
+    async def fake_fetch_bodies(host, port, user, password, folder, uids, missing):
+        missing.add("4")
+        return {"3": {"text": "hello", "html": None}}
+
+    monkeypatch.setattr(naver, "fetch_bodies", fake_fetch_bodies)
+
+    assert await naver.hydrate_mail_bodies(db_session, user, mails) == 2
+
+    loaded, gone, failed = mails
+    assert (loaded.body_loaded, loaded.body_text) == (True, "hello")
+    assert (gone.body_loaded, gone.body_text) == (True, "")
+    assert failed.body_loaded is False
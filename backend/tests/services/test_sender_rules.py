@@ -0,0 +1,56 @@
+"""Tests for feedback-derived sender rules."""
+
+from __future__ import annotations
+
+from app.mail.services.sender_rules import (
+    SenderRuleMatcher,
+    get_sender_rule_matcher,
+    invalidate_sender_rules,
+)
+
+
+def test_exact_address_rules_match_previous_behaviour():
+    matcher = SenderRuleMatcher.compile([
+        ("boss@corp.com", "업무", 2),
+        ("once@corp.com", "개인", 1),
+    ])
+    assert matcher.get("boss@corp.com") == "업무"
+    assert matcher.get("BOSS@corp.com") == "업무"
+    assert matcher.get("once@corp.com") is None
+
+
+def test_domain_rules_generalize_to_subdomains():
+    matcher = SenderRuleMatcher.compile([
+        ("alert@notice.bank.co.kr", "금융", 2),
+        ("card@notice.bank.co.kr", "금융", 1),
+        ("event@bank.co.kr", "금융", 1),
+    ])
+    assert matcher.get("new-sender@notice.bank.co.kr") == "금융"
+    assert matcher.get("someone@mail.bank.co.kr") == "금융"
+    # 공용 접미사(co.kr)로는 일반화하지 않음
+    assert matcher.get("someone@other.co.kr") is None
+
+
+def test_local_part_patterns_and_free_mail():
+    matcher = SenderRuleMatcher.compile([
+        ("order-1001@shop.com", "알림", 1),
+        ("order-1002@shop.com", "알림", 1),
+        ("order-1003+kr@shop.com", "알림", 1),
+        ("ceo@shop.com", "업무", 2),
+        ("a@gmail.com", "개인", 2),
+        ("b@gmail.com", "개인", 2),
+    ])
+    assert matcher.get("order-9999@shop.com") == "알림"
+    # 도메인 전체로는 카테고리가 엇갈려 규칙 없음
+    assert matcher.get("support@shop.com") is None
+    assert matcher.get("c@gmail.com") is None
+
+
+async def test_matcher_is_cached_until_invalidated(
+    db_session, sample_user, sample_classification
+):
+    first = await get_sender_rule_matcher(db_session, sample_user.id)
+    assert await get_sender_rule_matcher(db_session, sample_user.id) is first
+
+    invalidate_sender_rules(sample_user.id)
+    assert await get_sender_rule_matcher(db_session, sample_user.id) is not first
@@ -0,0 +1,85 @@
+"""Tests for the adaptive per-user sync cadence."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from app.core import background_sync, sync_schedule
+from app.mail.models import SyncState
+
+
+@pytest.fixture(autouse=True)
+def _clean_schedule():
+    sync_schedule.reset()
+    yield
+    sync_schedule.reset()
+
+
+def test_next_sync_delay_follows_activity_and_rate():
+    now = datetime.now(tz=UTC)
+    settings = sync_schedule.settings
+
+    active = sync_schedule.next_sync_delay(0.0, now - timedelta(minutes=1), now)
+    assert active == timedelta(seconds=settings.sync_min_interval_seconds)
+
+    quiet = sync_schedule.next_sync_delay(0.0, None, now)
+    assert quiet == timedelta(minutes=settings.sync_max_interval_minutes)
+
+    # 시간당 4통 → 15분마다
+    busy = sync_schedule.next_sync_delay(4.0, None, now)
+    assert busy == timedelta(minutes=15)
+
+
+def test_update_rate_decays_on_empty_syncs():
+    now = datetime.now(tz=UTC)
+    rate = sync_schedule.update_rate(None, 2, now - timedelta(hours=1), now)
+    assert rate == pytest.approx(2.0)
+
+    decayed = sync_schedule.update_rate(rate, 0, now - timedelta(hours=1), now)
+    assert decayed < rate
+
+
+def test_pop_due_skips_rescheduled_entries():
+    now = datetime.now(tz=UTC)
+    sync_schedule.schedule(1, now - timedelta(seconds=1))
+    sync_schedule.schedule(2, now + timedelta(hours=1))
+    # 활동으로 앞당겨진 일정은 이전 항목을 무효화
+    sync_schedule.schedule(2, now - timedelta(seconds=5))
+
+    assert sync_schedule.pop_due(now) == [2, 1]
+    assert sync_schedule.pop_due(now) == []
+
+
+async def test_sync_due_users_runs_only_due_users(
+    db_session, sample_user, background_sessions, monkeypatch
+):
+    """Only users whose next_due_at has passed are synced in a tick."""
+    from app.mail.models import User
+
+    idle_user = User(email="idle@example.com")
+    db_session.add(idle_user)
+    db_session.add(
+        SyncState(
+            user_id=sample_user.id,
+            source=sync_schedule.SCHEDULE_SOURCE,
+            next_due_at=datetime.now(tz=UTC) + timedelta(hours=1),
+        )
+    )
+    await db_session.commit()
+
+    synced: list[int] = []
+
+    async def fake_run_batch(user_ids):
+        synced.extend(user_ids)
+
+    monkeypatch.setattr(background_sync, "_run_batch", fake_run_batch)
+
+    started = await background_sync.sync_due_users()
+    await asyncio.gather(*background_sync._batch_tasks)
+
+    assert started == [idle_user.id]
+    assert synced == [idle_user.id]
+
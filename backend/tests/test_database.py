@@ -0,0 +1,140 @@
+"""Tests for the SQLite read/write session routing."""
+
+from __future__ import annotations
+
+from sqlalchemy import event, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core import database
+from app.core.database import Base, RoutingSession
+from app.mail.models import User
+
+
+async def test_routing_session_sends_writes_to_writer(tmp_path, monkeypatch):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'app.db'}"
+    reader = create_async_engine(url)
+    writer = create_async_engine(url, pool_size=1, max_overflow=0)
+    for engine in (reader, writer):
+        event.listen(engine.sync_engine, "connect", database._set_sqlite_pragmas)
+    monkeypatch.setattr(database, "engine", reader)
+    monkeypatch.setattr(database, "write_engine", writer)
+    sessions = async_sessionmaker(
+        class_=AsyncSession, sync_session_class=RoutingSession
+    )
+
+    async with writer.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+
+    async with sessions() as db:
+        await db.execute(select(User))
+        assert "writing" not in db.info
+
+        db.add(User(email="writer@example.com"))
+        # autoflush → writer; the session sees its own uncommitted row
+        assert await db.scalar(select(func.count()).select_from(User)) == 1
+        assert db.info["writing"] is True
+
+        # 다른 세션의 읽기는 커밋 전 쓰기에 막히지 않음 (WAL)
+        async with sessions() as other:
+            assert await other.scalar(select(func.count()).select_from(User)) == 0
+
+        await db.commit()
+        assert "writing" not in db.info
+
+    await reader.dispose()
+    await writer.dispose()
+
+
+def test_run_migrations_upgrades_existing_database(tmp_path):
+    from sqlalchemy import create_engine, inspect
+
+    import app.mail.models  # noqa: F401
+    from app.core.migrations import MIGRATIONS, applied_versions, run_migrations
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        # 이전 버전 스키마 흉내: 컬럼/인덱스 누락, 구식 인덱스 존재
+        conn.execute(text("DROP INDEX ix_mail_user_label_received"))
+        conn.execute(text("ALTER TABLE mails DROP COLUMN size_bytes"))
+        conn.execute(text("DROP INDEX ix_classification_feedback"))
+        conn.execute(
+            text("CREATE INDEX ix_mail_user_source ON mails (user_id, source)")
+        )
+
+    with engine.begin() as conn:
+        assert run_migrations(conn) == [m.version for m in MIGRATIONS]
+
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        mail_columns = {c["name"] for c in inspector.get_columns("mails")}
+        assert "size_bytes" in mail_columns
+        mail_indexes = {i["name"] for i in inspector.get_indexes("mails")}
+        assert "ix_mail_user_label_received" in mail_indexes
+        assert "ix_mail_user_source" not in mail_indexes
+        assert "ix_classification_feedback" in {
+            i["name"] for i in inspector.get_indexes("classifications")
+        }
+        assert applied_versions(conn) == {m.version for m in MIGRATIONS}
+        # 재실행 시 적용할 것 없음
+        assert run_migrations(conn) == []
+
+    engine.dispose()
+
+
+# 기준(baseline) 버전의 mails / sync_states 테이블
+_BASELINE_DDL = [
+    """CREATE TABLE mails (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        source VARCHAR NOT NULL,
+        external_id VARCHAR NOT NULL,
+        from_email VARCHAR, from_name VARCHAR, subject VARCHAR, to_email VARCHAR,
+        body_text TEXT, body_html TEXT, folder VARCHAR,
+        received_at DATETIME, is_read BOOLEAN NOT NULL,
+        created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL,
+        CONSTRAINT uq_mail_source UNIQUE (user_id, source, external_id)
+    )""",
+    "CREATE INDEX ix_mail_user_source ON mails (user_id, source)",
+    """CREATE TABLE sync_states (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL REFERENCES users (id),
+        source VARCHAR NOT NULL,
+        last_synced_at DATETIME, last_uid VARCHAR, next_page_token VARCHAR,
+        updated_at DATETIME NOT NULL,
+        CONSTRAINT uq_sync_state_source UNIQUE (user_id, source)
+    )""",
+    "INSERT INTO users (id, email, created_at, updated_at) "
+    "VALUES (1, 'old@example.com', '2024-01-01', '2024-01-01')",
+    "INSERT INTO mails (user_id, source, external_id, is_read, created_at, "
+    "updated_at) VALUES (1, 'gmail', 'm1', 0, '2024-01-01', '2024-01-01')",
+    "INSERT INTO sync_states (user_id, source, updated_at) "
+    "VALUES (1, 'gmail', '2024-01-01')",
+]
+
+
+def test_run_migrations_upgrades_baseline_schema(tmp_path):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    import app.mail.models  # noqa: F401
+    from app.core.migrations import run_migrations
+    from app.mail.models import Mail, SyncState
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    with engine.begin() as conn:
+        Base.metadata.tables["users"].create(conn)
+        for statement in _BASELINE_DDL:
+            conn.execute(text(statement))
+
+    with engine.begin() as conn:
+        run_migrations(conn)
+
+    with Session(engine) as session:
+        mail = session.execute(select(Mail)).scalar_one()
+        assert mail.snippet is None
+        assert mail.body_loaded is True  # 기존 메일은 본문을 받은 상태
+        state = session.execute(select(SyncState)).scalar_one()
+        assert state.history_id is None
+    engine.dispose()
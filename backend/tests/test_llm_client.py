@@ -0,0 +1,84 @@
+"""Tests for the app-scoped OpenAI client."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+from app.config import settings
+from app.core import llm_client
+from app.mail.services import classifier
+
+_COMPLETION = json.dumps({
+    "id": "c1",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [{
+        "index": 0,
+        "finish_reason": "stop",
+        "message": {"role": "assistant", "content": "{}"},
+    }],
+}).encode()
+
+
+class _KeepAliveServer:
+    """Minimal HTTP/1.1 server that keeps connections open and counts them."""
+
+    def __init__(self) -> None:
+        self.connections = 0
+        self.requests = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer) -> None:
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode().split("\r\n"):
+                    name, _, value = line.partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                await reader.readexactly(length)
+                self.requests += 1
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: application/json\r\n"
+                    + f"Content-Length: {len(_COMPLETION)}\r\n\r\n".encode()
+                    + _COMPLETION
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def test_shared_client_reuses_one_connection(monkeypatch):
+    """Calls from different modules share a client and its keep-alive pool."""
+    server = _KeepAliveServer()
+    tcp = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    port = tcp.sockets[0].getsockname()[1]
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{port}/v1")
+    monkeypatch.setattr(settings, "openai_api_key", "test-key")
+    monkeypatch.setattr(llm_client, "connection_stats", llm_client.ConnectionStats())
+    await llm_client.close_llm_client()
+    try:
+        client = llm_client.start_llm_client()
+        assert classifier._get_client() is client
+        for caller in (llm_client.get_llm_client, classifier._get_client):
+            await caller().chat.completions.create(
+                model="gpt-4o-mini", messages=[{"role": "user", "content": "hi"}]
+            )
+
+        assert (server.requests, server.connections) == (2, 1)
+        # httpcore trace 이벤트로 집계한 값이 실제 연결 수와 일치
+        stats = llm_client.connection_stats
+        assert (stats.requests, stats.new_connections) == (2, 1)
+        assert stats.reuse_rate == 0.5
+    finally:
+        await llm_client.close_llm_client()
+        tcp.close()
+        await tcp.wait_closed()
+    assert llm_client.get_llm_client() is not client
+    await llm_client.close_llm_client()
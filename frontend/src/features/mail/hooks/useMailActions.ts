@@ -12,6 +12,13 @@ export interface ClassifyProgress {
   total: number;
 }
 
+interface ClassifyChunkResult {
+  mail_id: number;
+  classification_id: number;
+  category: string;
+  confidence: number | null;
+}
+
 interface UseMailActionsProps {
   userInfo: UserInfo | null;
   sourceFilter: "all" | "gmail" | "naver";
@@ -119,6 +126,26 @@ export function useMailActions({
               processed: data.processed,
               total: data.total,
             });
+          } else if (data.type === "chunk") {
+            // 저장이 끝난 청크 결과를 바로 목록에 반영
+            const byMailId = new Map<number, ClassifyChunkResult>(
+              data.results.map((r: ClassifyChunkResult) => [r.mail_id, r])
+            );
+            setMessages((prev) =>
+              prev.map((m) => {
+                const r = byMailId.get(m.id);
+                if (!r) return m;
+                return {
+                  ...m,
+                  classification: {
+                    classification_id: r.classification_id,
+                    category: r.category,
+                    confidence: r.confidence,
+                    user_feedback: null,
+                  },
+                };
+              })
+            );
           } else if (data.type === "done") {
             classified = data.classified;
           } else if (data.type === "error") {
@@ -136,7 +163,7 @@ export function useMailActions({
       setClassifying(false);
       setClassifyProgress(null);
     }
-  }, [sourceFilter, loadMessages, loadCategoryCounts]);
+  }, [sourceFilter, loadMessages, loadCategoryCounts, setMessages]);
 
   const handleApplyLabels = useCallback(async () => {
     const classifiedMails = messages.filter((m) => m.classification);